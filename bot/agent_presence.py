@@ -0,0 +1,120 @@
+"""Agent Presence Registry
+Keeps agents and their heartbeats in memory so polls and online checks don't touch SQLite.
+
+- a heartbeat (every command long-poll) only updates a dict entry
+- flush() writes the changed last_seen values in one executemany transaction, run every
+  AGENT_PRESENCE_FLUSH_SECONDS, and reloads the agent rows so added/removed agents show up
+- "online" means a heartbeat within AGENT_ONLINE_SECONDS, answered from memory
+- API authentication does not trust the cached rows: refresh() re-reads the agent (a
+  primary-key lookup), so a rotated key or a removed agent takes effect immediately
+"""
+
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from config import settings
+from db import list_agents, get_agent, update_agents_last_seen
+
+logger = logging.getLogger(__name__)
+
+_DB_TIMESTAMP = '%Y-%m-%d %H:%M:%S'
+
+
+def _parse_last_seen(value: Optional[str]) -> Optional[float]:
+    """agents.last_seen (UTC CURRENT_TIMESTAMP format) as epoch seconds"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value[:19], _DB_TIMESTAMP).replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+
+def _format_last_seen(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime(_DB_TIMESTAMP)
+
+
+class AgentPresence:
+    """In-memory agent rows and heartbeats with batched last_seen persistence."""
+
+    def __init__(self, online_seconds: int = 300):
+        self.online_seconds = online_seconds
+        self._agents: Dict[int, Dict] = {}
+        self._last_seen: Dict[int, float] = {}
+        # Heartbeats not yet written to the database
+        self._dirty: Dict[int, float] = {}
+        self._loaded = False
+
+    async def load(self):
+        """(Re)load agent rows from the database; in-memory heartbeats newer than the DB win."""
+        agents = await list_agents()
+        self._agents = {a['id']: a for a in agents}
+        for agent_id, agent in self._agents.items():
+            stored = _parse_last_seen(agent.get('last_seen'))
+            if stored is not None and stored > self._last_seen.get(agent_id, 0):
+                self._last_seen[agent_id] = stored
+        for agent_id in list(self._last_seen):
+            if agent_id not in self._agents:
+                self._last_seen.pop(agent_id, None)
+                self._dirty.pop(agent_id, None)
+        self._loaded = True
+
+    async def get(self, agent_id: int) -> Optional[Dict]:
+        """Agent row from memory, loading it from the database on a miss."""
+        agent = self._agents.get(agent_id)
+        if agent is None:
+            agent = await get_agent(agent_id)
+            if agent is not None:
+                self._agents[agent_id] = agent
+        return agent
+
+    async def refresh(self, agent_id: int) -> Optional[Dict]:
+        """Agent row read from the database (None if removed); updates or drops the cached row."""
+        agent = await get_agent(agent_id)
+        if agent is None:
+            self._agents.pop(agent_id, None)
+            self._last_seen.pop(agent_id, None)
+            self._dirty.pop(agent_id, None)
+        else:
+            self._agents[agent_id] = agent
+        return agent
+
+    def heartbeat(self, agent_id: int):
+        """Record that agent_id is alive now (no database write)."""
+        now = time.time()
+        self._last_seen[agent_id] = now
+        self._dirty[agent_id] = now
+
+    def is_online(self, agent_id: int) -> bool:
+        seen = self._last_seen.get(agent_id)
+        return seen is not None and time.time() - seen <= self.online_seconds
+
+    async def online_agents(self) -> List[Dict]:
+        """Agents with a heartbeat within online_seconds, ordered by id."""
+        if not self._loaded:
+            await self.load()
+        online = []
+        for agent_id in sorted(self._agents):
+            if self.is_online(agent_id):
+                agent = dict(self._agents[agent_id])
+                agent['last_seen'] = _format_last_seen(self._last_seen[agent_id])
+                online.append(agent)
+        return online
+
+    async def flush(self) -> int:
+        """Write pending heartbeats to agents.last_seen in one batch. Returns agents written."""
+        if not self._dirty:
+            return 0
+        pending, self._dirty = self._dirty, {}
+        try:
+            return await update_agents_last_seen({i: _format_last_seen(ts) for i, ts in pending.items()})
+        except Exception:
+            # Keep them for the next flush unless a newer heartbeat arrived meanwhile
+            for agent_id, ts in pending.items():
+                self._dirty.setdefault(agent_id, ts)
+            raise
+
+
+agent_presence = AgentPresence(online_seconds=settings.agent_online_seconds)
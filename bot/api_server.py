@@ -0,0 +1,210 @@
+"""HTTP API Server
+aiohttp server on AGENT_API_PORT. Receives Zoom webhooks at POST /zoom/webhook
+(enabled when ZOOM_WEBHOOK_SECRET_TOKEN is set), Telegram updates at WEBHOOK_PATH
+(DEFAULT_MODE=webhook), serves agent command long-polls (ZOOM_CONTROL_MODE=agent)
+and answers GET /health.
+
+Metrics (METRICS_ENABLED) are served at GET /metrics on a separate listener,
+METRICS_HOST:METRICS_PORT (127.0.0.1:8768 by default), never on the public API port.
+"""
+
+import hmac
+import json
+import logging
+from typing import Optional
+
+from aiohttp import web
+from aiogram.webhook.aiohttp_server import BaseRequestHandler
+
+from config import settings
+from metrics import render_metrics
+from zoom import verify_signature, url_validation_response
+from bot.zoom_events import apply_zoom_event
+from bot.command_broker import command_broker
+from bot.agent_presence import agent_presence
+
+logger = logging.getLogger(__name__)
+
+ZOOM_WEBHOOK_PATH = "/zoom/webhook"
+
+
+async def handle_health(request: web.Request) -> web.Response:
+    return web.json_response({"status": "ok"})
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    """Prometheus text exposition of the bot's metrics; requires the bearer METRICS_TOKEN when set."""
+    token = settings.metrics_token
+    if token:
+        auth = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(auth, f"Bearer {token}"):
+            return web.Response(status=401, text="unauthorized\n")
+    return web.Response(text=render_metrics(), content_type="text/plain", charset="utf-8")
+
+
+async def handle_zoom_webhook(request: web.Request) -> web.Response:
+    """Verify and apply one Zoom event notification.
+
+    Returns 401 for a bad or stale signature, 500 if applying fails (so Zoom retries), 200 otherwise.
+    """
+    secret = settings.zoom_webhook_secret_token
+    body = await request.read()
+    if not verify_signature(
+        body,
+        request.headers.get("x-zm-request-timestamp"),
+        request.headers.get("x-zm-signature"),
+        secret,
+    ):
+        logger.warning("Rejected Zoom webhook with invalid signature from %s", request.remote)
+        return web.json_response({"error": "invalid signature"}, status=401)
+
+    try:
+        event = json.loads(body)
+    except ValueError:
+        return web.json_response({"error": "invalid json"}, status=400)
+
+    if event.get("event") == "endpoint.url_validation":
+        plain_token = (event.get("payload") or {}).get("plainToken", "")
+        logger.info("Answering Zoom webhook URL validation")
+        return web.json_response(url_validation_response(plain_token, secret))
+
+    try:
+        await apply_zoom_event(event)
+    except Exception as e:
+        logger.exception("Failed to apply Zoom event %s: %s", event.get("event"), e)
+        return web.json_response({"error": "internal error"}, status=500)
+    return web.json_response({"status": "ok"})
+
+
+async def _authenticated_agent_id(request: web.Request) -> int:
+    """Agent id from the URL, checked against the agent's api_key (X-Agent-Key header).
+
+    The key is read from the database on every request, never from the presence cache.
+    """
+    try:
+        agent_id = int(request.match_info["agent_id"])
+    except ValueError:
+        raise web.HTTPNotFound()
+    agent = await agent_presence.refresh(agent_id)
+    key = request.headers.get("X-Agent-Key", "")
+    if not agent or not agent.get("api_key") or not hmac.compare_digest(key, agent["api_key"]):
+        raise web.HTTPUnauthorized(text=json.dumps({"error": "invalid agent key"}), content_type="application/json")
+    return agent_id
+
+
+async def handle_agent_commands(request: web.Request) -> web.Response:
+    """Long-poll for commands: returns as soon as any are queued, or an empty list after ?wait= seconds."""
+    agent_id = await _authenticated_agent_id(request)
+    try:
+        wait = float(request.query.get("wait", settings.agent_poll_wait_seconds))
+    except ValueError:
+        return web.json_response({"error": "invalid wait"}, status=400)
+    wait = min(max(wait, 0), settings.agent_poll_wait_seconds)
+
+    agent_presence.heartbeat(agent_id)
+    commands = await command_broker.next_commands(agent_id, wait)
+    if commands:
+        logger.info("Delivered %d commands to agent %s", len(commands), agent_id)
+    return web.json_response({"commands": commands})
+
+
+async def handle_agent_command_result(request: web.Request) -> web.Response:
+    """Agent reports a command result: {"status": "done"|"failed", "result": "..."}."""
+    agent_id = await _authenticated_agent_id(request)
+    try:
+        command_id = int(request.match_info["command_id"])
+        body = await request.json()
+    except ValueError:
+        return web.json_response({"error": "invalid request"}, status=400)
+    status = body.get("status")
+    if status not in ("done", "failed"):
+        return web.json_response({"error": "status must be done or failed"}, status=400)
+    result = body.get("result")
+    if not await command_broker.complete(agent_id, command_id, status, None if result is None else str(result)):
+        # Unknown, someone else's, already reported or timed out
+        return web.json_response({"error": "command not open"}, status=409)
+    return web.json_response({"status": "ok"})
+
+
+_telegram_handler: Optional[BaseRequestHandler] = None
+
+
+def register_telegram_webhook(handler: BaseRequestHandler):
+    """Serve Telegram updates at WEBHOOK_PATH with handler (call before start_api_server)."""
+    global _telegram_handler
+    _telegram_handler = handler
+
+
+def create_app() -> web.Application:
+    """Build the aiohttp application with all API routes (metrics excluded, see create_metrics_app)."""
+    app = web.Application()
+    app.router.add_get("/health", handle_health)
+    if _telegram_handler is not None:
+        # Also registers the handler's close() (drain in-flight updates) as a shutdown hook
+        _telegram_handler.register(app, path=settings.webhook_path)
+    if settings.zoom_webhook_secret_token:
+        app.router.add_post(ZOOM_WEBHOOK_PATH, handle_zoom_webhook)
+    else:
+        logger.info("ZOOM_WEBHOOK_SECRET_TOKEN not set; Zoom webhook endpoint disabled")
+    if settings.zoom_control_mode.lower() == "agent":
+        app.router.add_get("/agents/{agent_id}/commands", handle_agent_commands)
+        app.router.add_post("/agents/{agent_id}/commands/{command_id}", handle_agent_command_result)
+    return app
+
+
+def create_metrics_app() -> web.Application:
+    """Build the aiohttp application for the metrics listener."""
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    return app
+
+
+_runner: Optional[web.AppRunner] = None
+_metrics_runner: Optional[web.AppRunner] = None
+
+
+async def _start_metrics_server():
+    """Serve /metrics on METRICS_HOST:METRICS_PORT; failures are logged, not raised."""
+    global _metrics_runner
+    if settings.metrics_host not in ("127.0.0.1", "::1", "localhost") and not settings.metrics_token:
+        logger.warning("Metrics are served on %s without METRICS_TOKEN; anyone who can reach port %d can read them",
+                       settings.metrics_host, settings.metrics_port)
+    runner = web.AppRunner(create_metrics_app(), access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, settings.metrics_host, settings.metrics_port).start()
+    except OSError as e:
+        logger.error("Failed to start metrics server on %s:%d: %s", settings.metrics_host, settings.metrics_port, e)
+        await runner.cleanup()
+        return
+    _metrics_runner = runner
+    logger.info("Metrics served at http://%s:%d/metrics", settings.metrics_host, settings.metrics_port)
+
+
+async def start_api_server():
+    """Start the API server on AGENT_API_PORT (call this on bot startup)."""
+    global _runner
+    if _runner is not None:
+        logger.warning("API server already running")
+        return
+    runner = web.AppRunner(create_app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, settings.agent_api_host, settings.agent_api_port)
+    await site.start()
+    _runner = runner
+    logger.info("API server listening on %s:%d", settings.agent_api_host, settings.agent_api_port)
+    if settings.metrics_enabled:
+        await _start_metrics_server()
+
+
+async def stop_api_server():
+    """Stop the API server (call this on bot shutdown)."""
+    global _runner, _metrics_runner
+    if _metrics_runner is not None:
+        await _metrics_runner.cleanup()
+        _metrics_runner = None
+    if _runner is None:
+        return
+    await _runner.cleanup()
+    _runner = None
+    logger.info("API server stopped")
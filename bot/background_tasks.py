@@ -1,202 +1,270 @@
 """Background Tasks for Zoom Bot
-Handles periodic updates like cloud recording fetching, expired meeting cleanup, etc.
+Handles periodic updates like meeting sync, cloud recording fetching, expired meeting cleanup, etc.
+Every task is a job on the shared scheduler (bot/scheduler.py).
 """
 
-import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, Optional
 from zoom import zoom_client
-from db import list_meetings, update_meeting_cloud_recording_data, get_meeting_cloud_recording_data, update_meeting_status
+from bot.zoom_events import zoom_poll_interval
+from bot.agent_presence import agent_presence
+from bot.scheduler import scheduler
+from shortener import check_shortener_config
+from config import settings
+from db import list_meetings, update_meeting_cloud_recording_data, update_meeting_status, sync_meetings_from_zoom
+from db import get_recording_sync_state, touch_recording_sync
+from db import create_incremental_backup, prune_backups, prune_backup_changelog, run_retention
 
 logger = logging.getLogger(__name__)
 
+MEETING_SYNC_JOB = 'meeting_sync'
+
 
 class BackgroundTaskManager:
-    """Manages background tasks for the bot."""
-    
+    """Registers the bot's periodic jobs with the scheduler and starts/stops it."""
+
     def __init__(self):
         self.is_running = False
-        self.tasks = []
-        
-    async def start(self):
-        """Start all background tasks."""
+        self.bot = None
+
+    async def start(self, bot=None):
+        """Start all background tasks.
+
+        bot is used to deliver scheduled backups to the owner; without it backups are only kept locally.
+        """
         if self.is_running:
             logger.warning("Background tasks already running")
             return
-        
+
         self.is_running = True
+        self.bot = bot
         logger.info("Starting background tasks")
-        
-        # Create tasks
-        self.tasks = [
-            asyncio.create_task(self._periodic_cloud_recording_sync()),
-            asyncio.create_task(self._periodic_cleanup()),
+
+        # Shared-state jobs are leader_only: with several replicas only the leader runs them.
+        # Zoom-heavy jobs share the 'zoom' group, so a slow Zoom API never has two of them in flight
+        jobs = [
+            (MEETING_SYNC_JOB, self._sync_meetings, lambda: zoom_poll_interval(30 * 60),
+             dict(run_on_start=True, group='zoom', leader_only=True)),
+            ('cloud_recording_sync', self._cloud_recording_sync, lambda: zoom_poll_interval(1800),
+             dict(group='zoom', leader_only=True)),
+            ('cleanup', self._cleanup, 6 * 3600, dict(leader_only=True)),
+            # Per-replica state: every replica runs these
+            ('shortener_config', check_shortener_config, 5, dict(jitter=0)),
         ]
-        
-        logger.info("Background tasks started: %d tasks", len(self.tasks))
-    
+        if settings.backup_interval_minutes > 0:
+            jobs.append(('backup', self._backup, settings.backup_interval_minutes * 60, dict(leader_only=True)))
+        # Keeps the change-tracking log bounded even when no scheduled backup consumes it
+        jobs.append(('backup_changelog', prune_backup_changelog, 3600, dict(leader_only=True)))
+        if settings.zoom_control_mode.lower() == "agent":
+            jobs.append(('agent_presence_flush', self._flush_agent_presence, settings.agent_presence_flush_seconds, {}))
+        if settings.retention_interval_hours > 0:
+            jobs.append(('retention', run_retention, settings.retention_interval_hours * 3600, dict(leader_only=True)))
+
+        for name, func, interval, options in jobs:
+            if not scheduler.has_job(name):
+                scheduler.add_job(name, func, interval, **options)
+        await scheduler.start()
+
+        logger.info("Background tasks started: %d jobs", len(scheduler.jobs))
+
     async def stop(self):
         """Stop all background tasks."""
         if not self.is_running:
             logger.warning("Background tasks not running")
             return
-        
+
         self.is_running = False
         logger.info("Stopping background tasks")
-        
-        # Cancel all tasks
-        for task in self.tasks:
-            if not task.done():
-                task.cancel()
-                try:
-                    await task
-                except asyncio.CancelledError:
-                    pass
-        
-        self.tasks = []
+        await scheduler.stop()
         logger.info("Background tasks stopped")
-    
-    async def _periodic_cloud_recording_sync(self):
-        """Periodically check for cloud recordings and update database.
-        
-        Runs every 30 minutes.
+
+    async def _sync_meetings(self) -> Dict:
+        """Sync meetings from Zoom to the database.
+
+        Runs on startup and every 30 minutes; with Zoom webhooks enabled it is only a
+        reconciliation pass (ZOOM_RECONCILE_MINUTES). Also triggered by /sync_meetings.
+        """
+        logger.info("Running scheduled meeting sync")
+        stats = await sync_meetings_from_zoom(zoom_client)
+        logger.info("Meeting sync completed: %s", stats)
+        return stats
+
+    async def _backup(self):
+        """Add an incremental backup to the local chain in DATA_DIR/backups.
+
+        Runs every BACKUP_INTERVAL_MINUTES on a low-priority, I/O-throttled worker thread.
+        Old chains are pruned to BACKUP_RETENTION, and the archive is sent to the owner
+        only when something changed since the previous backup.
+        """
+        logger.debug("Running scheduled backup")
+        stats = await create_incremental_backup(low_priority=True)
+        await prune_backups()
+
+        if stats['kind'] == 'none':
+            logger.debug("Scheduled backup: no changes since last backup")
+            return
+
+        logger.info("Scheduled %s backup created: %s (%d bytes)",
+                    stats['kind'], stats['backup_id'], stats['bytes_written'])
+        await self._send_backup_to_owner(stats)
+
+    async def _flush_agent_presence(self):
+        """Write agent heartbeats to agents.last_seen in one batch.
+
+        Runs every AGENT_PRESENCE_FLUSH_SECONDS and also reloads the agent rows,
+        so agents added or removed in the database are picked up.
+        """
+        written = await agent_presence.flush()
+        if written:
+            logger.debug("Flushed last_seen of %d agents", written)
+        await agent_presence.load()
+
+    async def _send_backup_to_owner(self, stats: Dict):
+        """Deliver a scheduled backup archive to the owner chat."""
+        if self.bot is None or not settings.owner_id:
+            return
+
+        from aiogram.types import FSInputFile
+        if stats['kind'] == 'full':
+            detail = "backup penuh (base baru)"
+        else:
+            detail = f"{stats.get('changes', 0)} baris berubah"
+        caption = (
+            f"🗄 Backup terjadwal ({stats['kind']})\n"
+            f"• {detail}\n"
+            f"• Ukuran: {stats['bytes_written'] / 1024:.1f} KB"
+        )
+        try:
+            await self.bot.send_document(
+                settings.owner_id,
+                document=FSInputFile(stats['path']),
+                caption=caption,
+                disable_notification=True,
+            )
+        except Exception as e:
+            logger.warning("Failed to send scheduled backup to owner: %s", e)
+
+    async def _cloud_recording_sync(self):
+        """Check for cloud recordings and update database.
+
+        Runs every 30 minutes; with Zoom webhooks (recording.completed) enabled it only
+        reconciles every ZOOM_RECONCILE_MINUTES.
         Skips recordings that were checked less than 1 hour ago (to avoid excessive API calls).
         """
-        logger.info("Cloud Recording Sync task started (interval: 30 minutes)")
-        
-        while self.is_running:
+        logger.debug("Running periodic cloud recording sync")
+
+        meetings = await list_meetings()
+        logger.debug("Found %d meetings for cloud recording check", len(meetings))
+
+        for meeting in meetings:
+            zoom_meeting_id = meeting.get('zoom_meeting_id')
+            status = meeting.get('status')
+
+            # Only check completed or expired meetings (not active)
+            if status not in ['expired', 'deleted', 'completed']:
+                logger.debug("Skipping meeting %s: status=%s", zoom_meeting_id, status)
+                continue
+
             try:
-                await asyncio.sleep(1800)  # 30 minutes
-                
-                logger.debug("Running periodic cloud recording sync")
-                
-                meetings = await list_meetings()
-                logger.debug("Found %d meetings for cloud recording check", len(meetings))
-                
-                for meeting in meetings:
-                    if not self.is_running:
-                        break
-                    
-                    zoom_meeting_id = meeting.get('zoom_meeting_id')
-                    status = meeting.get('status')
-                    
-                    # Only check completed or expired meetings (not active)
-                    if status not in ['expired', 'deleted', 'completed']:
-                        logger.debug("Skipping meeting %s: status=%s", zoom_meeting_id, status)
-                        continue
-                    
+                # Get sync state (last check time, with or without recordings)
+                sync_state = await get_recording_sync_state(zoom_meeting_id)
+
+                # Check if we should refresh (if last checked was > 1 hour ago)
+                if sync_state and sync_state.get('last_checked'):
                     try:
-                        # Get cached recording data
-                        cached_data = await get_meeting_cloud_recording_data(zoom_meeting_id)
-                        
-                        # Check if we should refresh (if last checked was > 1 hour ago)
-                        if cached_data and cached_data.get('last_checked'):
-                            try:
-                                last_checked = datetime.fromisoformat(cached_data['last_checked'])
-                                if datetime.now() - last_checked < timedelta(hours=1):
-                                    logger.debug("Meeting %s: cached recording data still fresh", zoom_meeting_id)
-                                    continue
-                            except Exception as e:
-                                logger.debug("Error parsing last_checked: %s", e)
-                        
-                        # Fetch cloud recording data from Zoom API
-                        logger.debug("Fetching cloud recordings for meeting %s", zoom_meeting_id)
-                        recording_data = await zoom_client.get_cloud_recording_urls(zoom_meeting_id)
-                        
-                        if recording_data:
-                            # Add last_checked timestamp
-                            recording_data['last_checked'] = datetime.now().isoformat()
-                            
-                            # Save to database
-                            await update_meeting_cloud_recording_data(zoom_meeting_id, recording_data)
-                            
-                            recording_count = recording_data.get('recording_count', 0)
-                            logger.info("Meeting %s: cloud recordings found (%d files)", 
-                                       zoom_meeting_id, recording_count)
-                        else:
-                            # No recordings yet, but still update timestamp to avoid excessive API calls
-                            if cached_data:
-                                cached_data['last_checked'] = datetime.now().isoformat()
-                                await update_meeting_cloud_recording_data(zoom_meeting_id, cached_data)
-                            
-                            logger.debug("Meeting %s: no cloud recordings available yet", zoom_meeting_id)
-                    
+                        last_checked = datetime.fromisoformat(sync_state['last_checked'])
+                        if datetime.now() - last_checked < timedelta(hours=1):
+                            logger.debug("Meeting %s: cached recording data still fresh", zoom_meeting_id)
+                            continue
                     except Exception as e:
-                        logger.error("Error fetching cloud recordings for meeting %s: %s", zoom_meeting_id, e)
-                
-                logger.debug("Periodic cloud recording sync completed")
-            
-            except asyncio.CancelledError:
-                logger.info("Cloud Recording Sync task cancelled")
-                break
+                        logger.debug("Error parsing last_checked: %s", e)
+
+                # Fetch cloud recording data from Zoom API
+                logger.debug("Fetching cloud recordings for meeting %s", zoom_meeting_id)
+                recording_data = await zoom_client.get_cloud_recording_urls(zoom_meeting_id)
+
+                if recording_data:
+                    # Add last_checked timestamp
+                    recording_data['last_checked'] = datetime.now().isoformat()
+
+                    # Save to database
+                    await update_meeting_cloud_recording_data(zoom_meeting_id, recording_data)
+
+                    recording_count = recording_data.get('recording_count', 0)
+                    logger.info("Meeting %s: cloud recordings found (%d files)",
+                               zoom_meeting_id, recording_count)
+                else:
+                    # No recordings yet, but still update timestamp to avoid excessive API calls
+                    # (only the sync state row is written; stored recordings are kept as they are)
+                    await touch_recording_sync(zoom_meeting_id)
+
+                    logger.debug("Meeting %s: no cloud recordings available yet", zoom_meeting_id)
+
             except Exception as e:
-                logger.exception("Error in cloud recording sync task: %s", e)
-                # Continue running despite errors
-    
-    async def _periodic_cleanup(self):
-        """Periodically clean up old/expired meetings.
-        
+                logger.error("Error fetching cloud recordings for meeting %s: %s", zoom_meeting_id, e)
+
+        logger.debug("Periodic cloud recording sync completed")
+
+    async def _cleanup(self):
+        """Clean up old/expired meetings.
+
         Runs every 6 hours.
         Deletes cloud recording data for meetings older than 30 days.
         """
-        logger.info("Cleanup task started (interval: 6 hours)")
-        
-        while self.is_running:
+        logger.debug("Running periodic cleanup")
+
+        meetings = await list_meetings()
+        logger.debug("Found %d meetings for cleanup check", len(meetings))
+
+        cutoff_date = datetime.now() - timedelta(days=30)
+        cleanup_count = 0
+
+        for meeting in meetings:
+            zoom_meeting_id = meeting.get('zoom_meeting_id')
+            created_at_str = meeting.get('created_at')
+
+            if not created_at_str:
+                continue
+
             try:
-                await asyncio.sleep(21600)  # 6 hours
-                
-                logger.debug("Running periodic cleanup")
-                
-                meetings = await list_meetings()
-                logger.debug("Found %d meetings for cleanup check", len(meetings))
-                
-                cutoff_date = datetime.now() - timedelta(days=30)
-                cleanup_count = 0
-                
-                for meeting in meetings:
-                    if not self.is_running:
-                        break
-                    
-                    zoom_meeting_id = meeting.get('zoom_meeting_id')
-                    created_at_str = meeting.get('created_at')
-                    
-                    if not created_at_str:
-                        continue
-                    
-                    try:
-                        created_at = datetime.fromisoformat(created_at_str)
-                        
-                        if created_at < cutoff_date:
-                            # Clear cloud recording data for old meetings
-                            cached_data = await get_meeting_cloud_recording_data(zoom_meeting_id)
-                            if cached_data:
-                                await update_meeting_cloud_recording_data(zoom_meeting_id, None)
-                                cleanup_count += 1
-                                logger.debug("Cleared cloud recording data for old meeting %s", zoom_meeting_id)
-                    
-                    except Exception as e:
-                        logger.warning("Error processing meeting %s for cleanup: %s", zoom_meeting_id, e)
-                
-                logger.info("Periodic cleanup completed: cleared %d old meeting records", cleanup_count)
-            
-            except asyncio.CancelledError:
-                logger.info("Cleanup task cancelled")
-                break
+                created_at = datetime.fromisoformat(created_at_str)
+
+                if created_at < cutoff_date:
+                    # Clear cloud recording data for old meetings
+                    sync_state = await get_recording_sync_state(zoom_meeting_id)
+                    if sync_state:
+                        await update_meeting_cloud_recording_data(zoom_meeting_id, None)
+                        cleanup_count += 1
+                        logger.debug("Cleared cloud recording data for old meeting %s", zoom_meeting_id)
+
             except Exception as e:
-                logger.exception("Error in cleanup task: %s", e)
-                # Continue running despite errors
+                logger.warning("Error processing meeting %s for cleanup: %s", zoom_meeting_id, e)
+
+        logger.info("Periodic cleanup completed: cleared %d old meeting records", cleanup_count)
 
 
 # Global instance
 bg_task_manager = BackgroundTaskManager()
 
 
-async def start_background_tasks():
+async def start_background_tasks(bot=None):
     """Start background tasks (call this on bot startup)."""
-    await bg_task_manager.start()
+    await bg_task_manager.start(bot)
 
 
 async def stop_background_tasks():
     """Stop background tasks (call this on bot shutdown)."""
     await bg_task_manager.stop()
+
+
+async def sync_meetings_now() -> Dict:
+    """Run the meeting sync job right away and return its stats.
+
+    Goes through the scheduler so it never overlaps a scheduled sync, but skips the 'zoom'
+    group so a user never waits behind a long recording sweep; falls back to a direct sync
+    when background tasks are not running.
+    """
+    if scheduler.is_running and scheduler.has_job(MEETING_SYNC_JOB):
+        return await scheduler.run_now(MEETING_SYNC_JOB)
+    return await sync_meetings_from_zoom(zoom_client)
@@ -0,0 +1,139 @@
+"""Agent Command Broker
+Delivers agent commands in-process instead of having agents poll the database.
+
+- every command is written to agent_commands first (the durable record), then its id is
+  pushed onto the agent's asyncio.Queue, waking a parked long-poll immediately
+- every poll claims once on arrival and again whenever it is woken, with claim_commands
+  (atomic UPDATE ... RETURNING), so concurrent polls of one agent never receive the same command
+- wake-ups are per process: with several replicas (leader election) a command submitted on
+  one replica cannot wake a poll parked on another, so polls also re-claim every
+  poll_interval seconds (AGENT_COMMAND_POLL_SECONDS)
+- one timer fires at the earliest command lease deadline and fails expired commands with
+  an index range scan; with no open commands there is no timer at all
+- idle agents hold no tasks or timers; a waiting long-poll is just a parked future
+- with leader election only the leader sweeps; it then re-checks at least every timeout,
+  since commands may also be queued by other replicas
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from config import settings
+from db import add_command, claim_commands, complete_command, check_timeout_commands, next_command_lease_expiry
+
+logger = logging.getLogger(__name__)
+
+
+class CommandBroker:
+    """Per-agent wake-up queues with long-poll delivery and lease-based timeouts."""
+
+    def __init__(self, timeout_seconds: int = 60):
+        self.timeout_seconds = timeout_seconds
+        self._queues: Dict[int, asyncio.Queue] = {}
+        self._sweep_timer: Optional[asyncio.TimerHandle] = None
+        self._sweep_at: Optional[float] = None
+        self._tasks: set = set()
+        # Async callable deciding whether this replica runs the timeout sweep (None: always)
+        self.leader_guard: Optional[Callable[[], Awaitable[bool]]] = None
+        # Seconds between database re-claims of a parked poll (None: only when woken)
+        self.poll_interval: Optional[float] = None
+
+    def _queue(self, agent_id: int) -> asyncio.Queue:
+        queue = self._queues.get(agent_id)
+        if queue is None:
+            queue = self._queues[agent_id] = asyncio.Queue()
+        return queue
+
+    def _schedule_sweep(self, delay: float):
+        """Make sure the timeout sweep runs no later than delay seconds from now."""
+        loop = asyncio.get_running_loop()
+        # Leases have one-second resolution
+        when = loop.time() + max(delay, 0) + 1
+        if self._sweep_at is not None and self._sweep_at <= when:
+            return
+        if self._sweep_timer is not None:
+            self._sweep_timer.cancel()
+        self._sweep_at = when
+        self._sweep_timer = loop.call_at(when, self._on_sweep)
+
+    def _on_sweep(self):
+        self._sweep_timer = self._sweep_at = None
+        task = asyncio.create_task(self._sweep())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _sweep(self):
+        try:
+            if self.leader_guard is not None and not await self.leader_guard():
+                # A follower keeps checking in case it becomes the leader
+                self._schedule_sweep(self.timeout_seconds)
+                return
+            count = await check_timeout_commands()
+            if count:
+                logger.info("Marked %d commands as failed due to timeout", count)
+            delay = await next_command_lease_expiry()
+        except Exception as e:
+            logger.exception("Error in agent command timeout sweep: %s", e)
+            delay = self.timeout_seconds
+        if self.leader_guard is not None:
+            delay = self.timeout_seconds if delay is None else min(delay, self.timeout_seconds)
+        if delay is not None:
+            self._schedule_sweep(delay)
+
+    async def start(self):
+        """Fail commands that expired while the bot was down and arm the sweep (call once on startup)."""
+        await self._sweep()
+
+    def stop(self):
+        """Cancel the sweep timer (open commands stay in the database)."""
+        if self._sweep_timer is not None:
+            self._sweep_timer.cancel()
+        self._sweep_timer = self._sweep_at = None
+        for task in self._tasks:
+            task.cancel()
+        self._queues.clear()
+
+    async def submit(self, agent_id: int, action: str, payload: Optional[str] = None) -> int:
+        """Record a command and wake the agent's waiting long-poll. Returns the command id."""
+        command_id = await add_command(agent_id, action, payload, self.timeout_seconds)
+        self._queue(agent_id).put_nowait(command_id)
+        self._schedule_sweep(self.timeout_seconds)
+        logger.debug("Queued command %d (%s) for agent %s", command_id, action, agent_id)
+        return command_id
+
+    async def next_commands(self, agent_id: int, wait: float, limit: int = 10) -> List[Dict[str, Any]]:
+        """Wait up to `wait` seconds for commands for agent_id and claim them.
+
+        Returns as soon as at least one command is claimed (empty list on timeout).
+        Commands submitted on another replica are picked up within poll_interval.
+        """
+        queue = self._queue(agent_id)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        while True:
+            # Every poll claims first (an index lookup): wake tokens are drained below, so commands
+            # left over from an earlier claim capped at limit, or queued before a restart, are
+            # only found this way
+            while not queue.empty():
+                queue.get_nowait()
+            commands = await claim_commands(agent_id, limit, self.timeout_seconds)
+            if commands:
+                self._schedule_sweep(self.timeout_seconds)
+                return commands
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return []
+            if self.poll_interval:
+                remaining = min(remaining, self.poll_interval)
+            try:
+                await asyncio.wait_for(queue.get(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def complete(self, agent_id: int, command_id: int, status: str, result: Optional[str] = None) -> bool:
+        """Record the outcome reported by the agent. Returns False if it has no such running command."""
+        return await complete_command(agent_id, command_id, status, result)
+
+
+command_broker = CommandBroker(timeout_seconds=settings.agent_command_timeout_seconds)
@@ -14,6 +14,7 @@ from aiogram.fsm.storage.base import BaseStorage, StorageKey
 from aiogram.fsm.state import State
 from datetime import datetime, timezone
 from config import settings
+from metrics import FSM_SECONDS, FSM_ERRORS, timed
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +33,7 @@ class DatabaseFSMStorage(BaseStorage):
         # Configurable via settings.fsm_ttl_seconds if present
         self.ttl_seconds: int = getattr(settings, 'fsm_ttl_seconds', 300) or 300
 
+    @timed(FSM_SECONDS, op='set_state')
     async def set_state(self, key: StorageKey, state: Optional[State]) -> None:
         """Set FSM state for a user."""
         try:
@@ -56,6 +58,7 @@ class DatabaseFSMStorage(BaseStorage):
             logger.error("Failed to set FSM state for user %s: %s", key.user_id, e)
             raise
 
+    @timed(FSM_SECONDS, op='get_state')
     async def get_state(self, key: StorageKey) -> Optional[str]:
         """Get FSM state for a user."""
         try:
@@ -79,8 +82,11 @@ class DatabaseFSMStorage(BaseStorage):
                 return state
         except Exception as e:
             logger.error("Failed to get FSM state for user %s: %s", key.user_id, e)
+            # Swallowed here, so not seen by timed()
+            FSM_ERRORS.inc(op='get_state')
             return None
 
+    @timed(FSM_SECONDS, op='set_data')
     async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
         """Set FSM data for a user."""
         try:
@@ -105,6 +111,7 @@ class DatabaseFSMStorage(BaseStorage):
             logger.error("Failed to set FSM data for user %s: %s", key.user_id, e)
             raise
 
+    @timed(FSM_SECONDS, op='get_data')
     async def get_data(self, key: StorageKey) -> Dict[str, Any]:
         """Get FSM data for a user."""
         try:
@@ -115,8 +122,11 @@ class DatabaseFSMStorage(BaseStorage):
                 return data
         except Exception as e:
             logger.error("Failed to get FSM data for user %s: %s", key.user_id, e)
+            # Swallowed here, so not seen by timed()
+            FSM_ERRORS.inc(op='get_data')
             return {}
 
+    @timed(FSM_SECONDS, op='del_state')
     async def del_state(self, key: StorageKey) -> None:
         """Delete FSM state for a user."""
         try:
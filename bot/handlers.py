@@ -6,11 +6,12 @@ from aiogram.fsm.state import StatesGroup, State
 from aiogram.fsm.context import FSMContext
 from typing import Optional, List, Dict
 
-from db import add_pending_user, list_pending_users, list_all_users, update_user_status, get_user_by_telegram_id, ban_toggle_user, delete_user, add_meeting, update_meeting_short_url, update_meeting_short_url_by_join_url, list_meetings, list_meetings_with_shortlinks, sync_meetings_from_zoom, update_expired_meetings, update_meeting_status, update_meeting_details, update_meeting_recording_status, get_meeting_recording_status, update_meeting_live_status, get_meeting_live_status, sync_meeting_live_status_from_zoom, backup_database, backup_shorteners, create_backup_zip, restore_database, restore_shorteners, extract_backup_zip, search_users, update_command_status, check_timeout_commands, get_meeting_agent_id, get_meeting_cloud_recording_data, update_meeting_cloud_recording_data
+from db import add_pending_user, list_pending_users, list_all_users, update_user_status, get_user_by_telegram_id, ban_toggle_user, delete_user, add_meeting, update_meeting_short_url, update_meeting_short_url_by_join_url, update_meetings_short_urls_many, list_meetings, list_meetings_with_shortlinks, list_meetings_page, list_completed_meetings_page, sync_meetings_from_zoom, update_expired_meetings, update_meeting_status, update_meeting_details, update_meeting_recording_status, get_meeting_recording_status, update_meeting_live_status, get_meeting_live_status, sync_meeting_live_status_from_zoom, backup_database, backup_shorteners, create_backup_zip, create_backup_archive, create_incremental_backup, restore_database, restore_backup_chain, restore_shorteners, extract_backup_zip, search_users, update_command_status, check_timeout_commands, get_meeting_agent_id, get_meeting_cloud_recording_data, update_meeting_cloud_recording_data, add_shortlinks_many
 from bot.keyboards import pending_user_buttons, pending_user_owner_buttons, user_action_buttons, manage_users_buttons, role_selection_buttons, status_selection_buttons, list_meetings_buttons, shortener_provider_buttons, shortener_provider_selection_buttons, shortener_custom_choice_buttons, back_to_main_buttons, back_to_main_new_buttons, main_menu_keyboard, meetings_menu_keyboard, users_menu_keyboard, backup_menu_keyboard, info_menu_keyboard, shortener_menu_keyboard
 from config import settings
 from bot.auth import is_allowed_to_create, is_owner_or_admin, is_registered_user
 from zoom import zoom_client
+import asyncio
 import logging
 
 import re
@@ -19,8 +20,12 @@ from datetime import datetime, date, time, timedelta, timezone
 from zoneinfo import ZoneInfo
 from urllib.parse import urlparse
 import uuid
-from shortener import make_short
+from shortener import make_short, make_short_many, get_available_providers, get_provider_config
 from bot.utils.loading import LoadingContext
+from bot.utils.view_cache import view_cache, edit_if_changed
+from bot.command_broker import command_broker
+from bot.agent_presence import agent_presence
+from bot.background_tasks import sync_meetings_now
 import shlex
 import os
 import shutil
@@ -64,6 +69,14 @@ _MONTH_ID = {
     "December": "Desember",
 }
 
+# Indexed by datetime.weekday() / datetime.month
+_WEEKDAY_ID = tuple(_DAY_ID.values())
+_MONTH_NUM_ID = ("",) + tuple(_MONTH_ID.values())
+
+# Meeting list paging: rows loaded per page, and Telegram's limit for a message text
+MEETINGS_PER_PAGE = 5
+TELEGRAM_TEXT_LIMIT = 4096
+
 
 def format_zoom_start_time(iso_str: str | None) -> str:
     """Format Zoom start_time ISO string into Indonesian human-readable time using .env TIMEZONE.
@@ -169,21 +182,26 @@ def extract_zoom_meeting_id(url: str) -> Optional[str]:
     
     return None
 
+def _format_creator(telegram_id: str, username: Optional[str]) -> str:
+    """Format a meeting creator for display from created_by and the resolved username."""
+    if telegram_id == 'CreatedFromZoomApp':
+        return 'Dibuat dari Zoom App'
+    if username:
+        return f"@{username}"
+    return f"User {telegram_id}"
+
 async def _get_username_from_telegram_id(telegram_id: str) -> str:
     """Helper to get username from telegram_id for meeting creator display."""
     if telegram_id == 'CreatedFromZoomApp':
-        return 'Dibuat dari Zoom App'
+        return _format_creator(telegram_id, None)
     
     try:
         # Convert to int if it's a string representation of int
         tid = int(telegram_id)
         user = await get_user_by_telegram_id(tid)
-        if user and user.get('username'):
-            return f"@{user['username']}"
-        else:
-            return f"User {telegram_id}"
+        return _format_creator(telegram_id, user.get('username') if user else None)
     except (ValueError, TypeError):
-        return f"User {telegram_id}"
+        return _format_creator(telegram_id, None)
 
 def _parse_indonesia_date(date_str: str) -> Optional[date]:
     """Parse Indonesian date formats into date object.
@@ -740,7 +758,7 @@ async def cb_start_on_agent(c: CallbackQuery):
         await _agent_api_disabled_response(c)
         return
     meeting_id = c.data.split(':', 1)[1]
-    agents = _filter_online_agents(await list_agents())
+    agents = await agent_presence.online_agents()
     if not agents:
         await _safe_edit_or_fallback(c, "Tidak ada agent yang sedang online. Pastikan agent sudah terhubung dan polling ke server.")
         await c.answer()
@@ -799,7 +817,7 @@ async def cb_control_meeting(c: CallbackQuery, state: FSMContext):
     # Add agent info if available
     if agent_id:
         try:
-            agent = await get_agent(agent_id)
+            agent = await agent_presence.get(agent_id)
             if agent:
                 text += f"Agent: {agent['name']}\n"
         except Exception as e:
@@ -846,7 +864,7 @@ async def cb_agent_start(c: CallbackQuery, state: FSMContext):
         return
     meeting_id = parts[1]
     agent_id = int(parts[2])
-    agent = await get_agent(agent_id)
+    agent = await agent_presence.get(agent_id)
     if not agent:
         await _safe_edit_or_fallback(c, "Agent tidak ditemukan")
         await c.answer()
@@ -866,7 +884,7 @@ async def cb_agent_start(c: CallbackQuery, state: FSMContext):
         await c.answer()
         return
 
-    # queue command for agent to pick up via polling
+    # hand the command to the agent's long-poll (recorded in agent_commands first)
     try:
         # Create JSON payload for start_zoom action
         payload_data = {
@@ -878,7 +896,7 @@ async def cb_agent_start(c: CallbackQuery, state: FSMContext):
         }
         payload_json = json.dumps(payload_data)
         
-        cid = await add_command(agent_id, 'start_zoom', payload_json)
+        cid = await command_broker.submit(agent_id, 'start_zoom', payload_json)
         
         # Store meeting info in FSM state
         await state.update_data(
@@ -1333,7 +1351,7 @@ async def cb_toggle_record(c: CallbackQuery, state: FSMContext):
     if agent_id:
         try:
             payload = json.dumps({})  # Empty payload since action is now in the action field
-            await add_command(agent_id, action, payload)
+            await command_broker.submit(agent_id, action, payload)
             logger.info("Sent %s command to agent %s for meeting %s", action, agent_id, meeting_id)
         except Exception as e:
             logger.error("Failed to send command to agent %s: %s", agent_id, e)
@@ -1392,7 +1410,7 @@ async def cb_pause_record(c: CallbackQuery, state: FSMContext):
     if agent_id:
         try:
             payload = json.dumps({})  # Empty payload since action is now in the action field
-            await add_command(agent_id, action, payload)
+            await command_broker.submit(agent_id, action, payload)
             logger.info("Sent %s command to agent %s for meeting %s", action, agent_id, meeting_id)
         except Exception as e:
             logger.error("Failed to send command to agent %s: %s", agent_id, e)
@@ -1464,7 +1482,9 @@ async def cmd_help(msg: Message):
         help_text += "• /agents - Kelola agent (reinstall, remove, refresh status)\n"
         help_text += "• /sync_meetings - Sinkronkan meetings dari Zoom ke database\n"
         help_text += "• /check_expired - Periksa dan tandai meeting yang sudah lewat waktu mulai\n"
+        help_text += "• /short_batch [provider] - Buat short URL untuk semua meeting mendatang sekaligus\n"
         help_text += "• /backup - Buat backup database dan konfigurasi shorteners\n"
+        help_text += "• /backup inc - Backup inkremental (hanya perubahan sejak backup terakhir)\n"
         help_text += "• /restore - Restore dari file backup ZIP\n\n"
 
     help_text += "<b>💡 TIPS:</b>\n"
@@ -1696,7 +1716,7 @@ async def cmd_sync_meetings(msg: Message):
     await msg.reply("🔄 Memulai sinkronisasi meetings dari Zoom...")
     
     try:
-        stats = await sync_meetings_from_zoom(zoom_client)
+        stats = await sync_meetings_now()
         text = (
             "✅ <b>Sinkronisasi selesai!</b>\n\n"
             f"📊 <b>Statistik:</b>\n"
@@ -2061,7 +2081,7 @@ async def cb_cancel_create(c: CallbackQuery, state: FSMContext):
     await c.answer()
 
 
-@router.callback_query(lambda c: c.data == 'list_meetings')
+@router.callback_query(lambda c: c.data == 'list_meetings' or c.data.startswith('list_meetings:'))
 async def cb_list_meetings(c: CallbackQuery):
     if c.from_user is None:
         await c.answer("Informasi pengguna tidak tersedia")
@@ -2072,200 +2092,46 @@ async def cb_list_meetings(c: CallbackQuery):
         await c.answer("Anda belum terdaftar atau dibanned.")
         return
 
-    await c.answer("Mengambil daftar meeting...")
-    await _do_list_meetings(c)
-
-
-async def _do_list_meetings(c: CallbackQuery):
-    """Helper function to list meetings without initial answer."""
-    try:
-        all_meetings = await list_meetings_with_shortlinks()
-        # Filter only active meetings (already filtered in query)
-        # v2026-01-14: now includes 'done' status in query
-        meetings = all_meetings or []
-
-        # v2026-01-14: enforce listing range from local 00:00 today to +30 days
-        # Determine local timezone; default to WIB (UTC+7) if invalid
+    # list_meetings:<offset>[:<history>] comes from the page navigation buttons
+    offset, history = 0, ()
+    if ':' in c.data:
+        parts = c.data.split(':')
         try:
-            target_tz = ZoneInfo(settings.timezone)
-        except Exception:
-            target_tz = timezone(timedelta(hours=7))
+            offset = max(0, int(parts[1]))
+            history = tuple(int(p) for p in parts[2].split('.') if p) if len(parts) > 2 else ()
+        except (ValueError, IndexError):
+            offset, history = 0, ()
 
-        now_local = datetime.now(target_tz)
-        start_of_today_local = now_local.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_range_local = start_of_today_local + timedelta(days=30)
-
-        def _parse_to_local(st: str):
-            try:
-                if not st:
-                    return None
-                if isinstance(st, str) and st.endswith('Z'):
-                    dt = datetime.fromisoformat(st[:-1]).replace(tzinfo=timezone.utc)
-                else:
-                    dt = datetime.fromisoformat(st)
-                    if dt.tzinfo is None:
-                        dt = dt.replace(tzinfo=timezone.utc)
-                return dt.astimezone(target_tz)
-            except Exception:
-                return None
+    await c.answer("Mengambil daftar meeting...")
+    await _do_list_meetings(c, offset, history)
 
-        meetings = [
-            mm for mm in meetings
-            if (lambda dt_local: dt_local is not None and start_of_today_local <= dt_local <= end_range_local)
-               (_parse_to_local(mm.get('start_time', '')))
-        ]
 
-        # Sort meetings by start_time ascending (earliest first).
-        # We normalize parsed datetimes to UTC for consistent ordering.
-        def _parse_start_time_to_utc(st: str):
-            try:
-                if not st:
-                    return datetime.max.replace(tzinfo=timezone.utc)
-                # handle UTC 'Z' suffix
-                if isinstance(st, str) and st.endswith('Z'):
-                    dt = datetime.fromisoformat(st[:-1]).replace(tzinfo=timezone.utc)
-                else:
-                    dt = datetime.fromisoformat(st)
+def _meeting_list_tz():
+    """Timezone for the meeting list window; default to WIB (UTC+7) if invalid"""
+    try:
+        return ZoneInfo(settings.timezone)
+    except Exception:
+        return timezone(timedelta(hours=7))
 
-                if dt.tzinfo is None:
-                    # assume UTC when no tz provided
-                    dt = dt.replace(tzinfo=timezone.utc)
 
-                # return in UTC
-                return dt.astimezone(timezone.utc)
-            except Exception:
-                # push unparsable times to the end
-                return datetime.max.replace(tzinfo=timezone.utc)
+async def _do_list_meetings(c: CallbackQuery, offset: int = 0, history: tuple = ()):
+    """Helper function to list meetings without initial answer.
 
-        meetings = sorted(meetings, key=lambda mm: _parse_start_time_to_utc(mm.get('start_time', '')))
-        
-        if not meetings:
-            text = "📅 <b>Tidak ada meeting aktif/selesai yang tersimpan.</b>"
-            # Try to edit the message directly for refresh
-            from aiogram.types import Message as AiMessage
-            m = getattr(c, 'message', None)
-            if isinstance(m, AiMessage):
-                try:
-                    await m.edit_text(text, reply_markup=list_meetings_buttons())
-                except Exception:
-                    await c.answer("Tidak ada meeting aktif/selesai")
-            else:
-                await c.answer("Tidak ada meeting aktif/selesai")
-            return
-
-        text = "📅 <b>Daftar Zoom Meeting (Aktif & Selesai):</b>\n\n"
-        
-        for i, m in enumerate(meetings, 1):
-            topic = m.get('topic', 'No Topic')
-            start_time = m.get('start_time', '')
-            join_url = m.get('join_url', '')
-            shortlinks = m.get('shortlinks', [])
-            created_by = m.get('created_by', 'Unknown')
-            
-            # Get creator username
-            creator_username = await _get_username_from_telegram_id(created_by)
-            
-            # Include Meeting ID (try common keys) and Format time for custom display
-            meeting_id = m.get('zoom_meeting_id') or 'N/A'
-            try:
-                # Parse datetime dengan handling berbagai format
-                if start_time.endswith('Z'):
-                    # Format UTC dengan Z, parse sebagai UTC
-                    dt = datetime.fromisoformat(start_time[:-1]).replace(tzinfo=timezone.utc)
-                else:
-                    # Format ISO dengan timezone atau tanpa timezone
-                    dt = datetime.fromisoformat(start_time)
-
-                # Jika datetime sudah memiliki timezone info, gunakan langsung
-                # Jika tidak, anggap sebagai UTC dan konversi ke WIB
-                if dt.tzinfo is None:
-                    # Tidak ada timezone info, anggap UTC
-                    wib_tz = timezone(timedelta(hours=7))
-                    dt_wib = dt.replace(tzinfo=timezone.utc).astimezone(wib_tz)
-                else:
-                    # Sudah memiliki timezone info, konversi ke WIB jika perlu
-                    wib_tz = timezone(timedelta(hours=7))
-                    dt_wib = dt.astimezone(wib_tz)
-                
-                days_id = {
-                    0: 'Senin', 1: 'Selasa', 2: 'Rabu', 3: 'Kamis',
-                    4: 'Jumat', 5: 'Sabtu', 6: 'Minggu'
-                }
-                
-                months_id = {
-                    1: 'Januari', 2: 'Februari', 3: 'Maret', 4: 'April', 5: 'Mei', 6: 'Juni',
-                    7: 'Juli', 8: 'Agustus', 9: 'September', 10: 'Oktober', 11: 'November', 12: 'Desember'
-                }
-                
-                day_name = days_id[dt_wib.weekday()]
-                day = dt_wib.day
-                month_name = months_id[dt_wib.month]
-                year = dt_wib.year
-                time_str = dt_wib.strftime("%H:%M")
-                
-                formatted_time_custom = f"{day_name}, {day} {month_name} {year} pada pukul {time_str}"
-                
-            except Exception:
-                formatted_time_custom = "Waktu tidak tersedia"
-            
-            text += f"<b>{i}. {topic}</b>\n"
-            text += f"🆔 Meeting ID: {meeting_id}\n"
-            text += f"👤 Dibuat oleh: {creator_username}\n"
-            text += f"🕛 {formatted_time_custom}\n"
-            text += f"🔗 Link Zoom: {join_url}\n"
-            
-            # Display shortlinks with detailed info
-            if shortlinks:
-                text += f"🔗 <b>Shortlinks ({len(shortlinks)}):</b>\n"
-                for j, sl in enumerate(shortlinks, 1):
-                    provider_name = sl.get('provider', 'Unknown').upper()
-                    short_url = sl.get('short_url', 'N/A')
-                    custom_alias = sl.get('custom_alias')
-                    created_at = sl.get('created_at', '')
-                    
-                    # Format creation time
-                    try:
-                        if created_at:
-                            created_dt = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                            created_wib = created_dt.astimezone(timezone(timedelta(hours=7)))
-                            created_str = created_wib.strftime("%d/%m/%y %H:%M")
-                        else:
-                            created_str = "N/A"
-                    except:
-                        created_str = "N/A"
-                    
-                    text += f"  {j}. {provider_name}: {short_url}"
-                    if custom_alias:
-                        text += f" (custom: {custom_alias})"
-                    text += f" - {created_str}\n"
-            
-            text += "\n"
-        
-        # Build an inline keyboard with control buttons per meeting
-        kb_rows = []
-        for m_rec in meetings:
-            mid = m_rec.get('zoom_meeting_id') or ''
-            topic_short = (m_rec.get('topic') or 'No Topic')[:25]
-            if mid:
-                # Create row with 3 control buttons for each meeting
-                kb_rows.append([
-                    InlineKeyboardButton(text=f"🎥 {topic_short}", callback_data=f"control_zoom:{mid}"),
-                    InlineKeyboardButton(text="✏️ Edit", callback_data=f"edit_meeting:{mid}"),
-                    InlineKeyboardButton(text="🗑️ Delete", callback_data=f"confirm_delete:{mid}")
-                ])
-
-        # add Cloud Recording entry and navigation/back buttons
-        # Ensure the Cloud Recording button is visible even when meetings exist
-        kb_rows.append([InlineKeyboardButton(text="☁️ Cloud Recording", callback_data="list_cloud_recordings")])
-        kb_rows.append([InlineKeyboardButton(text="🔄 Refresh", callback_data="sync_refresh_list"), InlineKeyboardButton(text="🏠 Kembali ke Menu Utama", callback_data="back_to_main")])
-        kb = InlineKeyboardMarkup(inline_keyboard=kb_rows)
+    The rendered page is cached per data version, local date, offset and page history,
+    and the Telegram edit is skipped when the message already shows the same content.
+    """
+    from aiogram.types import Message as AiMessage
+    try:
+        today_local = datetime.now(_meeting_list_tz()).date()
+        text, kb = await view_cache.get_or_render(
+            ("meetings", today_local, offset, history), lambda: _render_meeting_list(offset, history)
+        )
 
         # Try to edit the message directly for refresh, if fails, don't send new message
-        from aiogram.types import Message as AiMessage
         m = getattr(c, 'message', None)
         if isinstance(m, AiMessage):
             try:
-                await m.edit_text(text, reply_markup=kb)
+                await edit_if_changed(m, text, reply_markup=kb)
             except Exception:
                 await c.answer("Gagal refresh daftar meeting, coba lagi")
         else:
@@ -2273,7 +2139,6 @@ async def _do_list_meetings(c: CallbackQuery):
     except Exception as e:
         logger.exception("Failed to list meetings: %s", e)
         # Try to edit the message directly, if fails, don't send new message
-        from aiogram.types import Message as AiMessage
         m = getattr(c, 'message', None)
         if isinstance(m, AiMessage):
             try:
@@ -2284,6 +2149,189 @@ async def _do_list_meetings(c: CallbackQuery):
             await c.answer("Gagal mengambil daftar meeting")
 
 
+def _tg_len(text: str) -> int:
+    """Length of text as Telegram counts it (UTF-16 code units); HTML tags are counted too, which only errs on the safe side"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def _format_meeting_start(start_time: str) -> str:
+    """Format a meeting start time as 'Hari, D Bulan YYYY pada pukul HH:MM' in WIB."""
+    try:
+        # Parse datetime dengan handling berbagai format
+        if start_time.endswith('Z'):
+            # Format UTC dengan Z, parse sebagai UTC
+            dt = datetime.fromisoformat(start_time[:-1]).replace(tzinfo=timezone.utc)
+        else:
+            # Format ISO dengan timezone atau tanpa timezone
+            dt = datetime.fromisoformat(start_time)
+
+        # Jika datetime sudah memiliki timezone info, gunakan langsung
+        # Jika tidak, anggap sebagai UTC dan konversi ke WIB
+        wib_tz = timezone(timedelta(hours=7))
+        if dt.tzinfo is None:
+            # Tidak ada timezone info, anggap UTC
+            dt_wib = dt.replace(tzinfo=timezone.utc).astimezone(wib_tz)
+        else:
+            # Sudah memiliki timezone info, konversi ke WIB jika perlu
+            dt_wib = dt.astimezone(wib_tz)
+        
+        day_name = _WEEKDAY_ID[dt_wib.weekday()]
+        month_name = _MONTH_NUM_ID[dt_wib.month]
+        time_str = dt_wib.strftime("%H:%M")
+        
+        return f"{day_name}, {dt_wib.day} {month_name} {dt_wib.year} pada pukul {time_str}"
+    except Exception:
+        return "Waktu tidak tersedia"
+
+
+def _format_meeting_entry(i: int, m: Dict, budget: Optional[int] = None) -> str:
+    """Format one meeting of the list.
+
+    With budget set, shortlink lines are dropped from the end (with a '+N lainnya' note)
+    so the entry stays within budget characters.
+    """
+    topic = m.get('topic', 'No Topic')
+    join_url = m.get('join_url', '')
+    shortlinks = m.get('shortlinks', [])
+    created_by = m.get('created_by', 'Unknown')
+    
+    # Creator username is resolved by the list query (LEFT JOIN users)
+    creator_username = _format_creator(created_by, m.get('creator_username'))
+    meeting_id = m.get('zoom_meeting_id') or 'N/A'
+    
+    text = f"<b>{i}. {topic}</b>\n"
+    text += f"🆔 Meeting ID: {meeting_id}\n"
+    text += f"👤 Dibuat oleh: {creator_username}\n"
+    text += f"🕛 {_format_meeting_start(m.get('start_time') or '')}\n"
+    text += f"🔗 Link Zoom: {join_url}\n"
+    
+    # Display shortlinks with detailed info
+    if shortlinks:
+        text += f"🔗 <b>Shortlinks ({len(shortlinks)}):</b>\n"
+        for j, sl in enumerate(shortlinks, 1):
+            provider_name = sl.get('provider', 'Unknown').upper()
+            short_url = sl.get('short_url', 'N/A')
+            custom_alias = sl.get('custom_alias')
+            created_at = sl.get('created_at', '')
+            
+            # Format creation time
+            try:
+                if created_at:
+                    created_dt = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+                    created_wib = created_dt.astimezone(timezone(timedelta(hours=7)))
+                    created_str = created_wib.strftime("%d/%m/%y %H:%M")
+                else:
+                    created_str = "N/A"
+            except:
+                created_str = "N/A"
+            
+            line = f"  {j}. {provider_name}: {short_url}"
+            if custom_alias:
+                line += f" (custom: {custom_alias})"
+            line += f" - {created_str}\n"
+            
+            remaining = len(shortlinks) - j + 1
+            more = f"  … +{remaining} shortlink lainnya\n"
+            if budget is not None and _tg_len(text + line) + _tg_len(more) + 1 > budget:
+                text += more
+                break
+            text += line
+    
+    return text + "\n"
+
+
+def _meeting_page_callback(offset: int, history: tuple) -> str:
+    """callback_data of a meeting list page: list_meetings:<offset>:<start of each earlier page, '.'-joined>.
+
+    Pages vary in size, so ◀️ needs the real start of the previous page. The oldest starts
+    are dropped to stay within Telegram's 64-byte limit; past them ◀️ returns to the first page.
+    """
+    while True:
+        data = f"list_meetings:{offset}:{'.'.join(str(o) for o in history)}"
+        if len(data) <= 64 or not history:
+            return data
+        history = history[1:]
+
+
+async def _render_meeting_list(offset: int = 0, history: tuple = ()) -> tuple[str, InlineKeyboardMarkup]:
+    """Build one page of the meeting list screen (text + keyboard).
+
+    Only MEETINGS_PER_PAGE meetings starting at offset are loaded from the database
+    (local 00:00 today to +30 days, earliest first). Entries are packed until the
+    text would exceed TELEGRAM_TEXT_LIMIT; the next page starts after the last
+    entry that fit. history holds the start offsets of the pages before this one.
+    """
+    # v2026-01-14: enforce listing range from local 00:00 today to +30 days
+    target_tz = _meeting_list_tz()
+    now_local = datetime.now(target_tz)
+    start_of_today_local = now_local.replace(hour=0, minute=0, second=0, microsecond=0)
+    end_range_local = start_of_today_local + timedelta(days=30)
+
+    meetings, total = await list_meetings_page(start_of_today_local, end_range_local, MEETINGS_PER_PAGE, offset)
+    if not meetings and total:
+        # Offset is past the end (meetings were removed since the button was drawn): show the last page
+        offset = (total - 1) // MEETINGS_PER_PAGE * MEETINGS_PER_PAGE
+        history = ()
+        meetings, total = await list_meetings_page(start_of_today_local, end_range_local, MEETINGS_PER_PAGE, offset)
+    
+    if not meetings:
+        return "📅 <b>Tidak ada meeting aktif/selesai yang tersimpan.</b>", list_meetings_buttons()
+
+    text = "📅 <b>Daftar Zoom Meeting (Aktif & Selesai):</b>\n\n"
+    # Reserve room for the page footer
+    budget = TELEGRAM_TEXT_LIMIT - _tg_len(f"<i>Meeting {total}–{total} dari {total}</i>")
+    
+    shown = 0
+    for i, m in enumerate(meetings, offset + 1):
+        entry = _format_meeting_entry(i, m)
+        if _tg_len(text + entry) > budget:
+            if shown:
+                break
+            # A single meeting larger than a message: trim its shortlinks
+            entry = _format_meeting_entry(i, m, budget - _tg_len(text))
+        text += entry
+        shown += 1
+    
+    if total > shown:
+        text += f"<i>Meeting {offset + 1}–{offset + shown} dari {total}</i>"
+    
+    # Build an inline keyboard with control buttons per meeting
+    kb_rows = []
+    for m_rec in meetings[:shown]:
+        mid = m_rec.get('zoom_meeting_id') or ''
+        topic_short = (m_rec.get('topic') or 'No Topic')[:25]
+        if mid:
+            # Create row with 3 control buttons for each meeting
+            kb_rows.append([
+                InlineKeyboardButton(text=f"🎥 {topic_short}", callback_data=f"control_zoom:{mid}"),
+                InlineKeyboardButton(text="✏️ Edit", callback_data=f"edit_meeting:{mid}"),
+                InlineKeyboardButton(text="🗑️ Delete", callback_data=f"confirm_delete:{mid}")
+            ])
+
+    # Page navigation; disabled arrows use 'noop' like /all_users
+    if total > shown:
+        next_offset = offset + shown
+        if history:
+            prev_data = _meeting_page_callback(history[-1], history[:-1])
+        else:
+            prev_data = "list_meetings:0" if offset > 0 else "noop"
+        kb_rows.append([
+            InlineKeyboardButton(text="◀️", callback_data=prev_data),
+            InlineKeyboardButton(text=f"📄 {offset + 1}–{next_offset}/{total}", callback_data="noop"),
+            InlineKeyboardButton(
+                text="▶️",
+                callback_data=_meeting_page_callback(next_offset, history + (offset,)) if next_offset < total else "noop"
+            ),
+        ])
+
+    # add Cloud Recording entry and navigation/back buttons
+    # Ensure the Cloud Recording button is visible even when meetings exist
+    kb_rows.append([InlineKeyboardButton(text="☁️ Cloud Recording", callback_data="list_cloud_recordings")])
+    kb_rows.append([InlineKeyboardButton(text="🔄 Refresh", callback_data="sync_refresh_list"), InlineKeyboardButton(text="🏠 Kembali ke Menu Utama", callback_data="back_to_main")])
+    kb = InlineKeyboardMarkup(inline_keyboard=kb_rows)
+    return text, kb
+
+
 @router.callback_query(lambda c: c.data == 'sync_refresh_list')
 async def cb_sync_refresh_list(c: CallbackQuery):
     """Sync meetings from Zoom and refresh the list."""
@@ -2299,7 +2347,7 @@ async def cb_sync_refresh_list(c: CallbackQuery):
     await c.answer("🔄 Syncing meetings dari Zoom...")
 
     try:
-        stats = await sync_meetings_from_zoom(zoom_client)
+        stats = await sync_meetings_now()
         # After sync, refresh the list
         await _do_list_meetings(c)
     except Exception as e:
@@ -2323,112 +2371,98 @@ async def cb_list_cloud_recordings(c: CallbackQuery):
             except (ValueError, IndexError):
                 page = 1
         
-        meetings = await list_meetings()
-        
-        # Filter meetings that have been completed
-        completed_meetings = [m for m in meetings if m.get('status') == 'done' or m.get('status') == 'deleted']
-        
-        # Sort by start_time descending (newest first)
-        from datetime import datetime
-        try:
-            completed_meetings.sort(
-                key=lambda m: datetime.fromisoformat(m.get('start_time', '').replace('Z', '+00:00')) 
-                    if m.get('start_time') else datetime.min,
-                reverse=True
-            )
-        except Exception:
-            # If sorting fails, keep original order
-            pass
-        
-        # Pagination: 5 per page
-        items_per_page = 5
-        total_pages = (len(completed_meetings) + items_per_page - 1) // items_per_page
-        
-        # Ensure page is valid
-        if page < 1:
-            page = 1
-        elif page > total_pages and total_pages > 0:
-            page = total_pages
-        
-        # Get items for current page
-        start_idx = (page - 1) * items_per_page
-        end_idx = start_idx + items_per_page
-        page_meetings = completed_meetings[start_idx:end_idx]
-        
-        # Build text
-        text = "☁️ <b>Cloud Recordings</b>\n\n"
-        
-        if not completed_meetings:
-            text += "Tidak ada meeting yang telah selesai.\n\n"
-        else:
-            text += f"<b>Meeting Selesai ({len(completed_meetings)}):</b>\n"
-            text += f"<i>Halaman {page}/{total_pages if total_pages > 0 else 1} (5 per halaman)</i>\n"
-            
-            for idx, m in enumerate(page_meetings, start_idx + 1):
-                topic = m.get('topic', 'No Title')[:30]
-                meeting_id = m.get('zoom_meeting_id', '')
-                status = m.get('status', 'unknown')
-                
-                # Check if has recording data cached
-                recording_data = await get_meeting_cloud_recording_data(meeting_id)
-                recording_status = "✅" if recording_data else "⏳"
-                
-                text += f"\n{idx}. {recording_status} {topic}\n"
-                text += f"   ID: <code>{meeting_id}</code>\n"
-                text += f"   Status: {status}\n"
-        
-        text += "\n<i>Tekan meeting untuk melihat cloud recording details</i>"
-        
-        # Create keyboard with meeting options
-        kb_rows = []
-        
-        for m in page_meetings:
-            topic = m.get('topic', 'No Title')[:25]
-            meeting_id = m.get('zoom_meeting_id', '')
-            recording_data = await get_meeting_cloud_recording_data(meeting_id)
-            recording_status = "✅" if recording_data else "⏳"
-            
-            kb_rows.append([
-                InlineKeyboardButton(
-                    text=f"{recording_status} {topic}", 
-                    callback_data=f"view_cloud_recordings:{meeting_id}"
-                )
-            ])
-        
-        # Add pagination buttons if needed
-        if total_pages > 1:
-            pagination_row = []
-            if page > 1:
-                pagination_row.append(InlineKeyboardButton(text="◀️ Sebelumnya", callback_data=f"list_cloud_recordings:{page-1}"))
-            
-            pagination_row.append(InlineKeyboardButton(text=f"{page}/{total_pages}", callback_data="noop"))
-            
-            if page < total_pages:
-                pagination_row.append(InlineKeyboardButton(text="Berikutnya ▶️", callback_data=f"list_cloud_recordings:{page+1}"))
-            
-            if pagination_row:
-                kb_rows.append(pagination_row)
-        
-        # Add back button
-        kb_rows.append([InlineKeyboardButton(text="⬅️ Kembali ke Daftar Meeting", callback_data="list_meetings")])
-        
-        kb = InlineKeyboardMarkup(inline_keyboard=kb_rows)
+        text, kb = await view_cache.get_or_render(
+            ("cloud_recordings", page), lambda: _render_cloud_recordings(page)
+        )
         
         from aiogram.types import Message as AiMessage
         m = getattr(c, 'message', None)
         if isinstance(m, AiMessage):
             try:
-                await m.edit_text(text, reply_markup=kb)
+                await edit_if_changed(m, text, reply_markup=kb)
             except Exception:
-                await c.answer()  # Silent callback acknowledgment only
-        else:
-            await c.answer()  # Silent callback acknowledgment only
+                pass
+        await c.answer()  # Silent callback acknowledgment only
             
     except Exception as e:
         logger.exception("Failed to list cloud recordings: %s", e)
         await c.answer(f"❌ Gagal menampilkan cloud recordings: {e}", show_alert=True)
 
 
+async def _render_cloud_recordings(page: int) -> tuple[str, InlineKeyboardMarkup]:
+    """Build one page of the cloud recordings screen (text + keyboard) from a single paged query."""
+    # Pagination: 5 per page
+    items_per_page = 5
+    if page < 1:
+        page = 1
+    
+    page_meetings, total = await list_completed_meetings_page(items_per_page, (page - 1) * items_per_page)
+    total_pages = (total + items_per_page - 1) // items_per_page
+    
+    # Page past the end (meetings were removed since the button was drawn): show the last page
+    if not page_meetings and total_pages > 0:
+        page = total_pages
+        page_meetings, total = await list_completed_meetings_page(items_per_page, (page - 1) * items_per_page)
+    
+    start_idx = (page - 1) * items_per_page
+    
+    # Build text
+    text = "☁️ <b>Cloud Recordings</b>\n\n"
+    
+    if not total:
+        text += "Tidak ada meeting yang telah selesai.\n\n"
+    else:
+        text += f"<b>Meeting Selesai ({total}):</b>\n"
+        text += f"<i>Halaman {page}/{total_pages if total_pages > 0 else 1} (5 per halaman)</i>\n"
+        
+        for idx, m in enumerate(page_meetings, start_idx + 1):
+            topic = (m.get('topic') or 'No Title')[:30]
+            meeting_id = m.get('zoom_meeting_id', '')
+            status = m.get('status', 'unknown')
+            recording_status = "✅" if m['has_recording'] else "⏳"
+            
+            text += f"\n{idx}. {recording_status} {topic}\n"
+            text += f"   ID: <code>{meeting_id}</code>\n"
+            text += f"   Status: {status}\n"
+    
+    text += "\n<i>Tekan meeting untuk melihat cloud recording details</i>"
+    
+    # Create keyboard with meeting options
+    kb_rows = []
+    
+    for m in page_meetings:
+        topic = (m.get('topic') or 'No Title')[:25]
+        meeting_id = m.get('zoom_meeting_id', '')
+        recording_status = "✅" if m['has_recording'] else "⏳"
+        
+        kb_rows.append([
+            InlineKeyboardButton(
+                text=f"{recording_status} {topic}", 
+                callback_data=f"view_cloud_recordings:{meeting_id}"
+            )
+        ])
+    
+    # Add pagination buttons if needed
+    if total_pages > 1:
+        pagination_row = []
+        if page > 1:
+            pagination_row.append(InlineKeyboardButton(text="◀️ Sebelumnya", callback_data=f"list_cloud_recordings:{page-1}"))
+        
+        pagination_row.append(InlineKeyboardButton(text=f"{page}/{total_pages}", callback_data="noop"))
+        
+        if page < total_pages:
+            pagination_row.append(InlineKeyboardButton(text="Berikutnya ▶️", callback_data=f"list_cloud_recordings:{page+1}"))
+        
+        if pagination_row:
+            kb_rows.append(pagination_row)
+    
+    # Add back button
+    kb_rows.append([InlineKeyboardButton(text="⬅️ Kembali ke Daftar Meeting", callback_data="list_meetings")])
+    
+    kb = InlineKeyboardMarkup(inline_keyboard=kb_rows)
+    return text, kb
+
+
 @router.callback_query(lambda c: c.data == 'search_user')
 async def cb_search_user(c: CallbackQuery, state: FSMContext):
     """Handle user search button."""
@@ -2589,9 +2623,7 @@ async def cb_select_provider(c: CallbackQuery, state: FSMContext):
     logger.info("State updated with provider: %s", provider)
     
     # Check if provider supports custom aliases
-    from shortener import DynamicShortener
-    shortener = DynamicShortener()
-    provider_config = shortener.providers.get(provider, {})
+    provider_config = get_provider_config(provider)
     supports_custom = provider_config.get('supports_custom', False)
     logger.info("Provider %s supports custom: %s", provider, supports_custom)
     
@@ -2690,9 +2722,7 @@ async def create_short_url(update_obj, state: FSMContext, provider: str, custom:
         meeting_info = state_data.get('meeting_info')
         if meeting_info and isinstance(meeting_info, dict):
             # This is from meeting creation - show complete meeting info with short URL
-            from shortener import DynamicShortener
-            shortener = DynamicShortener()
-            provider_config = shortener.providers.get(provider, {})
+            provider_config = get_provider_config(provider)
             provider_name = provider_config.get('name', provider)
             
             topic = meeting_info.get('topic', 'Meeting')
@@ -2720,9 +2750,7 @@ async def create_short_url(update_obj, state: FSMContext, provider: str, custom:
             reply_markup = kb
         else:
             # Regular shortening - show standard success message
-            from shortener import DynamicShortener
-            shortener = DynamicShortener()
-            provider_config = shortener.providers.get(provider, {})
+            provider_config = get_provider_config(provider)
             provider_name = provider_config.get('name', provider)
             
             text = f"✅ <b>Short URL Berhasil Dibuat!</b>\n\n🔗 <b>URL Asli:</b> <code>{url}</code>\n🔗 <b>Short URL:</b> <code>{short}</code>\n🔗 <b>Provider:</b> {html.escape(provider_name)}"
@@ -2767,9 +2795,7 @@ async def cb_custom_yes(c: CallbackQuery, state: FSMContext):
         await state.clear()
         return
 
-    from shortener import DynamicShortener
-    shortener = DynamicShortener()
-    provider_config = shortener.providers.get(provider, {})
+    provider_config = get_provider_config(provider)
     provider_name = provider_config.get('name', provider)
     
     text = f"<b>🔗 Short URL Generator - Step 4/4</b>\n\nURL: <code>{url}</code>\nProvider: {provider_name}\n\n✅ <b>Custom URL dipilih!</b>\n\nSilahkan masukkan custom URL yang diinginkan:\n\nℹ️ <b>Aturan:</b>\n• Hanya huruf, angka, underscore (_), dash (-), titik (.)\n• Minimal 3 karakter, maksimal 50 karakter\n• Contoh: <code>my-link</code>, <code>test_123</code>, <code>example.site</code>"
@@ -2924,6 +2950,102 @@ async def cb_cancel_shorten(c: CallbackQuery):
     await c.answer()
 
 
+@router.message(Command("short_batch"))
+async def cmd_short_batch(msg: Message):
+    """Shorten join_url of every upcoming meeting in one go: /short_batch [provider]
+
+    Meetings that already have an active shortlink are skipped. All results are
+    stored with a single batch insert, and each new link is also set as its meeting's short_url.
+    """
+    if msg.from_user is None:
+        return
+
+    user = await get_user_by_telegram_id(msg.from_user.id)
+    if not is_owner_or_admin(user):
+        await msg.reply("Anda tidak memiliki izin untuk menggunakan perintah ini.")
+        return
+
+    parts = (msg.text or '').split(maxsplit=1)
+    provider = parts[1].strip() if len(parts) > 1 else None
+    providers = get_available_providers()
+    if provider and provider not in providers:
+        await msg.reply(
+            f"❌ Provider <code>{html.escape(provider)}</code> tidak tersedia.\n"
+            f"Provider aktif: {', '.join(providers) or '-'}"
+        )
+        return
+
+    now = datetime.now(timezone.utc)
+
+    def _is_upcoming(m: Dict) -> bool:
+        st = m.get('start_time') or ''
+        try:
+            dt = datetime.fromisoformat(st.replace('Z', '+00:00'))
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            return dt >= now
+        except ValueError:
+            return False
+
+    meetings = [
+        m for m in await list_meetings_with_shortlinks()
+        if m.get('status') == 'active' and m.get('join_url') and _is_upcoming(m)
+    ]
+    targets = [m for m in meetings if not m.get('shortlinks')]
+    skipped = len(meetings) - len(targets)
+
+    if not targets:
+        await msg.reply(
+            f"ℹ️ Tidak ada meeting mendatang yang perlu di-short.\n"
+            f"Sudah memiliki shortlink: {skipped}",
+            reply_markup=back_to_main_buttons()
+        )
+        return
+
+    status_msg = await msg.reply(f"🔄 Membuat short URL untuk {len(targets)} meeting...")
+
+    results = await make_short_many([m['join_url'] for m in targets], provider=provider)
+
+    records = []
+    lines = []
+    for m, res in zip(targets, results):
+        records.append({
+            'original_url': res['url'],
+            'short_url': res['short_url'],
+            'provider': res['provider'],
+            'zoom_meeting_id': m.get('zoom_meeting_id'),
+            'created_by': msg.from_user.id,
+            'error_message': res['error'],
+        })
+        topic = html.escape((m.get('topic') or 'No Topic')[:40])
+        if res['short_url']:
+            lines.append(f"✅ {topic}\n   🔗 {res['short_url']}")
+        else:
+            lines.append(f"❌ {topic}\n   {html.escape(res['error'] or 'unknown error')}")
+
+    await add_shortlinks_many(records)
+    await update_meetings_short_urls_many({m['join_url']: res['short_url'] for m, res in zip(targets, results) if res['short_url']})
+
+    ok = sum(1 for r in results if r['short_url'])
+    text = (
+        "🔗 <b>Batch Short URL selesai</b>\n\n"
+        f"✅ Berhasil: {ok}\n"
+        f"❌ Gagal: {len(results) - ok}\n"
+        f"⏭️ Dilewati (sudah ada shortlink): {skipped}\n"
+    )
+    # One line per meeting until the message is full; the rest is summarized in one line
+    for j, line in enumerate(lines):
+        more = f"\n… +{len(lines) - j} meeting lainnya (lihat daftar meeting)"
+        if _tg_len(text + "\n" + line) + _tg_len(more) > TELEGRAM_TEXT_LIMIT:
+            text += more
+            break
+        text += "\n" + line
+    try:
+        await status_msg.edit_text(text, reply_markup=back_to_main_buttons())
+    except Exception:
+        await msg.reply(text, reply_markup=back_to_main_buttons())
+
+
 @router.message(Command("zoom_del", "meet_del"))
 async def cmd_zoom_del(msg: Message):
     """Quick delete Zoom meeting(s): /zoom_del <zoom_meeting_id>
@@ -3001,6 +3123,28 @@ async def cmd_zoom_del(msg: Message):
     await msg.reply(summary)
 
 
+def _format_bytes(num: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if num < 1024 or unit == 'GB':
+            return f"{num:.0f} {unit}" if unit == 'B' else f"{num:.1f} {unit}"
+        num /= 1024
+
+
+def _backup_caption(stats: dict) -> str:
+    """Caption for a backup document, including size and throughput of the dump."""
+    content = {
+        'sql': "Database SQL dump",
+        'snapshot': "Snapshot database SQLite",
+        'delta': f"Perubahan database ({stats.get('changes', 0)} baris, inkremental)",
+    }.get(stats.get('mode'), "Database")
+    return (
+        "✅ Backup berhasil dibuat!\n\n"
+        f"File berisi:\n• {content} ({stats.get('codec', 'deflate')})\n• Konfigurasi shorteners\n• Metadata backup\n\n"
+        f"📦 {_format_bytes(stats['raw_bytes'])} → {_format_bytes(stats['bytes_written'])} "
+        f"dalam {stats['seconds']:.1f} detik ({stats['throughput_mb_s']:.1f} MB/s)"
+    )
+
+
 @router.message(Command("backup"))
 async def cmd_backup(msg: Message, bot: Bot):
     """Create backup of database and shorteners configuration (owner/admin only)."""
@@ -3012,11 +3156,30 @@ async def cmd_backup(msg: Message, bot: Bot):
         await msg.reply("❌ Hanya owner yang dapat membuat backup.")
         return
 
+    # "/backup inc" adds an incremental archive to the local chain in DATA_DIR/backups
+    args = (msg.text or "").split()[1:]
+    incremental = bool(args) and args[0].lower() in ('inc', 'incremental')
+
     await msg.reply("🔄 Membuat backup database dan konfigurasi... Mohon tunggu.")
 
     try:
-        # Create backup
-        zip_path = create_backup_zip(await backup_database(), backup_shorteners())
+        if incremental:
+            stats = await create_incremental_backup()
+            if stats['kind'] == 'none':
+                await msg.reply("ℹ️ Tidak ada perubahan sejak backup terakhir.")
+                return
+            from aiogram.types import FSInputFile
+            await msg.reply_document(
+                document=FSInputFile(stats['path']),
+                filename=os.path.basename(stats['path']),
+                caption=_backup_caption(stats)
+            )
+            logger.info("%s backup %s sent to owner", stats['kind'], stats['backup_id'])
+            return
+
+        # Create backup (dump + compression run in a worker thread)
+        stats = await create_backup_archive()
+        zip_path = stats['path']
 
         # Send the backup file
         from aiogram.types import FSInputFile
@@ -3024,7 +3187,7 @@ async def cmd_backup(msg: Message, bot: Bot):
         await msg.reply_document(
             document=backup_file,
             filename=os.path.basename(zip_path),
-            caption="✅ Backup berhasil dibuat!\n\nFile berisi:\n• Database SQL dump\n• Konfigurasi shorteners\n• Metadata backup"
+            caption=_backup_caption(stats)
         )
 
         # Clean up after a short delay to ensure file is sent
@@ -3104,11 +3267,17 @@ async def handle_restore_file(msg: Message, state: FSMContext, bot: Bot):
         await bot.download_file(file_info.file_path, temp_zip.name)
         temp_zip.close()
 
-        # Extract and validate backup
-        extracted_files = extract_backup_zip(temp_zip.name)
+        # Extract and validate backup (unzip + zstd in a worker thread, off the event loop)
+        extracted_files = await asyncio.to_thread(extract_backup_zip, temp_zip.name)
 
-        required_files = ['database_backup.sql', 'shorteners_backup.json']
-        missing_files = [f for f in required_files if f not in extracted_files]
+        # Snapshot backups (database_backup.db) are preferred; SQL dumps and incremental deltas are still accepted
+        db_backup_file = next(
+            (f for f in ('database_backup.db', 'database_backup.sql', 'database_delta.sql') if f in extracted_files),
+            None,
+        )
+        missing_files = [f for f in ('shorteners_backup.json',) if f not in extracted_files]
+        if db_backup_file is None:
+            missing_files.insert(0, 'database_backup.sql')
 
         if missing_files:
             await _set_status(f"❌ File backup tidak valid. File yang hilang: {', '.join(missing_files)}")
@@ -3121,11 +3290,17 @@ async def handle_restore_file(msg: Message, state: FSMContext, bot: Bot):
             return
 
         # Perform restore
-        await _set_status("🔄 Memulihkan database...")
-        db_stats = await restore_database(extracted_files['database_backup.sql'])
+        if db_backup_file == 'database_delta.sql':
+            # Base and earlier deltas are looked up in the local backup directory
+            await _set_status("🔄 Memulihkan rantai backup inkremental...")
+            db_stats = await restore_backup_chain(temp_zip.name, extracted_files)
+            db_stats.pop('files', None)
+        else:
+            await _set_status("🔄 Memulihkan database...")
+            db_stats = await restore_database(extracted_files[db_backup_file])
 
         await _set_status("🔄 Memulihkan konfigurasi shorteners...")
-        shorteners_success = restore_shorteners(extracted_files['shorteners_backup.json'])
+        shorteners_success = await asyncio.to_thread(restore_shorteners, extracted_files['shorteners_backup.json'])
 
         # Clean up
         os.unlink(temp_zip.name)
@@ -3138,7 +3313,8 @@ async def handle_restore_file(msg: Message, state: FSMContext, bot: Bot):
         # Send success message via single edited status
         success_msg = (
             "✅ <b>Restore Berhasil!</b>\n\n"
-            f"📊 <b>Database:</b> {db_stats.get('tables_created', 0)} tabel dibuat, {db_stats.get('rows_inserted', 0)} baris dimasukkan\n"
+            f"📊 <b>Database:</b> {db_stats.get('tables_created', 0)} tabel, {db_stats.get('rows_inserted', 0)} baris dipulihkan"
+            + (f" ({db_stats['deltas_applied']} delta)" if db_stats.get('deltas_applied') else "") + "\n"
             f"🔗 <b>Shorteners:</b> {'Berhasil' if shorteners_success else 'Gagal'}\n\n"
             "⚠️ Bot akan restart untuk menerapkan perubahan."
         )
@@ -3822,8 +3998,9 @@ async def cb_backup_db(c: CallbackQuery, bot: Bot):
     await c.answer("Membuat backup...")
 
     try:
-        # Create backup
-        zip_path = create_backup_zip(await backup_database(), backup_shorteners())
+        # Create backup (dump + compression run in a worker thread)
+        stats = await create_backup_archive()
+        zip_path = stats['path']
 
         # Send the backup file
         from aiogram.types import FSInputFile
@@ -3831,7 +4008,7 @@ async def cb_backup_db(c: CallbackQuery, bot: Bot):
         await c.message.reply_document(
             document=backup_file,
             filename=os.path.basename(zip_path),
-            caption="✅ Backup berhasil dibuat!\n\nFile berisi:\n• Database SQL dump\n• Konfigurasi shorteners\n• Metadata backup"
+            caption=_backup_caption(stats)
         )
 
         # Clean up after sending file
@@ -3914,7 +4091,7 @@ async def cb_sync_meetings(c: CallbackQuery):
     await c.answer("🔄 Memulai sinkronisasi...")
     
     try:
-        stats = await sync_meetings_from_zoom(zoom_client)
+        stats = await sync_meetings_now()
         text = (
             "✅ <b>Sinkronisasi selesai!</b>\n\n"
             f"📊 <b>Statistik:</b>\n"
@@ -3988,6 +4165,7 @@ async def cb_show_help(c: CallbackQuery):
         help_text += "• /sync_meetings - Sinkronkan meetings dari Zoom ke database\n"
         help_text += "• /check_expired - Periksa dan tandai meeting yang sudah lewat waktu mulai\n"
         help_text += "• /backup - Buat backup database dan konfigurasi shorteners\n"
+        help_text += "• /backup inc - Backup inkremental (hanya perubahan sejak backup terakhir)\n"
         help_text += "• /restore - Restore dari file backup ZIP\n\n"
 
     help_text += "<b>💡 TIPS:</b>\n"
@@ -0,0 +1,116 @@
+"""Leader Election
+Lets several bot replicas share one database while only one of them runs background jobs.
+
+The leader holds a row in leader_lease that it renews every LEADER_LEASE_SECONDS / 3. A
+replica takes over once the lease has expired (or was released on shutdown), which bumps
+the fencing token. Before each leader-only job starts the token is checked against the
+database, so a replica that was paused past its lease does not start a job after a new
+leader took over. The check is only made at job start: the writes themselves are not
+fenced, and a job that is already running (e.g. a long cloud_recording_sync) finishes even
+if the lease is lost meanwhile, so for a while two replicas may run the same job. Jobs must
+therefore stay idempotent.
+
+Every replica keeps serving Telegram updates, agents and Zoom webhooks: agent long-polls
+re-claim from the database every AGENT_COMMAND_POLL_SECONDS and cached screens check the
+shared data_version row, so commands and writes from other replicas are seen.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Optional
+
+from config import settings
+from db import acquire_leader_lease, validate_leader_lease, release_leader_lease
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderElector:
+    """Acquires and renews a named lease; is_leader / check() tell whether this replica leads."""
+
+    def __init__(self, name: str = 'background', lease_seconds: int = 30):
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.renew_seconds = max(lease_seconds / 3, 1)
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.fencing_token: Optional[int] = None
+        # Local (monotonic) end of the lease, kept one renew interval short of the database's
+        self._valid_until = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self.fencing_token is not None and time.monotonic() < self._valid_until
+
+    async def check(self) -> bool:
+        """Fencing check: True only if the database still shows this replica's lease and token."""
+        if not self.is_leader:
+            return False
+        if await validate_leader_lease(self.name, self.holder, self.fencing_token):
+            return True
+        self._demote("lease taken over")
+        return False
+
+    def _demote(self, reason: str):
+        if self.fencing_token is not None:
+            logger.warning("Lost leadership of '%s' (token %d): %s", self.name, self.fencing_token, reason)
+        self.fencing_token = None
+        self._valid_until = 0.0
+
+    async def _renew(self):
+        started = time.monotonic()
+        try:
+            token = await acquire_leader_lease(self.name, self.holder, self.lease_seconds)
+        except Exception as e:
+            logger.error("Leader lease renewal failed: %s", e)
+            if self.fencing_token is not None and time.monotonic() >= self._valid_until:
+                self._demote("could not renew before the lease ran out")
+            return
+
+        if token is None:
+            if self.fencing_token is not None:
+                self._demote("another replica holds the lease")
+            return
+        if token != self.fencing_token:
+            logger.info("Became leader of '%s' as %s (fencing token %d)", self.name, self.holder, token)
+        self.fencing_token = token
+        self._valid_until = started + self.lease_seconds - self.renew_seconds
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.renew_seconds)
+            await self._renew()
+
+    async def start(self):
+        """Try to take the lease right away, then keep renewing (or competing for) it."""
+        if self._task is not None:
+            return
+        await self._renew()
+        if not self.is_leader:
+            logger.info("Running as follower; background jobs run on the current leader")
+        self._task = asyncio.create_task(self._loop(), name=f"leader:{self.name}")
+
+    async def stop(self):
+        """Stop renewing and release the lease so another replica can take over at once."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.fencing_token is not None:
+            try:
+                await release_leader_lease(self.name, self.holder)
+                logger.info("Released leadership of '%s'", self.name)
+            except Exception as e:
+                logger.error("Failed to release leader lease: %s", e)
+        self.fencing_token = None
+        self._valid_until = 0.0
+
+
+leader_elector = LeaderElector(lease_seconds=settings.leader_lease_seconds)
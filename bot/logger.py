@@ -1,31 +1,150 @@
+import atexit
+import copy
+import json
 import logging
+import queue
+import random
 import sys
 import os
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from datetime import datetime
+from typing import Dict, Optional
 from config import settings
+from metrics import registry
 
 # Create logs directory if it doesn't exist
 LOGS_DIR = "logs"
 if not os.path.exists(LOGS_DIR):
     os.makedirs(LOGS_DIR)
 
+# Attributes every LogRecord has; anything else on a record came in through extra=
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_TRACEBACK_FORMATTER = logging.Formatter()
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, exception and any extra= fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc_info'] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of DEBUG records from the configured modules.
+
+    rates maps a logger name prefix (e.g. 'db.db') to the share of its DEBUG records kept
+    (0.1 keeps about one in ten); the longest matching prefix wins. INFO and above always pass.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix first
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + '.'):
+                return rate >= 1 or random.random() < rate
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that does not block the caller: when the queue is full a DEBUG/INFO record
+    is dropped (and counted) instead of waiting for the writer thread. Warnings and errors
+    are never dropped; they wait for room."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback now (arguments may change after the call returns), but
+        # leave the final formatting to the writer thread; the traceback stays out of the message
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _TRACEBACK_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record)
+            else:
+                self.dropped += 1
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Blocking put: the writer thread keeps draining, so this succeeds even if the queue is full
+        self.queue.put(self._sentinel)
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    """'db.db:0.1,zoom.zoom:0.25' -> {'db.db': 0.1, 'zoom.zoom': 0.25}; invalid entries are skipped."""
+    rates = {}
+    for item in (spec or '').split(','):
+        name, sep, rate = item.strip().rpartition(':')
+        if not sep or not name:
+            continue
+        try:
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            continue
+    return rates
+
+
 def setup_logging():
     """
     Setup centralized logging configuration.
     Configures logging to both console and daily rotating file.
+
+    Log calls only put the record on a queue; a QueueListener thread does the formatting
+    and the console/file I/O (including midnight rotation), so logging never blocks the event
+    loop. LOG_JSON switches to one JSON object per line, LOG_SAMPLING thins out DEBUG lines of
+    busy modules and LOG_QUEUE_SIZE bounds the queue (DEBUG/INFO records are dropped when it is full).
+    Safe to call again: the previous listener is stopped first.
     """
+    global _listener
+    stop_logging()
+
     # Determine log level
     log_level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
-    
+
     # Common formatter
-    log_format = settings.LOG_FORMAT
-    formatter = logging.Formatter(log_format, datefmt='%Y-%m-%d %H:%M:%S')
+    if settings.log_json:
+        formatter = JsonFormatter()
+    else:
+        log_format = settings.LOG_FORMAT
+        formatter = logging.Formatter(log_format, datefmt='%Y-%m-%d %H:%M:%S')
 
     # Root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
-    
+
     # Remove existing handlers to avoid duplication
     if root_logger.handlers:
         root_logger.handlers.clear()
@@ -33,12 +152,11 @@ def setup_logging():
     # 1. Console Handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
 
     # 2. File Handler (Timed Rotating - Daily)
     # Filename format: logs/zoom-telebot.log (current), rotated to zoom-telebot.YYYY-MM-DD.log
     log_file = os.path.join(LOGS_DIR, "zoom-telebot.log")
-    
+
     # Prepare TimedRotatingFileHandler
     # when='midnight', interval=1, backupCount=30 (keep 30 days)
     file_handler = TimedRotatingFileHandler(
@@ -50,11 +168,48 @@ def setup_logging():
     )
     file_handler.suffix = "%Y-%m-%d" # Suffix for rotated files
     file_handler.setFormatter(formatter)
-    root_logger.addHandler(file_handler)
+
+    # 3. Queue: the root logger only enqueues, the listener thread writes to both handlers
+    log_queue = queue.Queue(maxsize=settings.log_queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+    sampling = parse_sampling(settings.log_sampling)
+    if sampling:
+        # On the queue handler, so sampled-out records are never queued
+        queue_handler.addFilter(SamplingFilter(sampling))
+    root_logger.addHandler(queue_handler)
+
+    _listener = _Listener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    _listener.start()
 
     # Log initial setup message
     logging.info(f"Logging initialized. Level: {settings.LOG_LEVEL}, File: {log_file}")
 
+def stop_logging():
+    """Flush queued records and stop the writer thread (also runs at interpreter exit)."""
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        if isinstance(handler, DroppingQueueHandler):
+            root_logger.removeHandler(handler)
+            if handler.dropped:
+                # Goes to lastResort (stderr) now that the pipeline is gone
+                logging.getLogger(__name__).warning("Log queue was full; %d records dropped", handler.dropped)
+
+
+def _metric_families():
+    dropped = sum(h.dropped for h in logging.getLogger().handlers if isinstance(h, DroppingQueueHandler))
+    yield 'bot_log_records_dropped_total', 'counter', 'Log records dropped because the log queue was full', [({}, dropped)]
+
+
+atexit.register(stop_logging)
+registry.register_collector(_metric_families)
+
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger instance with the specified name.
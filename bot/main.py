@@ -12,11 +12,16 @@ from config import settings
 from bot.handlers import router
 from bot.cloud_recording_handlers import router as cloud_recording_router
 from bot.fsm_storage import DatabaseFSMStorage
-from db import init_db, get_user_by_telegram_id, sync_meetings_from_zoom
-from bot.middleware import LoggingMiddleware
+from db import init_db, get_user_by_telegram_id
+from bot.middleware import LoggingMiddleware, TimingMiddleware, TelegramTimingMiddleware
 from bot.background_tasks import start_background_tasks, stop_background_tasks
-from bot.background_tasks import start_background_tasks, stop_background_tasks
-from zoom import zoom_client
+from bot.api_server import start_api_server, stop_api_server, register_telegram_webhook
+from bot.telegram_webhook import BoundedRequestHandler
+from bot.command_broker import command_broker
+from bot.agent_presence import agent_presence
+from bot.leader import leader_elector
+from bot.scheduler import scheduler
+from shortener import migrate_shortener_config
 from scripts import check_dependencies
 
 
@@ -47,58 +52,97 @@ def signal_handler(signum, frame):
     raise KeyboardInterrupt(f"Signal {signal_name} received")
 
 
-async def background_sync_meetings():
-    """Background task to sync meetings from Zoom to database every 30 minutes."""
-    while True:
-        try:
-            logger.info("Running scheduled meeting sync")
-            stats = await sync_meetings_from_zoom(zoom_client)
-            logger.info("Meeting sync completed: %s", stats)
-        except Exception as e:
-            logger.exception("Error in background meeting sync: %s", e)
-        
-        # Wait 30 minutes before next sync
-        await asyncio.sleep(30 * 60)  # 30 minutes
-
-
-async def background_check_timeouts():
-    """Background task to check for timed out agent commands every 30 seconds."""
-    while True:
-        try:
-            from db import check_timeout_commands
-            timed_out_count = await check_timeout_commands()
-            if timed_out_count > 0:
-                logger.info("Marked %d commands as failed due to timeout", timed_out_count)
-        except Exception as e:
-            logger.exception("Error in background timeout check: %s", e)
-        
-        # Check every 30 seconds
-        await asyncio.sleep(30)
-
-
 async def on_startup(bot: Bot):
     logger.info("Bot starting...")
     
-    # Run initial sync on startup
-    logger.info("Running initial meeting sync on startup...")
+    # Leader election: every replica serves updates, agents and webhooks, only the leader runs background jobs.
+    # Broker wake-ups are per process, so long-polls also re-claim from the database periodically
+    if settings.leader_election:
+        await leader_elector.start()
+        scheduler.leader_guard = leader_elector.check
+        command_broker.leader_guard = leader_elector.check
+        command_broker.poll_interval = settings.agent_command_poll_seconds
+
+    # Fail agent commands whose lease ran out while the bot was down; later expiries are swept on time
     try:
-        stats = await sync_meetings_from_zoom(zoom_client)
-        logger.info("Initial meeting sync completed: %s", stats)
+        await command_broker.start()
     except Exception as e:
-        logger.exception("Error in initial meeting sync: %s", e)
-    
-    # Start background sync task
-    asyncio.create_task(background_sync_meetings())
-    logger.info("Background meeting sync task started")
-    
-    # Start background timeout check task
-    asyncio.create_task(background_check_timeouts())
-    logger.info("Background timeout check task started")
+        logger.exception("Failed to start agent command timeout sweep: %s", e)
     
-    # Start background tasks (cloud recording sync, cleanup, etc)
-    await start_background_tasks()
+    # Start background jobs (meeting sync right away, then cloud recording sync, cleanup, etc)
+    await start_background_tasks(bot)
     logger.info("Background task manager started")
 
+    # Start HTTP API server (Zoom webhooks, agents) on AGENT_API_PORT
+    try:
+        await start_api_server()
+    except OSError as e:
+        logger.error("Failed to start API server on port %s: %s", settings.agent_api_port, e)
+        if settings.default_mode.lower() == 'webhook':
+            # Telegram updates arrive on this server too; without it the bot would be up but deaf
+            raise
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot):
+    """Receive updates through the API server (DEFAULT_MODE=webhook) until SIGINT/SIGTERM.
+
+    Shutdown stops accepting requests first, then drains in-flight updates.
+    """
+    handler = BoundedRequestHandler(
+        dp, bot,
+        secret_token=settings.webhook_secret,
+        max_concurrency=settings.webhook_max_concurrency,
+        max_pending=settings.webhook_max_pending,
+        drain_timeout=settings.webhook_drain_seconds,
+    )
+    register_telegram_webhook(handler)
+
+    workflow_data = {"dispatcher": dp, "bot": bot, **dp.workflow_data}
+    # on_startup starts the API server, now including the Telegram webhook route
+    await dp.emit_startup(**workflow_data)
+
+    webhook_url = settings.webhook_url.rstrip('/') + settings.webhook_path
+    await bot.set_webhook(
+        webhook_url,
+        secret_token=settings.webhook_secret,
+        allowed_updates=dp.resolve_used_update_types(),
+        max_connections=settings.webhook_max_concurrency,
+    )
+    logger.info("Webhook set to %s (max %d concurrent updates)", webhook_url, settings.webhook_max_concurrency)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows: the signal.signal handler raises KeyboardInterrupt instead
+            pass
+
+    try:
+        await stop.wait()
+        logger.info("Shutdown initiated...")
+    finally:
+        await stop_api_server()
+        await dp.emit_shutdown(**workflow_data)
+
+
+def create_dispatcher(bot: Bot) -> Dispatcher:
+    """Dispatcher with the bot's storage, routers and middleware (also used by scripts/load_test.py)."""
+    dp = Dispatcher(storage=DatabaseFSMStorage(settings.db_path))
+    # Include cloud recording handlers FIRST (before generic handlers)
+    dp.include_router(cloud_recording_router)
+
+    dp.include_router(router)
+
+    # Register middleware for per-handler latency metrics and slow-update traces
+    # (first, so it times everything below it); Telegram API calls are timed on the bot session
+    dp.update.middleware(TimingMiddleware(slow_ms=settings.slow_update_ms))
+    bot.session.middleware(TelegramTimingMiddleware())
+    # Register middleware for guaranteed pre-handler logging
+    dp.update.middleware(LoggingMiddleware())
+    return dp
+
 
 async def main():
     create_lock_file()
@@ -118,6 +162,14 @@ async def main():
         return
 
     await init_db()
+
+    # Upgrade shorteners.json (if outdated) and load providers before handling updates,
+    # off the event loop; importing the shortener package itself does no file I/O.
+    try:
+        await asyncio.to_thread(migrate_shortener_config)
+    except Exception as e:
+        logger.exception("Shortener config migration failed, continuing with in-memory upgrade: %s", e)
+
     # configure logging early
     # Initialize logging using consolidated logger
     from bot.logger import setup_logging
@@ -141,6 +193,11 @@ async def main():
         logger.error("TELEGRAM_TOKEN not configured. Please set it in .env file.")
         return
 
+    webhook_mode = settings.default_mode.lower() == 'webhook'
+    if webhook_mode and (not settings.webhook_url or not settings.webhook_secret):
+        logger.error("DEFAULT_MODE=webhook requires WEBHOOK_URL and WEBHOOK_SECRET. Please set them in .env file.")
+        return
+
     from aiogram.client.default import DefaultBotProperties
     from aiogram.enums import ParseMode
 
@@ -148,11 +205,7 @@ async def main():
         token=settings.bot_token,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
-    dp = Dispatcher(storage=DatabaseFSMStorage(settings.db_path))
-    # Include cloud recording handlers FIRST (before generic handlers)
-    dp.include_router(cloud_recording_router)
-
-    dp.include_router(router)
+    dp = create_dispatcher(bot)
 
     # Dependency Audit on Startup
     if settings.ENABLE_DEPENDENCY_AUDIT:
@@ -171,16 +224,17 @@ async def main():
         # Add to startup process
         dp.startup.register(run_dependency_audit)
 
-    # Register middleware for guaranteed pre-handler logging
-    dp.update.middleware(LoggingMiddleware())
-    
     # Register startup handler
     dp.startup.register(on_startup)
 
     try:
-        # run polling by default
-        logger.info("Bot started successfully. Press Ctrl+C to stop.")
-        await dp.start_polling(bot)
+        logger.info("Bot started successfully (%s mode). Press Ctrl+C to stop.", 'webhook' if webhook_mode else 'polling')
+        if webhook_mode:
+            await run_webhook(dp, bot)
+        else:
+            # run polling by default; a webhook left by an earlier webhook-mode run makes getUpdates fail with 409
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
     except KeyboardInterrupt:
         logger.info("Shutdown initiated...")
     except asyncio.CancelledError:
@@ -194,6 +248,14 @@ async def main():
         # Stop background tasks
         await stop_background_tasks()
         logger.info("Background tasks stopped")
+        await leader_elector.stop()
+
+        await stop_api_server()
+        command_broker.stop()
+        try:
+            await agent_presence.flush()
+        except Exception as e:
+            logger.error("Failed to flush agent heartbeats: %s", e)
         
         await bot.session.close()
         logger.info("Shutdown complete.")
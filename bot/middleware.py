@@ -1,6 +1,12 @@
 import logging
 
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+
+from metrics import HANDLER_SECONDS, TELEGRAM_SECONDS, track, start_trace
+
 logger = logging.getLogger(__name__)
+# Slow-update trace lines, on their own logger so they can be routed or filtered separately
+trace_logger = logging.getLogger('bot.trace')
 
 
 class LoggingMiddleware:
@@ -37,4 +43,78 @@ class LoggingMiddleware:
                          ev_type, chat_id, user_id, username)
         except Exception:
             logger.exception("LoggingMiddleware failed to introspect event")
-        return await handler(event, data)
\ No newline at end of file
+        return await handler(event, data)
+
+
+def handler_label(update, data) -> str:
+    """Metrics label for an update: the command, the callback data prefix (up to and including
+    the first ':'), the FSM state for plain messages, or the update type."""
+    event_type = getattr(update, 'event_type', None) or type(update).__name__
+    event = getattr(update, 'event', update)
+    if event_type == 'message':
+        text = getattr(event, 'text', None) or ''
+        if text.startswith('/'):
+            return text.split(maxsplit=1)[0].split('@', 1)[0][:32]
+        state = data.get('raw_state')
+        return f"state:{state}" if state else 'message'
+    if event_type == 'callback_query':
+        payload = getattr(event, 'data', None) or ''
+        prefix, sep, _ = payload.partition(':')
+        return (prefix + sep)[:64] or 'callback_query'
+    return event_type
+
+
+class TimingMiddleware:
+    """Times every update into bot_handler_duration_seconds, labelled by handler_label().
+
+    Handling runs inside an update trace (metrics/tracing.py); an update slower than
+    slow_ms is logged on bot.trace as one key=value line with the time spent in DB, Zoom,
+    shortener, FSM storage and Telegram API calls, the unaccounted rest and the slowest
+    calls. Handler exceptions are counted in bot_handler_errors_total and re-raised.
+    """
+    def __init__(self, slow_ms: int = 1000):
+        self.slow_seconds = slow_ms / 1000
+
+    async def __call__(self, handler, event, data):
+        try:
+            label = handler_label(event, data)
+        except Exception:
+            logger.exception("TimingMiddleware failed to label event")
+            label = 'unknown'
+        outcome = 'ok'
+        with start_trace(label) as trace:
+            try:
+                with track(HANDLER_SECONDS, handler=label):
+                    return await handler(event, data)
+            except BaseException as e:
+                outcome = type(e).__name__
+                raise
+            finally:
+                elapsed = trace.elapsed()
+                if self.slow_seconds and elapsed >= self.slow_seconds:
+                    self._log_slow(event, data, trace, elapsed, outcome)
+
+    @staticmethod
+    def _log_slow(event, data, trace, elapsed, outcome):
+        try:
+            fields = {'handler': trace.name}
+            fields.update(trace.breakdown(elapsed))
+            user = data.get('event_from_user')
+            fields['update_id'] = getattr(event, 'update_id', None)
+            fields['user_id'] = getattr(user, 'id', None)
+            fields['outcome'] = outcome
+            line = ' '.join(
+                f"{key}={','.join(value) or '-'}" if isinstance(value, list) else f"{key}={value}"
+                for key, value in fields.items()
+            )
+            trace_logger.warning("slow_update %s", line, extra={'trace': fields})
+        except Exception:
+            logger.exception("TimingMiddleware failed to log slow update")
+
+
+class TelegramTimingMiddleware(BaseRequestMiddleware):
+    """Bot session middleware: times Telegram Bot API calls (bot_telegram_request_duration_seconds{method})
+    and records them as telegram spans of the current update trace."""
+    async def __call__(self, make_request, bot, method):
+        with track(TELEGRAM_SECONDS, method=getattr(method, '__api_method__', type(method).__name__)):
+            return await make_request(bot, method)
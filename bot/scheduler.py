@@ -0,0 +1,283 @@
+"""Job Scheduler
+Runs all periodic background work (Zoom sync, recording sync, backups, retention, ...).
+
+- each job runs in its own loop, so a run never overlaps the previous one; a slow run
+  simply delays the next one instead of piling up
+- intervals are jittered so jobs started together drift apart
+- jobs can share a concurrency group (e.g. 'zoom': at most one Zoom-heavy job at a time)
+- trigger() wakes a job's loop immediately; triggers that arrive while it is running
+  are coalesced into one extra run
+- run_now() is for user-facing manual runs: it runs the job right away outside its
+  concurrency group, so it never queues behind another job of the group (e.g. a long
+  recording sweep); a per-job lock still keeps it from overlapping a run of the same job,
+  and concurrent run_now() calls share one run
+- leader_only jobs are skipped unless leader_guard() confirms this replica is the leader
+  (explicit run_now() calls still run)
+- per-job run metrics (runs, failures, durations, last error) via stats(), also exported
+  on /metrics (bot_job_*)
+- stop() cancels every loop and running job
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from metrics import JOB_SECONDS, registry, metric_samples
+
+logger = logging.getLogger(__name__)
+
+Interval = Union[float, Callable[[], float]]
+
+
+class Job:
+    """A named periodic coroutine function with its schedule and run metrics."""
+
+    def __init__(self, name: str, func: Callable[[], Awaitable[Any]], interval: Interval,
+                 jitter: float = 0.1, run_on_start: bool = False, group: Optional[str] = None,
+                 leader_only: bool = False):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.run_on_start = run_on_start
+        self.group = group
+        self.leader_only = leader_only
+
+        self.runs = 0
+        self.failures = 0
+        self.coalesced = 0
+        self.skipped = 0
+        self.running = False
+        self.last_started: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+        self.last_error: Optional[str] = None
+        self.next_run: Optional[float] = None
+
+        self._wake = asyncio.Event()
+        # Held while the job runs, so scheduled and manual runs never overlap
+        self._lock = asyncio.Lock()
+        # run_now() callers waiting for the pending manual run
+        self._waiters: List[asyncio.Future] = []
+        self._task: Optional[asyncio.Task] = None
+        self._manual: Optional[asyncio.Task] = None
+
+    def next_delay(self) -> float:
+        """Seconds until the next scheduled run: the interval with +/- jitter applied."""
+        interval = self.interval() if callable(self.interval) else self.interval
+        if self.jitter:
+            interval *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return max(interval, 0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'runs': self.runs,
+            'failures': self.failures,
+            'coalesced': self.coalesced,
+            'skipped': self.skipped,
+            'running': self.running,
+            'last_started': self.last_started,
+            'last_duration': self.last_duration,
+            'avg_duration': self.total_duration / self.runs if self.runs else None,
+            'max_duration': self.max_duration,
+            'last_error': self.last_error,
+            'next_run': self.next_run,
+        }
+
+
+class Scheduler:
+    """Runs registered jobs on jittered intervals with overlap prevention and group limits."""
+
+    def __init__(self, group_limits: Optional[Dict[str, int]] = None):
+        self.jobs: Dict[str, Job] = {}
+        self._groups: Dict[str, asyncio.Semaphore] = {
+            name: asyncio.Semaphore(limit) for name, limit in (group_limits or {}).items()
+        }
+        self.is_running = False
+        # Async callable deciding whether leader_only jobs may run here (None: always)
+        self.leader_guard: Optional[Callable[[], Awaitable[bool]]] = None
+
+    def add_job(self, name: str, func: Callable[[], Awaitable[Any]], interval: Interval,
+                jitter: float = 0.1, run_on_start: bool = False, group: Optional[str] = None,
+                leader_only: bool = False) -> Job:
+        """Register a job; it starts with the scheduler (or immediately if it is already running).
+
+        interval is in seconds, or a callable returning seconds (re-evaluated before every run).
+        """
+        if name in self.jobs:
+            raise ValueError(f"Job {name} already registered")
+        job = Job(name, func, interval, jitter, run_on_start, group, leader_only)
+        self.jobs[name] = job
+        if self.is_running:
+            self._start_job(job)
+        return job
+
+    def has_job(self, name: str) -> bool:
+        return name in self.jobs
+
+    def _start_job(self, job: Job):
+        job._task = asyncio.create_task(self._loop(job), name=f"job:{job.name}")
+
+    async def start(self):
+        if self.is_running:
+            logger.warning("Scheduler already running")
+            return
+        self.is_running = True
+        for job in self.jobs.values():
+            self._start_job(job)
+        logger.info("Scheduler started with %d jobs: %s", len(self.jobs), ', '.join(self.jobs))
+
+    async def stop(self):
+        """Cancel all job loops, including runs in progress, and wait for them to finish."""
+        if not self.is_running:
+            return
+        self.is_running = False
+        tasks = [task for job in self.jobs.values() for task in (job._task, job._manual)
+                 if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for job in self.jobs.values():
+            job._task = None
+            job._manual = None
+            job.next_run = None
+            for waiter in job._waiters:
+                waiter.cancel()
+            job._waiters.clear()
+        logger.info("Scheduler stopped")
+
+    def trigger(self, name: str):
+        """Run a job as soon as possible (once more after the current run, if one is in progress)."""
+        job = self.jobs[name]
+        if job.running or job._wake.is_set():
+            job.coalesced += 1
+        job._wake.set()
+
+    async def run_now(self, name: str) -> Any:
+        """Run a job right away, bypassing its concurrency group, and wait for that run.
+
+        Waits only for a run of the same job already in progress; calls made before the
+        manual run starts share it. Returns its result or raises its exception.
+        """
+        job = self.jobs[name]
+        if not self.is_running:
+            raise RuntimeError("Scheduler is not running")
+        waiter = asyncio.get_running_loop().create_future()
+        job._waiters.append(waiter)
+        if job._manual is None or job._manual.done():
+            job._manual = asyncio.create_task(self._run_manual(job), name=f"job:{job.name}:manual")
+        return await waiter
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: job.stats() for name, job in self.jobs.items()}
+
+    def metric_families(self):
+        """Job counters and state for the metrics registry (run durations go to bot_job_duration_seconds)."""
+        stats = self.stats()
+        for key, kind, documentation in (
+            ('runs', 'counter', 'Background job runs'),
+            ('failures', 'counter', 'Background job runs that raised'),
+            ('skipped', 'counter', 'Background job runs skipped because this replica is not the leader'),
+            ('coalesced', 'counter', 'Background job triggers merged into another run'),
+            ('running', 'gauge', 'Whether the background job is running now'),
+            ('last_started', 'gauge', 'Unix time the background job last started'),
+            ('next_run', 'gauge', 'Unix time of the next scheduled run'),
+        ):
+            name = f'bot_job_{key}_total' if kind == 'counter' else f'bot_job_{key}'
+            yield name, kind, documentation, metric_samples({job: s[key] for job, s in stats.items()}, 'job')
+
+    async def _loop(self, job: Job):
+        run_first = job.run_on_start
+        while self.is_running:
+            if not run_first and not job._wake.is_set():
+                delay = job.next_delay()
+                job.next_run = time.time() + delay
+                try:
+                    await asyncio.wait_for(job._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+            run_first = False
+            job._wake.clear()
+            job.next_run = None
+            await self._run(job)
+
+    async def _run(self, job: Job):
+        if job.leader_only and not await self._may_lead(job):
+            job.skipped += 1
+            return
+        try:
+            await self._execute(job)
+        except Exception:
+            # Already logged and counted by _timed()
+            pass
+
+    async def _run_manual(self, job: Job):
+        # Loops so run_now() calls made while a manual run is in progress get a fresh run
+        while job._waiters:
+            async with job._lock:
+                # Callers that asked before this run started get its result
+                waiters, job._waiters = job._waiters, []
+                try:
+                    result = await self._timed(job)
+                except asyncio.CancelledError:
+                    for waiter in waiters:
+                        waiter.cancel()
+                    raise
+                except Exception as e:
+                    for waiter in waiters:
+                        if not waiter.done():
+                            waiter.set_exception(e)
+                    continue
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(result)
+
+    async def _may_lead(self, job: Job) -> bool:
+        if self.leader_guard is None:
+            return True
+        try:
+            return await self.leader_guard()
+        except Exception as e:
+            logger.error("Leader check for job %s failed, skipping run: %s", job.name, e)
+            return False
+
+    async def _execute(self, job: Job) -> Any:
+        """Run job.func once inside its concurrency group, recording metrics."""
+        group = self._groups.get(job.group) if job.group else None
+        if group is None:
+            async with job._lock:
+                return await self._timed(job)
+        async with group:
+            async with job._lock:
+                return await self._timed(job)
+
+    async def _timed(self, job: Job) -> Any:
+        job.running = True
+        job.last_started = time.time()
+        started = time.perf_counter()
+        try:
+            return await job.func()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.failures += 1
+            job.last_error = f"{type(e).__name__}: {e}"
+            logger.exception("Job %s failed: %s", job.name, e)
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            job.running = False
+            job.runs += 1
+            job.last_duration = duration
+            job.total_duration += duration
+            job.max_duration = max(job.max_duration, duration)
+            JOB_SECONDS.observe(duration, job=job.name)
+            logger.debug("Job %s finished in %.2fs", job.name, duration)
+
+
+# Global instance; Zoom-heavy jobs share the 'zoom' group so at most one calls Zoom at a time
+scheduler = Scheduler(group_limits={'zoom': 1})
+registry.register_collector(scheduler.metric_families)
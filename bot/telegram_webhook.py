@@ -0,0 +1,94 @@
+"""Telegram Webhook Delivery
+Request handler for DEFAULT_MODE=webhook, built on aiogram's aiohttp integration.
+
+Updates are acknowledged immediately and processed in background tasks:
+- at most WEBHOOK_MAX_CONCURRENCY updates are handled at once; past a backlog of
+  WEBHOOK_MAX_PENDING the request is refused with 503 so Telegram redelivers it later
+- updates from the same chat/user are handled in arrival order (FSM flows depend on it)
+- on shutdown, in-flight updates get WEBHOOK_DRAIN_SECONDS to finish
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+
+def _update_key(update: Dict[str, Any]) -> Optional[int]:
+    """Chat (or user) an update belongs to, used to keep per-chat ordering"""
+    for value in update.values():
+        if not isinstance(value, dict):
+            continue
+        chat = value.get('chat') or (value.get('message') or {}).get('chat')
+        if chat and 'id' in chat:
+            return chat['id']
+        user = value.get('from') or value.get('user')
+        if user and 'id' in user:
+            return user['id']
+    return None
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """SimpleRequestHandler with bounded concurrency, per-chat ordering and a draining close()."""
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, secret_token: Optional[str] = None,
+                 max_concurrency: int = 16, max_pending: int = 256, drain_timeout: float = 30.0, **data: Any):
+        super().__init__(dispatcher, bot, handle_in_background=True, secret_token=secret_token, **data)
+        self.max_pending = max_pending
+        self.drain_timeout = drain_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # chat id -> [lock, number of updates holding or waiting for it]
+        self._chat_locks: Dict[int, list] = {}
+        self._closing = False
+
+    @asynccontextmanager
+    async def _chat_turn(self, key: Optional[int]):
+        """Hold the per-chat lock for key (no-op when the update has no chat)"""
+        if key is None:
+            yield
+            return
+        entry = self._chat_locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._chat_locks.pop(key, None)
+
+    async def _background_feed_update(self, bot: Bot, update: Dict[str, Any]) -> None:
+        try:
+            async with self._chat_turn(_update_key(update)):
+                async with self._semaphore:
+                    await super()._background_feed_update(bot, update)
+        except Exception as e:
+            logger.exception("Failed to handle webhook update %s: %s", update.get('update_id'), e)
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        if self._closing or len(self._background_feed_update_tasks) >= self.max_pending:
+            # Telegram retries undelivered updates, so refusing is the backpressure signal
+            logger.warning("Webhook backlog full (%d pending), asking Telegram to retry",
+                           len(self._background_feed_update_tasks))
+            return web.json_response({"error": "busy"}, status=503)
+        return await super()._handle_request_background(bot, request)
+
+    async def close(self) -> None:
+        """Wait for in-flight updates (up to drain_timeout), then close the bot session."""
+        self._closing = True
+        pending = list(self._background_feed_update_tasks)
+        if pending:
+            logger.info("Draining %d in-flight webhook updates", len(pending))
+            done, not_done = await asyncio.wait(pending, timeout=self.drain_timeout)
+            for task in not_done:
+                task.cancel()
+            if not_done:
+                logger.warning("Cancelled %d webhook updates still running after %.0fs",
+                               len(not_done), self.drain_timeout)
+        await super().close()
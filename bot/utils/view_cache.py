@@ -0,0 +1,115 @@
+import html
+import re
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup, Message
+import logging
+
+from db import get_data_version, sync_data_version
+
+logger = logging.getLogger(__name__)
+
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+class ViewCache:
+    """
+    Cache of rendered screens (text + keyboard) for one data version.
+
+    Entries are dropped as soon as any meeting/shortlink/user write bumps the
+    data version, so a cached screen is always identical to a fresh render.
+    get_or_render() first syncs the version with the database, so writes made by
+    other replicas (leader election) invalidate it too.
+
+    Usage:
+        text, kb = await view_cache.get_or_render(("meetings", today), _render_meeting_list)
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._version = get_data_version()
+        self._entries: "OrderedDict[Hashable, Tuple[str, Optional[InlineKeyboardMarkup]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self):
+        version = get_data_version()
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key: Hashable) -> Optional[Tuple[str, Optional[InlineKeyboardMarkup]]]:
+        self._check_version()
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Tuple[str, Optional[InlineKeyboardMarkup]], version: Optional[int] = None):
+        """Store a rendered screen; version is the data version the render started from.
+
+        Returns value for convenient chaining.
+        """
+        self._check_version()
+        if version is not None and version != self._version:
+            # Data changed while rendering; the result may already be stale
+            return value
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    async def get_or_render(self, key: Hashable, render: Callable[[], Awaitable[Tuple[str, Any]]]):
+        """Return the cached screen for key, rendering and caching it on a miss"""
+        await sync_data_version()
+        value = self.get(key)
+        if value is None:
+            version = get_data_version()
+            value = self.put(key, await render(), version)
+        return value
+
+
+view_cache = ViewCache()
+
+
+def _html_to_plain(text: str) -> str:
+    """Approximate the plain text Telegram stores for an HTML-formatted message"""
+    return html.unescape(_TAG_RE.sub("", text)).strip()
+
+
+def is_same_content(message: Message, text: str, reply_markup: Optional[Any] = None) -> bool:
+    """True if message already shows exactly this text and keyboard"""
+    current_text = message.text if message.text is not None else message.caption
+    if current_text is None or current_text.strip() != _html_to_plain(text):
+        return False
+    return message.reply_markup == reply_markup
+
+
+async def edit_if_changed(message: Message, text: str, reply_markup: Optional[Any] = None) -> bool:
+    """
+    Edit a message only if the new content differs from what it shows.
+
+    Args:
+        message (Message): The message to edit (e.g. CallbackQuery.message).
+        text (str): New HTML text.
+        reply_markup: New inline keyboard.
+
+    Returns:
+        bool: True if an edit request was sent, False if it was skipped as identical.
+    """
+    if is_same_content(message, text, reply_markup):
+        logger.debug("Skipping edit of message %s: content unchanged", message.message_id)
+        return False
+    try:
+        await message.edit_text(text, reply_markup=reply_markup)
+    except TelegramBadRequest as e:
+        if "message is not modified" in str(e):
+            return False
+        raise
+    return True
@@ -0,0 +1,113 @@
+"""Zoom Webhook Events
+Applies Zoom event notifications (meeting.*, recording.*) directly to the database,
+so meeting and recording state no longer waits for the polling loops.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict
+
+from config import settings
+from db import (
+    upsert_meeting_from_zoom, update_meeting_details, update_meeting_status, update_meeting_live_status,
+    update_meeting_recording_status, update_meeting_cloud_recording_data,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def _meeting_created(obj: Dict[str, Any]):
+    await upsert_meeting_from_zoom(
+        str(obj['id']), obj.get('topic', 'No Topic'), obj.get('start_time', ''), obj.get('join_url', '')
+    )
+
+
+async def _meeting_updated(obj: Dict[str, Any]):
+    # meeting.updated only carries the fields that changed
+    await update_meeting_details(str(obj['id']), topic=obj.get('topic'), start_time=obj.get('start_time'))
+
+
+async def _meeting_deleted(obj: Dict[str, Any]):
+    await update_meeting_status(str(obj['id']), 'deleted')
+
+
+async def _meeting_started(obj: Dict[str, Any]):
+    await update_meeting_live_status(str(obj['id']), 'started')
+
+
+# Zoom meeting types that happen once (1 instant, 2 scheduled); 3 and 8 are recurring
+NON_RECURRING_MEETING_TYPES = (1, 2)
+
+
+async def _meeting_ended(obj: Dict[str, Any]):
+    zoom_meeting_id = str(obj['id'])
+    await update_meeting_live_status(zoom_meeting_id, 'ended')
+    # A recurring meeting (or one without a type in the payload) stays active for its next
+    # occurrence; a one-off gets the status the expiry check gives a meeting whose start time has passed
+    if obj.get('type') in NON_RECURRING_MEETING_TYPES:
+        await update_meeting_status(zoom_meeting_id, 'done')
+
+
+def _recording_status(status: str):
+    async def apply(obj: Dict[str, Any]):
+        await update_meeting_recording_status(str(obj['id']), status)
+    return apply
+
+
+async def _recording_completed(obj: Dict[str, Any]):
+    # The payload object has the same shape as GET /meetings/{id}/recordings
+    recording_data = dict(obj)
+    recording_data['last_checked'] = datetime.now().isoformat()
+    await update_meeting_cloud_recording_data(str(obj['id']), recording_data)
+
+
+async def _recording_removed(obj: Dict[str, Any]):
+    await update_meeting_cloud_recording_data(str(obj['id']), None)
+
+
+def zoom_poll_interval(default_seconds: int) -> int:
+    """Interval for a Zoom polling loop: default_seconds, or the slow reconciliation
+    interval (ZOOM_RECONCILE_MINUTES) when webhooks deliver the changes"""
+    if settings.zoom_webhook_secret_token:
+        return max(default_seconds, settings.zoom_reconcile_minutes * 60)
+    return default_seconds
+
+
+EVENT_HANDLERS = {
+    'meeting.created': _meeting_created,
+    'meeting.updated': _meeting_updated,
+    'meeting.deleted': _meeting_deleted,
+    'meeting.started': _meeting_started,
+    'meeting.ended': _meeting_ended,
+    'recording.started': _recording_status('recording'),
+    'recording.resumed': _recording_status('recording'),
+    'recording.paused': _recording_status('paused'),
+    'recording.stopped': _recording_status('stopped'),
+    'recording.completed': _recording_completed,
+    'recording.trashed': _recording_removed,
+    'recording.deleted': _recording_removed,
+}
+
+
+async def apply_zoom_event(event: Dict[str, Any]) -> bool:
+    """Apply one Zoom event notification to the database.
+
+    Args:
+        event: Decoded webhook body ({"event": ..., "payload": {"object": {...}}}).
+
+    Returns:
+        bool: True if the event was applied, False if it is not handled or has no meeting id.
+    """
+    name = event.get('event')
+    handler = EVENT_HANDLERS.get(name)
+    obj = (event.get('payload') or {}).get('object') or {}
+    if handler is None:
+        logger.debug("Ignoring Zoom event %s", name)
+        return False
+    if not obj.get('id'):
+        logger.warning("Zoom event %s without meeting id", name)
+        return False
+
+    await handler(obj)
+    logger.info("Applied Zoom event %s for meeting %s", name, obj['id'])
+    return True
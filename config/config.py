@@ -56,6 +56,13 @@ class Settings:
     # Mode / webhook
     default_mode: str = os.getenv("DEFAULT_MODE", "polling")
     webhook_secret: str | None = os.getenv("WEBHOOK_SECRET")
+    # Webhook mode: public base URL Telegram posts to (e.g. https://bot.example.com) and the path
+    # served by the API server; updates handled at once, backlog before refusing, shutdown drain time
+    webhook_url: str | None = os.getenv("WEBHOOK_URL")
+    webhook_path: str = os.getenv("WEBHOOK_PATH", "/telegram/webhook")
+    webhook_max_concurrency: int = _to_int(os.getenv("WEBHOOK_MAX_CONCURRENCY")) or 16
+    webhook_max_pending: int = _to_int(os.getenv("WEBHOOK_MAX_PENDING")) or 256
+    webhook_drain_seconds: int = _to_int(os.getenv("WEBHOOK_DRAIN_SECONDS")) or 30
 
     # Zoom
     zoom_account_id: str | None = os.getenv("ZOOM_ACCOUNT_ID")
@@ -68,7 +75,45 @@ class Settings:
     zoom_user_id: str | None = os.getenv("ZOOM_USER_ID")
     zoom_user_email: str | None = os.getenv("ZOOM_USER_EMAIL")
     zoom_audience: str = os.getenv("ZOOM_AUDIENCE", "https://api.zoom.us")
+    zoom_oauth_url: str = os.getenv("ZOOM_OAUTH_URL", "https://zoom.us/oauth/token")
     zoom_control_mode: str = os.getenv("ZOOM_CONTROL_MODE", "cloud")
+    # Zoom webhooks: Secret Token of the Zoom app (enables POST /zoom/webhook on the API server);
+    # with webhooks on, the meeting/recording polling loops only run as a slow reconciliation pass
+    zoom_webhook_secret_token: str | None = os.getenv("ZOOM_WEBHOOK_SECRET_TOKEN")
+    zoom_reconcile_minutes: int = _to_int(os.getenv("ZOOM_RECONCILE_MINUTES")) or 360
+
+    # HTTP API server (Zoom webhooks, agents)
+    agent_api_host: str = os.getenv("AGENT_API_HOST", "0.0.0.0")
+    agent_api_port: int = _to_int(os.getenv("AGENT_API_PORT")) or 8767
+    # Agents (ZOOM_CONTROL_MODE=agent): longest a command long-poll is held open, and how long a
+    # command may stay pending/running before it is marked failed
+    agent_poll_wait_seconds: int = _to_int(os.getenv("AGENT_POLL_WAIT_SECONDS")) or 25
+    agent_command_timeout_seconds: int = _to_int(os.getenv("AGENT_COMMAND_TIMEOUT_SECONDS")) or 60
+    # With leader election, a parked long-poll re-checks the database this often for commands
+    # queued on another replica (commands queued on the same replica wake it at once)
+    agent_command_poll_seconds: int = _to_int(os.getenv("AGENT_COMMAND_POLL_SECONDS")) or 2
+    # An agent counts as online for this long after its last poll; heartbeats are kept in memory
+    # and written to agents.last_seen in one batch every AGENT_PRESENCE_FLUSH_SECONDS
+    agent_online_seconds: int = _to_int(os.getenv("AGENT_ONLINE_SECONDS")) or 300
+    agent_presence_flush_seconds: int = _to_int(os.getenv("AGENT_PRESENCE_FLUSH_SECONDS")) or 30
+
+    # Leader election between replicas sharing the database: only the lease holder runs background
+    # jobs (Zoom sync, recording sweep, backups, command timeouts); a dead leader is replaced after the lease.
+    # Off by default: it also makes every write bump a shared version row, which one replica does not need
+    leader_election: bool = _to_bool(os.getenv("LEADER_ELECTION", "false"))
+    leader_lease_seconds: int = _to_int(os.getenv("LEADER_LEASE_SECONDS")) or 30
+
+    # Metrics at GET /metrics (Prometheus text format) on their own listener, local-only by default
+    # (not on the public AGENT_API_PORT). With METRICS_TOKEN set, scrapes must send
+    # "Authorization: Bearer <token>"; series per metric are capped at METRICS_MAX_SERIES
+    metrics_enabled: bool = _to_bool(os.getenv("METRICS_ENABLED", "true"))
+    metrics_host: str = os.getenv("METRICS_HOST", "127.0.0.1")
+    metrics_port: int = _to_int(os.getenv("METRICS_PORT")) or 8768
+    metrics_token: str = os.getenv("METRICS_TOKEN", "")
+    metrics_max_series: int = _to_int(os.getenv("METRICS_MAX_SERIES")) or 500
+    # Updates taking longer than this are logged (logger bot.trace) with a DB/Zoom/shortener/FSM/Telegram
+    # time breakdown; 0 disables the trace lines
+    slow_update_ms: int = _to_int(os.getenv("SLOW_UPDATE_MS", "1000")) or 0
 
     # Timezone (e.g., Asia/Jakarta). Also respects TZ/PYTZ_TIMEZONE if TIMEZONE unset.
     timezone: str = os.getenv("TIMEZONE") or os.getenv("TZ") or os.getenv("PYTZ_TIMEZONE", "Asia/Jakarta")
@@ -80,6 +125,12 @@ class Settings:
     # Logging
     LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO')
     LOG_FORMAT: str = os.getenv('LOG_FORMAT', '%(asctime)s,%(msecs)03d - %(name)s - %(levelname)s - %(message)s')
+    # One JSON object per line instead of LOG_FORMAT
+    log_json: bool = _to_bool(os.getenv('LOG_JSON', 'false'))
+    # Share of DEBUG lines kept per module, e.g. "db.db:0.1,zoom.zoom:0.25"
+    log_sampling: str = os.getenv('LOG_SAMPLING', '')
+    # Records waiting for the log writer thread; further records are dropped while it is full
+    log_queue_size: int = _to_int(os.getenv('LOG_QUEUE_SIZE')) or 10000
 
     # Data directory
     DATA_DIR: str = os.getenv('DATA_DIR', './data')
@@ -105,6 +156,31 @@ class Settings:
         (_to_int(os.getenv('FSM_TTL_MINUTES')) or 0) * 60 or None
     )
     
+    # Backup compression codec: 'deflate' (default) or 'zstd' (requires the zstandard package)
+    backup_codec: str = os.getenv('BACKUP_CODEC', 'deflate')
+    # Incremental backups: number of deltas chained onto a full base before a new base is taken
+    backup_max_chain: int = _to_int(os.getenv('BACKUP_MAX_CHAIN')) or 24
+    # Scheduled backups: interval in minutes (0 disables), number of chains kept in DATA_DIR/backups,
+    # and sleep in ms per MB copied to keep the bot responsive while a snapshot is written
+    backup_interval_minutes: int = _to_int(os.getenv('BACKUP_INTERVAL_MINUTES', '60')) or 0
+    backup_retention: int = _to_int(os.getenv('BACKUP_RETENTION')) or 7
+    backup_io_throttle_ms: int = _to_int(os.getenv('BACKUP_IO_THROTTLE_MS', '10')) or 0
+    # Change-tracking rows kept for the next incremental backup; beyond this the chain restarts with a full base
+    backup_changelog_max_rows: int = _to_int(os.getenv('BACKUP_CHANGELOG_MAX_ROWS', '100000')) or 0
+
+    # Retention (0 keeps rows forever): finished agent commands, failed shortlinks, stale FSM rows.
+    # Runs every RETENTION_INTERVAL_HOURS (0 disables); deletes go in small batches, optionally
+    # archived to DATA_DIR/archive, and a full VACUUM runs once free space exceeds the given percent
+    retention_interval_hours: int = _to_int(os.getenv('RETENTION_INTERVAL_HOURS', '24')) or 0
+    retention_agent_commands_days: int = _to_int(os.getenv('RETENTION_AGENT_COMMANDS_DAYS', '30')) or 0
+    retention_failed_shortlinks_days: int = _to_int(os.getenv('RETENTION_FAILED_SHORTLINKS_DAYS', '30')) or 0
+    retention_fsm_states_hours: int = _to_int(os.getenv('RETENTION_FSM_STATES_HOURS', '24')) or 0
+    retention_batch_size: int = _to_int(os.getenv('RETENTION_BATCH_SIZE')) or 500
+    retention_archive: bool = _to_bool(os.getenv('RETENTION_ARCHIVE', 'false'))
+    retention_vacuum_free_percent: int = _to_int(os.getenv('RETENTION_VACUUM_FREE_PERCENT')) or 20
+    # Largest file (MB) the one-off full VACUUM may rewrite; it blocks every query while it runs (0: no limit)
+    retention_vacuum_max_mb: int = _to_int(os.getenv('RETENTION_VACUUM_MAX_MB', '256')) or 0
+
     # Security
     ENABLE_DEPENDENCY_AUDIT: bool = _to_bool(os.getenv('ENABLE_DEPENDENCY_AUDIT', 'true'))
 
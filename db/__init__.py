@@ -3,6 +3,10 @@ from .db import (
     # Core database functions
     init_db,
     run_migrations,
+    get_data_version,
+    bump_data_version,
+    bump_shared_data_version,
+    sync_data_version,
 
     # User management
     add_pending_user,
@@ -16,10 +20,13 @@ from .db import (
 
     # Meeting management
     add_meeting,
+    upsert_meeting_from_zoom,
     update_meeting_short_url,
     update_meeting_short_url_by_join_url,
+    update_meetings_short_urls_many,
     list_meetings,
     list_meetings_with_shortlinks,
+    list_meetings_page,
     sync_meetings_from_zoom,
     update_expired_meetings,
     update_meeting_status,
@@ -32,6 +39,10 @@ from .db import (
     get_meeting_agent_id,
     update_meeting_cloud_recording_data,
     get_meeting_cloud_recording_data,
+    list_completed_meetings_page,
+    touch_recording_sync,
+    get_recording_sync_state,
+    list_recording_totals,
 
     # Agent management
     list_agents,
@@ -39,15 +50,27 @@ from .db import (
     get_agent,
     add_agent,
     remove_agent,
+    update_agent_last_seen,
+    update_agents_last_seen,
 
     # Command management
     add_command,
     get_pending_commands,
     update_command_status,
     check_timeout_commands,
+    claim_commands,
+    complete_command,
+    next_command_lease_expiry,
+
+    # Leader election
+    acquire_leader_lease,
+    validate_leader_lease,
+    release_leader_lease,
+    get_leader_lease,
 
     # Shortlink management
     add_shortlink,
+    add_shortlinks_many,
     update_shortlink_status,
     get_shortlinks_by_user,
     get_shortlink_stats,
@@ -56,15 +79,32 @@ from .db import (
     backup_database,
     backup_shorteners,
     create_backup_zip,
+    create_backup_archive,
+    create_incremental_backup,
+    read_backup_info,
+    backup_dir,
+    prune_backups,
+    prune_backup_changelog,
     restore_database,
+    restore_backup_chain,
     restore_shorteners,
     extract_backup_zip,
+
+    # Retention
+    RETENTION_RULES,
+    archive_dir,
+    purge_table,
+    run_retention,
 )
 
 __all__ = [
     # Core database functions
     "init_db",
     "run_migrations",
+    "get_data_version",
+    "bump_data_version",
+    "bump_shared_data_version",
+    "sync_data_version",
 
     # User management
     "add_pending_user",
@@ -78,10 +118,13 @@ __all__ = [
 
     # Meeting management
     "add_meeting",
+    "upsert_meeting_from_zoom",
     "update_meeting_short_url",
     "update_meeting_short_url_by_join_url",
+    "update_meetings_short_urls_many",
     "list_meetings",
     "list_meetings_with_shortlinks",
+    "list_meetings_page",
     "sync_meetings_from_zoom",
     "update_expired_meetings",
     "update_meeting_status",
@@ -94,6 +137,10 @@ __all__ = [
     "get_meeting_agent_id",
     "update_meeting_cloud_recording_data",
     "get_meeting_cloud_recording_data",
+    "list_completed_meetings_page",
+    "touch_recording_sync",
+    "get_recording_sync_state",
+    "list_recording_totals",
 
     # Agent management
     "list_agents",
@@ -101,15 +148,27 @@ __all__ = [
     "get_agent",
     "add_agent",
     "remove_agent",
+    "update_agent_last_seen",
+    "update_agents_last_seen",
 
     # Command management
     "add_command",
     "get_pending_commands",
     "update_command_status",
     "check_timeout_commands",
+    "claim_commands",
+    "complete_command",
+    "next_command_lease_expiry",
+
+    # Leader election
+    "acquire_leader_lease",
+    "validate_leader_lease",
+    "release_leader_lease",
+    "get_leader_lease",
 
     # Shortlink management
     "add_shortlink",
+    "add_shortlinks_many",
     "update_shortlink_status",
     "get_shortlinks_by_user",
     "get_shortlink_stats",
@@ -118,7 +177,20 @@ __all__ = [
     "backup_database",
     "backup_shorteners",
     "create_backup_zip",
+    "create_backup_archive",
+    "create_incremental_backup",
+    "read_backup_info",
+    "backup_dir",
+    "prune_backups",
+    "prune_backup_changelog",
     "restore_database",
+    "restore_backup_chain",
     "restore_shorteners",
     "extract_backup_zip",
+
+    # Retention
+    "RETENTION_RULES",
+    "archive_dir",
+    "purge_table",
+    "run_retention",
 ]
\ No newline at end of file
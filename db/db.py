@@ -1,17 +1,102 @@
 import aiosqlite
-from typing import Optional, List, Dict
+import asyncio
+import io
+import sqlite3
+import time
+import functools
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Tuple
 from config import settings
+from metrics import DB_SECONDS, timed
 import logging
+import math
 import os
 import zipfile
 import json
-from datetime import datetime
+from datetime import datetime, timezone
 import tempfile
 import shutil
 
 logger = logging.getLogger(__name__)
 
 
+# In-process data version: bumped after every write that changes what the meeting, shortlink
+# or user screens show. Handlers key their rendered-view caches on it.
+_data_version = 0
+# With leader election several replicas share the database, so writes also bump the counter
+# row in data_version; sync_data_version() folds changes made by other replicas into
+# _data_version. Last counter value this process has seen:
+_shared_data_version: Optional[int] = None
+
+
+def get_data_version() -> int:
+    return _data_version
+
+
+def bump_data_version() -> None:
+    global _data_version
+    _data_version += 1
+
+
+async def bump_shared_data_version() -> None:
+    """Bump the in-process data version and, with leader election, the shared counter row"""
+    global _shared_data_version
+    bump_data_version()
+    if not settings.leader_election:
+        return
+    try:
+        async with aiosqlite.connect(settings.db_path) as db:
+            cur = await db.execute(
+                "INSERT INTO data_version (id, version) VALUES (1, 1) "
+                "ON CONFLICT(id) DO UPDATE SET version = version + 1 RETURNING version"
+            )
+            row = await cur.fetchone()
+            await db.commit()
+        _shared_data_version = row[0]
+    except Exception as e:
+        # Other replicas may show stale screens until the next write
+        logger.error("Failed to bump the shared data version: %s", e)
+
+
+async def sync_data_version() -> int:
+    """Return the data version after folding in writes made by other replicas.
+
+    Without leader election this is just get_data_version(); otherwise it reads the shared
+    counter row (a primary-key lookup) and bumps the in-process version if it moved.
+    """
+    global _shared_data_version
+    if not settings.leader_election:
+        return _data_version
+    try:
+        async with aiosqlite.connect(settings.db_path) as db:
+            cur = await db.execute("SELECT version FROM data_version WHERE id = 1")
+            row = await cur.fetchone()
+    except Exception as e:
+        logger.error("Failed to read the shared data version: %s", e)
+        bump_data_version()
+        return _data_version
+    version = row[0] if row else 0
+    if version != _shared_data_version:
+        if _shared_data_version is not None:
+            bump_data_version()
+        _shared_data_version = version
+    return _data_version
+
+
+def _bumps_data_version(func):
+    """Decorator for write functions: bump the data version once the write has finished"""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            await bump_shared_data_version()
+    return wrapper
+
+
 CREATE_SQL = [
     """
     CREATE TABLE IF NOT EXISTS users (
@@ -29,9 +114,10 @@ CREATE_SQL = [
         topic TEXT,
         start_time TEXT,
         join_url TEXT,
+        short_url TEXT, -- latest short link of join_url
         status TEXT DEFAULT 'active', -- active, deleted, expired
         created_by TEXT, -- INTEGER (telegram_id) for bot-created, "CreatedFromZoomApp" for zoom-created
-        cloud_recording_data TEXT, -- JSON with {share_url, recording_files[], total_size, recording_count, last_checked}
+        cloud_recording_data TEXT, -- legacy JSON blob, migrated into recording_sync/recording_files (always NULL now)
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )
@@ -82,7 +168,8 @@ CREATE_SQL = [
         status TEXT DEFAULT 'pending', -- pending, running, done, failed
         result TEXT,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        lease_expires_at TIMESTAMP -- deadline of a pending/running command; failed once passed
     )
     """,
     """
@@ -93,8 +180,164 @@ CREATE_SQL = [
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )
     """,
+    """
+    CREATE TABLE IF NOT EXISTS leader_lease (
+        name TEXT PRIMARY KEY,
+        holder TEXT NOT NULL,
+        fencing_token INTEGER NOT NULL, -- increases every time the lease changes hands
+        expires_at INTEGER NOT NULL, -- unix seconds (database clock)
+        acquired_at INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS data_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL -- bumped by every write that changes what the screens show
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS backup_changelog (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        tbl TEXT NOT NULL,
+        row_id INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS backup_chain (
+        id TEXT PRIMARY KEY,
+        kind TEXT NOT NULL, -- full, incremental
+        base_id TEXT NOT NULL,
+        parent_id TEXT,
+        from_seq INTEGER NOT NULL,
+        to_seq INTEGER NOT NULL,
+        path TEXT NOT NULL,
+        size_bytes INTEGER,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS recording_sync (
+        zoom_meeting_id TEXT PRIMARY KEY,
+        available INTEGER DEFAULT 0, -- 1 when Zoom returned recordings on the last fetch
+        topic TEXT,
+        start_time TEXT,
+        duration INTEGER,
+        share_url TEXT,
+        password TEXT,
+        last_checked TEXT, -- last time Zoom was asked for recordings (with or without result)
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS recording_files (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        zoom_meeting_id TEXT NOT NULL,
+        file_id TEXT, -- Zoom recording file id
+        file_type TEXT, -- MP4, M4A, TIMELINE, TRANSCRIPT, CHAT, CC
+        file_extension TEXT,
+        recording_type TEXT,
+        file_size INTEGER DEFAULT 0,
+        play_url TEXT,
+        download_url TEXT,
+        status TEXT,
+        recording_start TEXT,
+        recording_end TEXT
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_recording_files_meeting ON recording_files (zoom_meeting_id)
+    """,
+    # Paged meeting list: range scan on normalized UTC start time (datetime() accepts 'Z' and +HH:MM)
+    """
+    CREATE INDEX IF NOT EXISTS idx_meetings_status_start ON meetings (status, datetime(start_time))
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_shortlinks_meeting ON shortlinks (zoom_meeting_id, status)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_agent_commands_agent_status ON agent_commands (agent_id, status, id)
+    """,
 ]
 
+# Timeout sweep: range scan over the deadlines of open commands only (created in run_migrations,
+# after lease_expires_at is added to older databases)
+AGENT_COMMANDS_LEASE_INDEX_SQL = """
+    CREATE INDEX IF NOT EXISTS idx_agent_commands_lease ON agent_commands (lease_expires_at)
+    WHERE status IN ('pending', 'running')
+"""
+
+# Bookkeeping tables (incremental backups, leader lease, shared data version): never change-tracked
+# and never part of a dump. Page-level snapshots do contain them; restore_database() puts the live
+# rows back after the swap
+BACKUP_INTERNAL_TABLES = ('backup_changelog', 'backup_chain', 'leader_lease', 'data_version')
+
+# Short-lived churn (FSM state, agent command queue): part of full backups but not change-tracked,
+# so their writes cost no changelog rows and never make a delta on their own
+BACKUP_UNTRACKED_TABLES = ('fsm_states', 'agent_commands')
+
+# Heartbeat columns: an UPDATE that changes only these does not count as a change (the row is
+# still exported with its current values whenever anything else in it changes)
+BACKUP_IGNORED_COLUMNS = {
+    'agents': ('last_seen',),
+    'recording_sync': ('last_checked',),
+}
+
+# Changelog rows no backup will read again: at or below the oldest to_seq still in the chain,
+# or all of them when there is no chain (the next backup is then a full base)
+BACKUP_CHANGELOG_UNUSED_SQL = (
+    "seq <= COALESCE((SELECT MIN(to_seq) FROM backup_chain), (SELECT MAX(seq) FROM backup_changelog))"
+)
+
+
+def _changelog_trigger_names(table: str) -> List[str]:
+    return ['trg_' + table + suffix for suffix in ('_bk_ins', '_bk_upd', '_bk_del')]
+
+
+async def _ensure_change_tracking(db):
+    """Create changelog triggers on every user table except BACKUP_UNTRACKED_TABLES (idempotent).
+
+    Each insert/update/delete appends (table, rowid) to backup_changelog; incremental
+    backups export the current state of exactly those rows. Updates that only touch
+    BACKUP_IGNORED_COLUMNS are not logged. Triggers and changelog rows of untracked
+    tables left by older versions are removed.
+    """
+    cur = await db.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+    )
+    tables = [r[0] for r in await cur.fetchall() if r[0] not in BACKUP_INTERNAL_TABLES]
+    for table in tables:
+        if table in BACKUP_UNTRACKED_TABLES:
+            for trigger in _changelog_trigger_names(table):
+                await db.execute(f"DROP TRIGGER IF EXISTS {_quote_ident(trigger)}")
+            continue
+        ident = _quote_ident(table)
+        literal = _sql_literal(table)
+        ins_trigger, upd_trigger, del_trigger = (_quote_ident(t) for t in _changelog_trigger_names(table))
+        await db.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {ins_trigger} AFTER INSERT ON {ident} "
+            f"BEGIN INSERT INTO backup_changelog (tbl, row_id) VALUES ({literal}, NEW.rowid); END"
+        )
+        when = ''
+        if table in BACKUP_IGNORED_COLUMNS:
+            cur = await db.execute(f"PRAGMA table_info({ident})")
+            columns = [r[1] for r in await cur.fetchall() if r[1] not in BACKUP_IGNORED_COLUMNS[table]]
+            when = "WHEN OLD.rowid != NEW.rowid" + ''.join(
+                f" OR OLD.{_quote_ident(c)} IS NOT NEW.{_quote_ident(c)}" for c in columns
+            ) + " "
+            # Rebuilt every start, so the column list follows migrations (and older unconditional triggers are replaced)
+            await db.execute(f"DROP TRIGGER IF EXISTS {upd_trigger}")
+        await db.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {upd_trigger} AFTER UPDATE ON {ident} {when}"
+            f"BEGIN INSERT INTO backup_changelog (tbl, row_id) VALUES ({literal}, NEW.rowid); "
+            f"INSERT INTO backup_changelog (tbl, row_id) SELECT {literal}, OLD.rowid WHERE OLD.rowid != NEW.rowid; END"
+        )
+        await db.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {del_trigger} AFTER DELETE ON {ident} "
+            f"BEGIN INSERT INTO backup_changelog (tbl, row_id) VALUES ({literal}, OLD.rowid); END"
+        )
+    placeholders = ','.join('?' * len(BACKUP_UNTRACKED_TABLES))
+    await db.execute(f"DELETE FROM backup_changelog WHERE tbl IN ({placeholders})", BACKUP_UNTRACKED_TABLES)
+
 
 async def run_migrations(db):
     """Run database migrations to update schema."""
@@ -144,16 +387,22 @@ async def run_migrations(db):
 async def init_db():
     logger.info("Initializing database at %s", settings.db_path)
     async with aiosqlite.connect(settings.db_path) as db:
+        # Only takes effect on a new (empty) file; run_retention converts existing ones on their first VACUUM
+        await db.execute("PRAGMA auto_vacuum = INCREMENTAL")
         for s in CREATE_SQL:
             await db.execute(s)
         
         # Run migrations
         await run_migrations(db)
+
+        # Change tracking for incremental backups (after migrations so rebuilt tables get triggers)
+        await _ensure_change_tracking(db)
         
         await db.commit()
     logger.info("Database initialized")
 
 
+@_bumps_data_version
 async def add_pending_user(telegram_id: int, username: Optional[str]):
     logger.debug("add_pending_user telegram_id=%s username=%s", telegram_id, username)
     async with aiosqlite.connect(settings.db_path) as db:
@@ -181,6 +430,7 @@ async def list_all_users() -> List[Dict]:
         return [dict(id=r[0], telegram_id=r[1], username=r[2], status=r[3], role=r[4]) for r in rows]
 
 
+@_bumps_data_version
 async def update_user_status(telegram_id: int, status: str, role: Optional[str] = None):
     logger.debug("update_user_status telegram_id=%s status=%s role=%s", telegram_id, status, role)
     async with aiosqlite.connect(settings.db_path) as db:
@@ -205,6 +455,7 @@ async def get_user_by_telegram_id(telegram_id: int) -> Optional[Dict]:
         return user
 
 
+@_bumps_data_version
 async def ban_toggle_user(telegram_id: int, banned: bool):
     status = 'banned' if banned else 'whitelisted'
     role = 'guest' if banned else 'user'
@@ -212,6 +463,7 @@ async def ban_toggle_user(telegram_id: int, banned: bool):
     await update_user_status(telegram_id, status, role)
 
 
+@_bumps_data_version
 async def delete_user(telegram_id: int):
     """Delete a user row from the database by telegram_id."""
     logger.debug("delete_user %s", telegram_id)
@@ -244,6 +496,7 @@ async def search_users(query: str) -> List[Dict]:
 
 
 # Meetings functions
+@_bumps_data_version
 async def add_meeting(zoom_meeting_id: str, topic: str, start_time: str, join_url: str, created_by: int):
     logger.debug("add_meeting zoom_id=%s topic=%s created_by=%s", zoom_meeting_id, topic, created_by)
     async with aiosqlite.connect(settings.db_path) as db:
@@ -255,6 +508,30 @@ async def add_meeting(zoom_meeting_id: str, topic: str, start_time: str, join_ur
     logger.info("Meeting %s added to DB", zoom_meeting_id)
 
 
+@_bumps_data_version
+async def upsert_meeting_from_zoom(zoom_meeting_id: str, topic: str, start_time: str, join_url: str):
+    """Insert a meeting reported by Zoom (e.g. a webhook), or refresh and reactivate it if it exists.
+
+    New rows get created_by 'CreatedFromZoomApp', like sync_meetings_from_zoom; the creator of an
+    existing row is kept.
+    """
+    logger.debug("upsert_meeting_from_zoom zoom_id=%s topic=%s", zoom_meeting_id, topic)
+    async with aiosqlite.connect(settings.db_path) as db:
+        await db.execute(
+            """
+            INSERT INTO meetings (zoom_meeting_id, topic, start_time, join_url, status, created_by)
+            VALUES (?, ?, ?, ?, 'active', 'CreatedFromZoomApp')
+            ON CONFLICT(zoom_meeting_id) DO UPDATE SET
+                topic = excluded.topic, start_time = excluded.start_time, join_url = excluded.join_url,
+                status = 'active', updated_at = CURRENT_TIMESTAMP
+            """,
+            (zoom_meeting_id, topic, start_time, join_url),
+        )
+        await db.commit()
+    logger.info("Meeting %s upserted from Zoom", zoom_meeting_id)
+
+
+@_bumps_data_version
 async def update_meeting_short_url(zoom_meeting_id: str, short_url: str):
     logger.debug("update_meeting_short_url zoom_id=%s short_url=%s", zoom_meeting_id, short_url)
     async with aiosqlite.connect(settings.db_path) as db:
@@ -263,6 +540,7 @@ async def update_meeting_short_url(zoom_meeting_id: str, short_url: str):
     logger.info("Meeting %s short URL updated", zoom_meeting_id)
 
 
+@_bumps_data_version
 async def update_meeting_short_url_by_join_url(join_url: str, short_url: str):
     logger.debug("update_meeting_short_url_by_join_url join_url=%s short_url=%s", join_url, short_url)
     async with aiosqlite.connect(settings.db_path) as db:
@@ -270,6 +548,21 @@ async def update_meeting_short_url_by_join_url(join_url: str, short_url: str):
         await db.commit()
     logger.info("Meeting with join_url %s short URL updated", join_url)
 
+
+@_bumps_data_version
+async def update_meetings_short_urls_many(short_urls: Dict[str, str]) -> int:
+    """Set short_url of many meetings ({join_url: short_url}) with one executemany in one transaction."""
+    if not short_urls:
+        return 0
+    async with aiosqlite.connect(settings.db_path) as db:
+        await db.executemany(
+            "UPDATE meetings SET short_url = ?, updated_at = CURRENT_TIMESTAMP WHERE join_url = ?",
+            [(short_url, join_url) for join_url, short_url in short_urls.items()]
+        )
+        await db.commit()
+    logger.info("Short URL of %d meetings updated in batch", len(short_urls))
+    return len(short_urls)
+
 async def list_meetings() -> List[Dict]:
     logger.debug("list_meetings called")
     async with aiosqlite.connect(settings.db_path) as db:
@@ -278,58 +571,102 @@ async def list_meetings() -> List[Dict]:
         return [dict(id=r[0], zoom_meeting_id=r[1], topic=r[2], start_time=r[3], join_url=r[4], status=r[5], created_by=r[6], created_at=r[7], updated_at=r[8]) for r in rows]
 
 
+_MEETING_WITH_CREATOR_SQL = """
+    SELECT m.id, m.zoom_meeting_id, m.topic, m.start_time, m.join_url, m.status, m.created_by,
+           m.created_at, m.updated_at, u.username
+    FROM meetings m
+    LEFT JOIN users u ON u.telegram_id = m.created_by
+"""
+
+
+async def _fetch_meetings_with_shortlinks(db, where: str, params: tuple, order_by: str) -> List[Dict]:
+    """Run a meetings query and attach creator_username and active shortlinks.
+
+    Uses two queries regardless of the number of meetings: meetings LEFT JOIN users
+    (users.telegram_id has INTEGER affinity so the TEXT created_by is compared numerically;
+    creator_username is None for unknown creators and the Zoom app), and all active
+    shortlinks for those meetings in one IN (...) lookup.
+    """
+    meetings_cur = await db.execute(f"{_MEETING_WITH_CREATOR_SQL} WHERE {where} ORDER BY {order_by}", params)
+    meetings_rows = await meetings_cur.fetchall()
+    
+    meetings = []
+    by_zoom_id: Dict[str, Dict] = {}
+    for r in meetings_rows:
+        meeting = dict(
+            id=r[0],
+            zoom_meeting_id=r[1],
+            topic=r[2],
+            start_time=r[3],
+            join_url=r[4],
+            status=r[5],
+            created_by=r[6],
+            created_at=r[7],
+            updated_at=r[8],
+            creator_username=r[9],
+            shortlinks=[]
+        )
+        meetings.append(meeting)
+        by_zoom_id[meeting['zoom_meeting_id']] = meeting
+    
+    if not by_zoom_id:
+        return meetings
+    
+    # Get shortlinks for all listed meetings at once
+    placeholders = ",".join("?" * len(by_zoom_id))
+    shortlinks_cur = await db.execute(f"""
+        SELECT id, original_url, short_url, provider, custom_alias, status, created_at, error_message, zoom_meeting_id
+        FROM shortlinks 
+        WHERE zoom_meeting_id IN ({placeholders}) AND status = 'active'
+        ORDER BY created_at DESC
+    """, tuple(by_zoom_id))
+    for r in await shortlinks_cur.fetchall():
+        by_zoom_id[r[8]]['shortlinks'].append(dict(
+            id=r[0],
+            original_url=r[1],
+            short_url=r[2],
+            provider=r[3],
+            custom_alias=r[4],
+            status=r[5],
+            created_at=r[6],
+            error_message=r[7]
+        ))
+    
+    return meetings
+
+
 async def list_meetings_with_shortlinks() -> List[Dict]:
-    """List meetings with their associated shortlinks"""
+    """List active/done meetings with their associated shortlinks and the creator's username"""
     logger.debug("list_meetings_with_shortlinks called")
     async with aiosqlite.connect(settings.db_path) as db:
-        # Get meetings
-        meetings_cur = await db.execute("""
-            SELECT id, zoom_meeting_id, topic, start_time, join_url, status, created_by, created_at, updated_at
-            FROM meetings
-            WHERE status IN ('active', 'done')
-            ORDER BY created_at DESC
-        """)
-        meetings_rows = await meetings_cur.fetchall()
-        
-        meetings = []
-        for r in meetings_rows:
-            meeting = dict(
-                id=r[0],
-                zoom_meeting_id=r[1],
-                topic=r[2],
-                start_time=r[3],
-                join_url=r[4],
-                status=r[5],
-                created_by=r[6],
-                created_at=r[7],
-                updated_at=r[8]
-            )
-            
-            # Get shortlinks for this meeting
-            shortlinks_cur = await db.execute("""
-                SELECT id, original_url, short_url, provider, custom_alias, status, created_at, error_message
-                FROM shortlinks 
-                WHERE zoom_meeting_id = ? AND status = 'active'
-                ORDER BY created_at DESC
-            """, (meeting['zoom_meeting_id'],))
-            shortlinks_rows = await shortlinks_cur.fetchall()
-            
-            meeting['shortlinks'] = [
-                dict(
-                    id=r[0],
-                    original_url=r[1],
-                    short_url=r[2],
-                    provider=r[3],
-                    custom_alias=r[4],
-                    status=r[5],
-                    created_at=r[6],
-                    error_message=r[7]
-                ) for r in shortlinks_rows
-            ]
-            
-            meetings.append(meeting)
-        
-        return meetings
+        return await _fetch_meetings_with_shortlinks(
+            db, "m.status IN ('active', 'done')", (), "m.created_at DESC"
+        )
+
+
+async def list_meetings_page(start_utc: datetime, end_utc: datetime, limit: int, offset: int = 0) -> Tuple[List[Dict], int]:
+    """One page of active/done meetings starting within [start_utc, end_utc], earliest first.
+
+    Only the requested rows (and their shortlinks) are loaded. Meetings whose start_time
+    cannot be parsed by SQLite are not listed.
+
+    Returns:
+        (meetings, total) where total is the number of meetings in the whole range.
+    """
+    logger.debug("list_meetings_page start=%s end=%s limit=%s offset=%s", start_utc, end_utc, limit, offset)
+    range_sql = "m.status IN ('active', 'done') AND datetime(m.start_time) BETWEEN ? AND ?"
+    bounds = (
+        start_utc.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+        end_utc.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+    )
+    async with aiosqlite.connect(settings.db_path) as db:
+        cur = await db.execute(f"SELECT COUNT(*) FROM meetings m WHERE {range_sql}", bounds)
+        total = (await cur.fetchone())[0]
+        meetings = await _fetch_meetings_with_shortlinks(
+            db, range_sql, bounds + (limit, offset),
+            "datetime(m.start_time), m.id LIMIT ? OFFSET ?"
+        )
+        return meetings, total
 
 
 async def add_agent(name: str, base_url: str, api_key: str | None = None, os_type: str | None = None, hostname: str | None = None, ip_address: str | None = None, version: str | None = None):
@@ -353,55 +690,101 @@ async def add_agent(name: str, base_url: str, api_key: str | None = None, os_typ
     return agent_id
 
 
-async def add_command(agent_id: int, action: str, payload: str | None = None) -> int:
-    """Queue a command for an agent and return command id."""
+async def add_command(agent_id: int, action: str, payload: str | None = None, timeout_seconds: int = 60) -> int:
+    """Queue a command for an agent and return command id.
+
+    The command fails if no agent claims it within timeout_seconds.
+    """
     async with aiosqlite.connect(settings.db_path) as db:
         cur = await db.execute(
-            "INSERT INTO agent_commands (agent_id, action, payload, status) VALUES (?, ?, ?, 'pending')",
-            (agent_id, action, payload)
+            "INSERT INTO agent_commands (agent_id, action, payload, status, lease_expires_at) "
+            "VALUES (?, ?, ?, 'pending', datetime('now', ?))",
+            (agent_id, action, payload, f"+{int(timeout_seconds)} seconds")
         )
         await db.commit()
         return cur.lastrowid
 
 
 async def get_pending_commands(agent_id: int) -> List[Dict]:
-    """Return pending commands for an agent."""
+    """Return pending commands for an agent (read-only; agents take work with claim_commands)."""
     async with aiosqlite.connect(settings.db_path) as db:
         cur = await db.execute("SELECT id, action, payload, status, created_at FROM agent_commands WHERE agent_id = ? AND status = 'pending' ORDER BY created_at ASC", (agent_id,))
         rows = await cur.fetchall()
         return [dict(id=r[0], action=r[1], payload=r[2], status=r[3], created_at=r[4]) for r in rows]
 
 
+async def claim_commands(agent_id: int, n: int = 10, lease_seconds: int = 60) -> List[Dict]:
+    """Atomically move up to n pending commands of an agent to 'running' and return them.
+
+    Each claimed command gets a lease of lease_seconds to report its result. A single
+    UPDATE ... RETURNING statement, so concurrent claims never hand out the same command.
+    """
+    async with aiosqlite.connect(settings.db_path) as db:
+        cur = await db.execute(
+            """
+            UPDATE agent_commands
+            SET status = 'running', lease_expires_at = datetime('now', ?), updated_at = CURRENT_TIMESTAMP
+            WHERE id IN (
+                SELECT id FROM agent_commands WHERE agent_id = ? AND status = 'pending' ORDER BY id LIMIT ?
+            )
+            RETURNING id, action, payload, created_at, lease_expires_at
+            """,
+            (f"+{int(lease_seconds)} seconds", agent_id, n)
+        )
+        rows = await cur.fetchall()
+        await db.commit()
+    # RETURNING order is unspecified
+    return [dict(id=r[0], action=r[1], payload=r[2], created_at=r[3], lease_expires_at=r[4]) for r in sorted(rows)]
+
+
+async def complete_command(agent_id: int, command_id: int, status: str, result: str | None = None) -> bool:
+    """Record the result of a claimed command. Returns False unless it is a running command of agent_id."""
+    async with aiosqlite.connect(settings.db_path) as db:
+        cur = await db.execute(
+            "UPDATE agent_commands SET status = ?, result = ?, lease_expires_at = NULL, updated_at = CURRENT_TIMESTAMP "
+            "WHERE id = ? AND agent_id = ? AND status = 'running'",
+            (status, result, command_id, agent_id)
+        )
+        await db.commit()
+        return cur.rowcount > 0
+
+
 async def update_command_status(command_id: int, status: str, result: str | None = None):
     async with aiosqlite.connect(settings.db_path) as db:
         await db.execute("UPDATE agent_commands SET status = ?, result = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?", (status, result, command_id))
         await db.commit()
 
 
-async def check_timeout_commands():
-    """Check for commands that have timed out (60 seconds) and mark them as failed."""
-    timeout_seconds = 60
+async def check_timeout_commands() -> int:
+    """Mark commands whose lease has expired as failed and return how many were.
+
+    Only reads expired rows, via the partial index on lease_expires_at of open commands.
+    """
     async with aiosqlite.connect(settings.db_path) as db:
-        # Update commands that are still pending/running and older than timeout
-        await db.execute("""
-            UPDATE agent_commands 
-            SET status = 'failed', 
-                result = 'Command timed out after 60 seconds', 
-                updated_at = CURRENT_TIMESTAMP 
-            WHERE status IN ('pending', 'running') 
-            AND (strftime('%s', 'now') - strftime('%s', created_at)) > ?
-        """, (timeout_seconds,))
-        await db.commit()
-        
-        # Return count of timed out commands
         cur = await db.execute("""
-            SELECT COUNT(*) FROM agent_commands 
-            WHERE status = 'failed' 
-            AND result = 'Command timed out after 60 seconds'
-            AND (strftime('%s', 'now') - strftime('%s', updated_at)) < 10
+            UPDATE agent_commands
+            SET status = 'failed',
+                result = CASE status WHEN 'pending' THEN 'Command was not picked up in time'
+                                     ELSE 'Command timed out' END,
+                lease_expires_at = NULL,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE status IN ('pending', 'running') AND lease_expires_at <= CURRENT_TIMESTAMP
+            RETURNING id
         """)
+        rows = await cur.fetchall()
+        await db.commit()
+        return len(rows)
+
+
+async def next_command_lease_expiry() -> Optional[int]:
+    """Seconds until the earliest open command lease expires (negative if overdue), None if none are open."""
+    async with aiosqlite.connect(settings.db_path) as db:
+        cur = await db.execute(
+            "SELECT strftime('%s', MIN(lease_expires_at)) - strftime('%s', 'now') FROM agent_commands "
+            "WHERE status IN ('pending', 'running')"
+        )
         row = await cur.fetchone()
-        return row[0] if row else 0
+        return row[0] if row and row[0] is not None else None
 
 
 async def list_agents(limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
@@ -449,6 +832,80 @@ async def update_agent_last_seen(agent_id: int):
         await db.commit()
 
 
+async def update_agents_last_seen(last_seen: Dict[int, str]) -> int:
+    """Write many agents' last_seen timestamps (UTC 'YYYY-MM-DD HH:MM:SS') in one transaction."""
+    if not last_seen:
+        return 0
+    async with aiosqlite.connect(settings.db_path) as db:
+        await db.executemany(
+            "UPDATE agents SET last_seen = ? WHERE id = ?",
+            [(ts, agent_id) for agent_id, ts in last_seen.items()]
+        )
+        await db.commit()
+    logger.debug("update_agents_last_seen wrote %d agents", len(last_seen))
+    return len(last_seen)
+
+
+async def acquire_leader_lease(name: str, holder: str, lease_seconds: int) -> Optional[int]:
+    """Take or renew the named lease for holder; returns the fencing token, or None if another
+    holder's lease is still valid.
+
+    One INSERT ... ON CONFLICT statement, so two replicas can never both win. The token is
+    incremented whenever the lease passes to a different holder.
+    """
+    async with aiosqlite.connect(settings.db_path) as db:
+        cur = await db.execute(
+            """
+            INSERT INTO leader_lease (name, holder, fencing_token, expires_at, acquired_at)
+            VALUES (?, ?, 1, CAST(strftime('%s', 'now') AS INTEGER) + ?, CAST(strftime('%s', 'now') AS INTEGER))
+            ON CONFLICT(name) DO UPDATE SET
+                fencing_token = CASE WHEN leader_lease.holder = excluded.holder
+                                     THEN leader_lease.fencing_token ELSE leader_lease.fencing_token + 1 END,
+                acquired_at = CASE WHEN leader_lease.holder = excluded.holder
+                                   THEN leader_lease.acquired_at ELSE excluded.acquired_at END,
+                holder = excluded.holder,
+                expires_at = excluded.expires_at
+            WHERE leader_lease.holder = excluded.holder
+               OR leader_lease.expires_at <= CAST(strftime('%s', 'now') AS INTEGER)
+            RETURNING fencing_token
+            """,
+            (name, holder, lease_seconds)
+        )
+        row = await cur.fetchone()
+        await db.commit()
+        return row[0] if row else None
+
+
+async def validate_leader_lease(name: str, holder: str, fencing_token: int) -> bool:
+    """True if holder still owns the named lease with this fencing token and it has not expired."""
+    async with aiosqlite.connect(settings.db_path) as db:
+        cur = await db.execute(
+            "SELECT 1 FROM leader_lease WHERE name = ? AND holder = ? AND fencing_token = ? "
+            "AND expires_at > CAST(strftime('%s', 'now') AS INTEGER)",
+            (name, holder, fencing_token)
+        )
+        return await cur.fetchone() is not None
+
+
+async def release_leader_lease(name: str, holder: str):
+    """Expire the named lease now if holder owns it, so another replica can take over immediately."""
+    async with aiosqlite.connect(settings.db_path) as db:
+        await db.execute("UPDATE leader_lease SET expires_at = 0 WHERE name = ? AND holder = ?", (name, holder))
+        await db.commit()
+
+
+async def get_leader_lease(name: str) -> Optional[Dict]:
+    async with aiosqlite.connect(settings.db_path) as db:
+        cur = await db.execute(
+            "SELECT holder, fencing_token, expires_at, acquired_at FROM leader_lease WHERE name = ?", (name,)
+        )
+        r = await cur.fetchone()
+        if not r:
+            return None
+        return dict(holder=r[0], fencing_token=r[1], expires_at=r[2], acquired_at=r[3])
+
+
+@_bumps_data_version
 async def update_meeting_status(zoom_meeting_id: str, status: str):
     """Update meeting status (active, deleted, expired)"""
     logger.debug("update_meeting_status zoom_id=%s status=%s", zoom_meeting_id, status)
@@ -458,6 +915,7 @@ async def update_meeting_status(zoom_meeting_id: str, status: str):
     logger.info("Meeting %s status updated to %s", zoom_meeting_id, status)
 
 
+@_bumps_data_version
 async def update_meeting_details(zoom_meeting_id: str, topic: str | None = None, start_time: str | None = None):
     """Update meeting topic and/or start_time in the local DB."""
     logger.debug("update_meeting_details zoom_id=%s topic=%s start_time=%s", zoom_meeting_id, topic, start_time)
@@ -483,55 +941,200 @@ async def update_meeting_details(zoom_meeting_id: str, topic: str | None = None,
     logger.info("Meeting %s details updated", zoom_meeting_id)
 
 
+_RECORDING_FILE_FIELDS = (
+    'file_id', 'file_type', 'file_extension', 'recording_type', 'file_size',
+    'play_url', 'download_url', 'status', 'recording_start', 'recording_end',
+)
+
+
+async def _store_recording_data(db, zoom_meeting_id: str, recording_data: Dict[str, any]):
+    """Replace the stored recordings of a meeting with a Zoom recordings response (no commit)"""
+    await db.execute(
+        """
+        INSERT INTO recording_sync (zoom_meeting_id, available, topic, start_time, duration, share_url, password, last_checked, updated_at)
+        VALUES (?, 1, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(zoom_meeting_id) DO UPDATE SET
+            available = 1, topic = excluded.topic, start_time = excluded.start_time, duration = excluded.duration,
+            share_url = excluded.share_url, password = excluded.password,
+            last_checked = COALESCE(excluded.last_checked, recording_sync.last_checked), updated_at = CURRENT_TIMESTAMP
+        """,
+        (
+            zoom_meeting_id,
+            recording_data.get('topic'),
+            recording_data.get('start_time'),
+            recording_data.get('duration'),
+            recording_data.get('share_url'),
+            recording_data.get('password'),  # Zoom API field name is 'password'
+            str(recording_data['last_checked']) if recording_data.get('last_checked') else None,
+        )
+    )
+    await db.execute("DELETE FROM recording_files WHERE zoom_meeting_id = ?", (zoom_meeting_id,))
+    await db.executemany(
+        f"INSERT INTO recording_files (zoom_meeting_id, {', '.join(_RECORDING_FILE_FIELDS)}) "
+        f"VALUES (?, {', '.join('?' * len(_RECORDING_FILE_FIELDS))})",
+        [
+            (
+                zoom_meeting_id, f.get('id'), f.get('file_type'), f.get('file_extension'), f.get('recording_type'),
+                f.get('file_size') or 0, f.get('play_url'), f.get('download_url'), f.get('status'),
+                f.get('recording_start'), f.get('recording_end'),
+            )
+            for f in recording_data.get('recording_files') or []
+        ]
+    )
+
+
+@_bumps_data_version
 async def update_meeting_cloud_recording_data(zoom_meeting_id: str, recording_data: Optional[Dict[str, any]] = None):
     """Update meeting cloud recording data.
     
     Args:
         zoom_meeting_id: Zoom meeting ID
-        recording_data: Dict with {share_url, recording_files[], total_size, recording_count, last_checked}
-                       None to clear recording data
+        recording_data: Zoom recordings response {topic, start_time, duration, share_url, password,
+                       recording_files[], last_checked}; None (or empty) to clear recording data
     """
     logger.debug("update_meeting_cloud_recording_data zoom_id=%s", zoom_meeting_id)
     async with aiosqlite.connect(settings.db_path) as db:
         if recording_data:
-            data_json = json.dumps(recording_data, default=str)  # default=str for datetime serialization
-            await db.execute(
-                "UPDATE meetings SET cloud_recording_data = ?, updated_at = CURRENT_TIMESTAMP WHERE zoom_meeting_id = ?",
-                (data_json, zoom_meeting_id)
-            )
+            await _store_recording_data(db, zoom_meeting_id, recording_data)
             logger.info("Meeting %s cloud recording data updated: %d files", zoom_meeting_id, 
-                       recording_data.get('recording_count', 0))
+                       len(recording_data.get('recording_files') or []))
         else:
-            await db.execute(
-                "UPDATE meetings SET cloud_recording_data = NULL, updated_at = CURRENT_TIMESTAMP WHERE zoom_meeting_id = ?",
-                (zoom_meeting_id,)
-            )
+            await db.execute("DELETE FROM recording_files WHERE zoom_meeting_id = ?", (zoom_meeting_id,))
+            await db.execute("DELETE FROM recording_sync WHERE zoom_meeting_id = ?", (zoom_meeting_id,))
             logger.info("Meeting %s cloud recording data cleared", zoom_meeting_id)
+        await db.execute("UPDATE meetings SET updated_at = CURRENT_TIMESTAMP WHERE zoom_meeting_id = ?", (zoom_meeting_id,))
+        await db.commit()
+
+
+async def touch_recording_sync(zoom_meeting_id: str, checked_at: Optional[str] = None):
+    """Record that Zoom was asked for recordings of a meeting, without touching the stored recordings"""
+    checked_at = checked_at or datetime.now().isoformat()
+    logger.debug("touch_recording_sync zoom_id=%s checked_at=%s", zoom_meeting_id, checked_at)
+    async with aiosqlite.connect(settings.db_path) as db:
+        await db.execute(
+            """
+            INSERT INTO recording_sync (zoom_meeting_id, last_checked) VALUES (?, ?)
+            ON CONFLICT(zoom_meeting_id) DO UPDATE SET last_checked = excluded.last_checked
+            """,
+            (zoom_meeting_id, checked_at)
+        )
         await db.commit()
 
 
+async def get_recording_sync_state(zoom_meeting_id: str) -> Optional[Dict]:
+    """Get the recording sync state of a meeting: {available, last_checked} or None if never checked"""
+    logger.debug("get_recording_sync_state zoom_id=%s", zoom_meeting_id)
+    async with aiosqlite.connect(settings.db_path) as db:
+        cur = await db.execute(
+            "SELECT available, last_checked FROM recording_sync WHERE zoom_meeting_id = ?",
+            (zoom_meeting_id,)
+        )
+        row = await cur.fetchone()
+        if not row:
+            return None
+        return dict(available=bool(row[0]), last_checked=row[1])
+
+
 async def get_meeting_cloud_recording_data(zoom_meeting_id: str) -> Optional[Dict[str, any]]:
     """Get stored cloud recording data for a meeting.
     
-    Returns dict with {share_url, recording_files[], total_size, recording_count, last_checked}
-    or None if no recording data available.
+    Returns dict with {topic, start_time, duration, share_url, password, recording_files[],
+    total_size, recording_count, last_checked} or None if no recording data available.
+    total_size and recording_count are aggregated from recording_files.
     """
     logger.debug("get_meeting_cloud_recording_data zoom_id=%s", zoom_meeting_id)
     async with aiosqlite.connect(settings.db_path) as db:
         cur = await db.execute(
-            "SELECT cloud_recording_data FROM meetings WHERE zoom_meeting_id = ?",
+            """
+            SELECT topic, start_time, duration, share_url, password, last_checked
+            FROM recording_sync WHERE zoom_meeting_id = ? AND available = 1
+            """,
             (zoom_meeting_id,)
         )
         row = await cur.fetchone()
-        if row and row[0]:
-            try:
-                return json.loads(row[0])
-            except json.JSONDecodeError:
-                logger.warning("Failed to decode cloud_recording_data for meeting %s", zoom_meeting_id)
-                return None
-        return None
+        if not row:
+            return None
+        
+        files_cur = await db.execute(
+            f"SELECT {', '.join(_RECORDING_FILE_FIELDS)} FROM recording_files WHERE zoom_meeting_id = ? ORDER BY id",
+            (zoom_meeting_id,)
+        )
+        recording_files = []
+        for r in await files_cur.fetchall():
+            f = dict(zip(_RECORDING_FILE_FIELDS, r))
+            f['id'] = f.pop('file_id')
+            recording_files.append(f)
+        
+        return dict(
+            topic=row[0],
+            start_time=row[1],
+            duration=row[2],
+            share_url=row[3],
+            password=row[4],
+            last_checked=row[5],
+            recording_files=recording_files,
+            total_size=sum(f['file_size'] or 0 for f in recording_files),
+            recording_count=len(recording_files)
+        )
+
+
+async def list_recording_totals() -> List[Dict]:
+    """Total recording size and file count per meeting, largest first"""
+    logger.debug("list_recording_totals called")
+    async with aiosqlite.connect(settings.db_path) as db:
+        cur = await db.execute("""
+            SELECT zoom_meeting_id, COUNT(*), COALESCE(SUM(file_size), 0)
+            FROM recording_files
+            GROUP BY zoom_meeting_id
+            ORDER BY 3 DESC
+        """)
+        rows = await cur.fetchall()
+        return [dict(zoom_meeting_id=r[0], recording_count=r[1], total_size=r[2]) for r in rows]
+
 
+async def list_completed_meetings_page(limit: int, offset: int = 0) -> Tuple[List[Dict], int]:
+    """One page of completed (done/deleted) meetings with their cloud recording summary, newest first.
 
+    has_recording and recording_count come from recording_sync/recording_files in the same
+    query; has_recording matches get_meeting_cloud_recording_data() returning data.
+
+    Returns:
+        (meetings, total) where total is the number of completed meetings.
+    """
+    logger.debug("list_completed_meetings_page limit=%s offset=%s", limit, offset)
+    async with aiosqlite.connect(settings.db_path) as db:
+        cur = await db.execute("""
+            SELECT m.zoom_meeting_id, m.topic, m.start_time, m.status,
+                   COALESCE(rs.available, 0) AS has_recording,
+                   (SELECT COUNT(*) FROM recording_files rf WHERE rf.zoom_meeting_id = m.zoom_meeting_id) AS recording_count,
+                   COUNT(*) OVER () AS total
+            FROM meetings m
+            LEFT JOIN recording_sync rs ON rs.zoom_meeting_id = m.zoom_meeting_id
+            WHERE m.status IN ('done', 'deleted')
+            ORDER BY datetime(m.start_time) DESC NULLS LAST, m.id DESC
+            LIMIT ? OFFSET ?
+        """, (limit, offset))
+        rows = await cur.fetchall()
+        if rows:
+            total = rows[0][6]
+        else:
+            # Page past the end (or no meetings): the window count is not available
+            cur = await db.execute("SELECT COUNT(*) FROM meetings WHERE status IN ('done', 'deleted')")
+            total = (await cur.fetchone())[0]
+        meetings = [
+            dict(
+                zoom_meeting_id=r[0],
+                topic=r[1],
+                start_time=r[2],
+                status=r[3],
+                has_recording=bool(r[4]),
+                recording_count=r[5]
+            ) for r in rows
+        ]
+        return meetings, total
+
+
+@_bumps_data_version
 async def update_meeting_recording_status(zoom_meeting_id: str, recording_status: str, agent_id: Optional[int] = None):
     """Update meeting recording status (stopped, recording, paused)"""
     logger.debug("update_meeting_recording_status zoom_id=%s recording_status=%s agent_id=%s", zoom_meeting_id, recording_status, agent_id)
@@ -590,6 +1193,7 @@ async def get_meeting_agent_id(zoom_meeting_id: str) -> Optional[int]:
         return row[0] if row and row[0] is not None else None
 
 
+@_bumps_data_version
 async def update_meeting_live_status(zoom_meeting_id: str, live_status: str, agent_id: Optional[int] = None):
     """Update meeting live status (not_started, started, ended)"""
     logger.debug("update_meeting_live_status zoom_id=%s live_status=%s agent_id=%s", zoom_meeting_id, live_status, agent_id)
@@ -650,6 +1254,7 @@ async def sync_meeting_live_status_from_zoom(zoom_client, zoom_meeting_id: str)
         return 'unknown'
 
 
+@_bumps_data_version
 async def sync_meetings_from_zoom(zoom_client) -> Dict[str, int]:
     """
     Sync meetings from Zoom API to database and update expired meetings.
@@ -791,6 +1396,7 @@ async def sync_meetings_from_zoom(zoom_client) -> Dict[str, int]:
         return stats
 
 
+@_bumps_data_version
 async def update_expired_meetings() -> Dict[str, int]:
     """
     Update status of meetings that have passed their start time to 'expired'.
@@ -882,6 +1488,10 @@ async def run_migrations(db):
             await db.execute("ALTER TABLE meetings ADD COLUMN updated_at TIMESTAMP")
             # Set default value for existing records
             await db.execute("UPDATE meetings SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL")
+
+        if 'short_url' not in column_names:
+            logger.info("Adding short_url column to meetings table")
+            await db.execute("ALTER TABLE meetings ADD COLUMN short_url TEXT")
         
         # Check if created_by is still INTEGER, convert to TEXT
         if 'created_by' in column_types and column_types['created_by'].upper() == 'INTEGER':
@@ -939,12 +1549,45 @@ async def run_migrations(db):
             if 'recording_started_at' not in column_names:
                 logger.info("Adding recording_started_at column to meeting_live_status table")
                 await db.execute("ALTER TABLE meeting_live_status ADD COLUMN recording_started_at TIMESTAMP")
+
+        # Command leases: give open commands of older databases the old 60s-from-creation deadline
+        cur = await db.execute("PRAGMA table_info(agent_commands)")
+        columns = await cur.fetchall()
+        if 'lease_expires_at' not in [col[1] for col in columns]:
+            logger.info("Adding lease_expires_at column to agent_commands table")
+            await db.execute("ALTER TABLE agent_commands ADD COLUMN lease_expires_at TIMESTAMP")
+            await db.execute(
+                "UPDATE agent_commands SET lease_expires_at = datetime(created_at, '+60 seconds') "
+                "WHERE status IN ('pending', 'running')"
+            )
+        await db.execute(AGENT_COMMANDS_LEASE_INDEX_SQL)
+
+        # Move legacy cloud_recording_data JSON blobs into recording_sync/recording_files
+        cursor = await db.execute(
+            "SELECT zoom_meeting_id, cloud_recording_data FROM meetings WHERE cloud_recording_data IS NOT NULL"
+        )
+        rows = await cursor.fetchall()
+        
+        if rows:
+            logger.info("Migrating cloud recording data of %d meetings into recording tables", len(rows))
+            for zoom_meeting_id, data_json in rows:
+                try:
+                    recording_data = json.loads(data_json)
+                except json.JSONDecodeError:
+                    logger.warning("Dropping undecodable cloud_recording_data for meeting %s", zoom_meeting_id)
+                    recording_data = None
+                if isinstance(recording_data, dict) and recording_data:
+                    await _store_recording_data(db, zoom_meeting_id, recording_data)
+            await db.execute("UPDATE meetings SET cloud_recording_data = NULL WHERE cloud_recording_data IS NOT NULL")
+            await db.commit()
+            logger.info("Cloud recording data normalized into recording tables")
         
     except Exception as e:
         logger.exception("Migration failed: %s", e)
 
 
 # Shortlinks functions
+@_bumps_data_version
 async def add_shortlink(original_url: str, short_url: Optional[str], provider: str, custom_alias: Optional[str] = None, zoom_meeting_id: Optional[str] = None, created_by: Optional[int] = None, error_message: Optional[str] = None) -> int:
     """Add a new shortlink record. Returns the ID of the inserted record."""
     status = 'failed' if error_message else 'active'
@@ -964,6 +1607,41 @@ async def add_shortlink(original_url: str, short_url: Optional[str], provider: s
         return shortlink_id
 
 
+@_bumps_data_version
+async def add_shortlinks_many(records: List[Dict]) -> int:
+    """Insert many shortlink records with a single executemany in one transaction.
+
+    Each record uses the same keys as add_shortlink's arguments. Returns number of rows written.
+    """
+    if not records:
+        return 0
+
+    rows = [
+        (
+            r['original_url'],
+            r.get('short_url'),
+            r['provider'],
+            r.get('custom_alias'),
+            r.get('zoom_meeting_id'),
+            'failed' if r.get('error_message') else 'active',
+            r.get('created_by'),
+            r.get('error_message'),
+        )
+        for r in records
+    ]
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        await db.executemany("""
+            INSERT INTO shortlinks (original_url, short_url, provider, custom_alias, zoom_meeting_id, status, created_by, error_message)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        await db.commit()
+
+    logger.info("Added %d shortlink records in batch", len(rows))
+    return len(rows)
+
+
+@_bumps_data_version
 async def update_shortlink_status(shortlink_id: int, status: str, short_url: Optional[str] = None, error_message: Optional[str] = None):
     """Update shortlink status and optionally short_url or error_message."""
     async with aiosqlite.connect(settings.db_path) as db:
@@ -1039,76 +1717,130 @@ async def get_shortlink_stats() -> Dict:
 
 # Backup and Restore Functions
 
-async def backup_database() -> str:
-    """Create SQL dump of the database.
+# Rows per INSERT statement (and per fetchmany call) in streaming SQL dumps; bounds dump memory use
+DUMP_CHUNK_SIZE = 500
+
+
+def _sql_literal(value) -> str:
+    """Render a Python value from sqlite3 as an SQL literal"""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "X'" + bytes(value).hex() + "'"
+    return repr(value)
+
+
+def _quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _snapshot_database_sync(dest_path: str) -> None:
+    """Copy the live database into dest_path using the SQLite online backup API.
 
-    Returns path to the SQL dump file.
+    All pages are copied in one step (pages=-1), so writers are blocked only for the
+    length of a file copy. A stepwise copy restarts whenever another connection writes,
+    and would never finish under steady write load. Anything slow (dumping, compressing,
+    throttled I/O) then works on the private copy.
     """
-    logger.info("Creating database backup")
-    dump_file = tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False)
+    src = sqlite3.connect(settings.db_path)
+    dst = sqlite3.connect(dest_path)
+    try:
+        src.backup(dst, pages=-1)
+    finally:
+        dst.close()
+        src.close()
+
 
+def _dump_database_sync(out, db_path: str, chunk_size: int = DUMP_CHUNK_SIZE) -> Dict[str, int]:
+    """Stream an SQL dump of the database file db_path into the text file object out.
+
+    Rows are read with fetchmany and written as one multi-row INSERT per chunk, so memory use
+    is bounded by chunk_size regardless of table size. db_path should be a snapshot from
+    _snapshot_database_sync, not the live database: the dump reads it in one long
+    transaction, which would lock out the bot's writers for the whole dump.
+    Returns {table: row_count}.
+    """
+    counts: Dict[str, int] = {}
+    conn = sqlite3.connect(db_path)
     try:
-        async with aiosqlite.connect(settings.db_path) as db:
-            # Get all table names
-            cursor = await db.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = await cursor.fetchall()
-
-            dump_file.write("-- Zoom-Telebot Database Backup\n")
-            dump_file.write(f"-- Created at: {datetime.now().isoformat()}\n\n")
-
-            for table_name, in tables:
-                if table_name.startswith('sqlite_'):
-                    continue  # Skip SQLite internal tables
-
-                logger.debug("Dumping table: %s", table_name)
-
-                # Write table schema
-                cursor = await db.execute(f"SELECT sql FROM sqlite_master WHERE type='table' AND name='{table_name}'")
-                schema = await cursor.fetchone()
-                if schema and schema[0]:
-                    dump_file.write(f"{schema[0]};\n\n")
-
-                # Write table data
-                cursor = await db.execute(f"SELECT * FROM {table_name}")
-                rows = await cursor.fetchall()
-                rows_list = list(rows)  # Convert to list for len()
-
-                if rows_list:
-                    # Get column names
-                    column_names = [description[0] for description in cursor.description]
-                    columns_str = ', '.join(column_names)
-
-                    dump_file.write(f"INSERT INTO {table_name} ({columns_str}) VALUES\n")
-
-                    row_count = len(rows_list)
-                    for i, row in enumerate(rows_list):
-                        # Escape single quotes and handle None values
-                        values = []
-                        for value in row:
-                            if value is None:
-                                values.append('NULL')
-                            elif isinstance(value, str):
-                                values.append(f"'{value.replace(chr(39), chr(39) + chr(39))}'")
-                            else:
-                                values.append(str(value))
-
-                        values_str = ', '.join(values)
-                        dump_file.write(f"({values_str})")
-
-                        if i < row_count - 1:
-                            dump_file.write(",\n")
-                        else:
-                            dump_file.write(";\n")
-
-                    dump_file.write("\n")
-
-        dump_file.close()
-        logger.info("Database backup created: %s", dump_file.name)
-        return dump_file.name
+        conn.execute("BEGIN")
+        out.write("-- Zoom-Telebot Database Backup\n")
+        out.write(f"-- Created at: {datetime.now().isoformat()}\n\n")
+
+        tables = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        ).fetchall()
+        for table_name, schema in tables:
+            if table_name in BACKUP_INTERNAL_TABLES:
+                continue
+            logger.debug("Dumping table: %s", table_name)
+            if schema:
+                out.write(f"{schema};\n\n")
+
+            cursor = conn.execute(f"SELECT * FROM {_quote_ident(table_name)}")
+            columns_str = ', '.join(_quote_ident(d[0]) for d in cursor.description)
+            counts[table_name] = 0
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                out.write(f"INSERT INTO {_quote_ident(table_name)} ({columns_str}) VALUES\n")
+                out.write(",\n".join("(" + ", ".join(_sql_literal(v) for v in row) + ")" for row in rows))
+                out.write(";\n")
+                counts[table_name] += len(rows)
+            if counts[table_name]:
+                out.write("\n")
+
+        # Indexes after data, so restores do not maintain them row by row
+        for (index_sql,) in conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type='index' AND sql IS NOT NULL ORDER BY name"
+        ):
+            out.write(f"{index_sql};\n")
+    finally:
+        conn.rollback()
+        conn.close()
+    return counts
+
+
+async def backup_database(mode: str = 'snapshot', chunk_size: int = DUMP_CHUNK_SIZE) -> str:
+    """Create a backup of the database in a worker thread.
+
+    mode='snapshot' writes a page-level copy of the SQLite file (``.db``);
+    mode='sql' writes a streaming SQL dump (``.sql``) with at most chunk_size rows in memory.
 
-    except Exception as e:
-        dump_file.close()
-        os.unlink(dump_file.name)
+    Returns path to the backup file.
+    """
+    if mode not in ('snapshot', 'sql'):
+        raise ValueError(f"Unknown backup mode: {mode}")
+
+    logger.info("Creating database backup (mode=%s)", mode)
+    suffix = '.db' if mode == 'snapshot' else '.sql'
+    fd, backup_path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+
+    try:
+        if mode == 'snapshot':
+            await asyncio.to_thread(_snapshot_database_sync, backup_path)
+        else:
+            def _write_dump():
+                snapshot_path = backup_path + '.snapshot'
+                try:
+                    _snapshot_database_sync(snapshot_path)
+                    with open(backup_path, 'w', encoding='utf-8') as f:
+                        return _dump_database_sync(f, snapshot_path, chunk_size)
+                finally:
+                    if os.path.exists(snapshot_path):
+                        os.unlink(snapshot_path)
+            counts = await asyncio.to_thread(_write_dump)
+            logger.debug("Dumped rows per table: %s", counts)
+
+        logger.info("Database backup created: %s (%d bytes)", backup_path, os.path.getsize(backup_path))
+        return backup_path
+
+    except Exception:
+        os.unlink(backup_path)
         logger.exception("Failed to create database backup")
         raise
 
@@ -1174,65 +1906,779 @@ def create_backup_zip(db_dump_path: str, shorteners_path: str) -> str:
         raise
 
 
-async def restore_database(sql_dump_path: str) -> Dict[str, int]:
-    """Restore database from SQL dump file.
+# Compression codecs supported for backup archives. 'zstd' needs the optional 'zstandard' package.
+BACKUP_CODECS = ('deflate', 'zstd')
+_COPY_CHUNK = 1 << 20
+
+
+def _zstd():
+    """Import the optional zstandard module with a readable error if it is missing"""
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("Codec zstd membutuhkan paket 'zstandard' (pip install zstandard)")
+    return zstandard
+
+
+class _CountingWriter(io.RawIOBase):
+    """Binary pass-through writer that counts the bytes written through it"""
+
+    def __init__(self, target):
+        self.target = target
+        self.bytes_written = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self.target.write(b)
+        self.bytes_written += len(b)
+        return len(b)
+
+
+@contextmanager
+def _compressed_member(zipf: zipfile.ZipFile, arcname: str, codec: str):
+    """Open a ZIP member for streaming writes; yields a byte-counting binary writer.
 
-    Returns statistics about restored data.
+    With codec='zstd' the data is zstd-compressed into ``<arcname>.zst`` (stored
+    uncompressed in the ZIP), otherwise the member itself is deflated.
     """
-    logger.info("Restoring database from: %s", sql_dump_path)
+    name = arcname + ('.zst' if codec == 'zstd' else '')
+    with zipf.open(name, 'w', force_zip64=True) as member:
+        compressor = None
+        sink = member
+        if codec == 'zstd':
+            compressor = _zstd().ZstdCompressor(level=3, threads=-1).stream_writer(member, closefd=False)
+            sink = compressor
+        counter = _CountingWriter(sink)
+        yield counter
+        if compressor is not None:
+            compressor.close()
+
+
+@contextmanager
+def _text_writer(counter: '_CountingWriter'):
+    """Buffered UTF-8 text stream on top of a binary member writer"""
+    text = io.TextIOWrapper(io.BufferedWriter(counter, _COPY_CHUNK), encoding='utf-8')
+    yield text
+    text.flush()
+    text.detach()
+
+
+def _changelog_seq(conn: sqlite3.Connection) -> int:
+    """Highest change sequence number recorded in a database (0 if untracked)"""
+    try:
+        row = conn.execute("SELECT MAX(seq) FROM backup_changelog").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] or 0
+
+
+def _write_backup_info(zipf: zipfile.ZipFile, metadata: Dict) -> None:
+    zipf.writestr('backup_info.json', json.dumps(metadata, indent=2), compress_type=zipfile.ZIP_DEFLATED)
 
-    stats = {'tables_created': 0, 'rows_inserted': 0}
+
+def _copy_throttled(src, dst, throttle: float = 0.0) -> None:
+    """copyfileobj in _COPY_CHUNK pieces, sleeping throttle seconds after each piece"""
+    while True:
+        chunk = src.read(_COPY_CHUNK)
+        if not chunk:
+            break
+        dst.write(chunk)
+        if throttle > 0:
+            time.sleep(throttle)
+
+
+def _write_backup_archive_sync(zip_path: str, codec: str, mode: str, shorteners_path: Optional[str],
+                               extra_metadata: Optional[Dict] = None, throttle: float = 0.0) -> Dict:
+    """Produce the backup ZIP in one pass; runs in a worker thread.
+
+    The live database is first copied to a temporary snapshot, which is the only time it is
+    locked. The SQL dump of that snapshot (or the snapshot file itself) is compressed while
+    it is being produced, so no uncompressed dump is kept on disk. With codec='zstd' the database member is a
+    zstd stream stored uncompressed in the ZIP (``database_backup.sql.zst``).
+    """
+    started = time.monotonic()
+    now = datetime.now()
+    table_rows: Dict[str, int] = {}
+    db_member = 'database_backup.sql' if mode == 'sql' else 'database_backup.db'
+    snapshot_path = None
+    to_seq = None
 
     try:
-        # Read SQL dump
-        with open(sql_dump_path, 'r', encoding='utf-8') as f:
-            sql_content = f.read()
-
-        # Split into individual statements (basic approach)
-        statements = []
-        current_statement = ""
-        in_string = False
-        string_char = None
-
-        for char in sql_content:
-            if not in_string:
-                if char in ("'", '"'):
-                    in_string = True
-                    string_char = char
-                elif char == ';':
-                    if current_statement.strip():
-                        statements.append(current_statement.strip())
-                    current_statement = ""
-                    continue
-            else:
-                if char == string_char and (not current_statement or current_statement[-1] != '\\'):
-                    in_string = False
-                    string_char = None
+        # Both modes work from a private snapshot, so the live database is locked only while it is copied
+        fd, snapshot_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        _snapshot_database_sync(snapshot_path)
+        if mode == 'snapshot':
+            conn = sqlite3.connect(snapshot_path)
+            try:
+                to_seq = _changelog_seq(conn)
+            finally:
+                conn.close()
+
+        compression = zipfile.ZIP_STORED if codec == 'zstd' else zipfile.ZIP_DEFLATED
+        with zipfile.ZipFile(zip_path, 'w', compression) as zipf:
+            with _compressed_member(zipf, db_member, codec) as counter:
+                if mode == 'sql':
+                    with _text_writer(counter) as text:
+                        table_rows = _dump_database_sync(text, snapshot_path)
+                else:
+                    with open(snapshot_path, 'rb') as f:
+                        _copy_throttled(f, counter, throttle)
 
-            current_statement += char
+            if shorteners_path and os.path.exists(shorteners_path):
+                zipf.write(shorteners_path, arcname='shorteners_backup.json',
+                           compress_type=zipfile.ZIP_DEFLATED)
 
-        # Execute statements
-        async with aiosqlite.connect(settings.db_path) as db:
-            for statement in statements:
-                if statement.strip() and not statement.strip().startswith('--'):
-                    try:
-                        await db.execute(statement)
-                        if statement.upper().startswith('CREATE TABLE'):
-                            stats['tables_created'] += 1
-                        elif statement.upper().startswith('INSERT'):
-                            stats['rows_inserted'] += 1
-                    except Exception as e:
-                        logger.warning("Failed to execute statement: %s - %s", statement[:100], e)
+            metadata = {
+                'created_at': now.isoformat(),
+                'version': '1.1',
+                'mode': mode,
+                'codec': codec,
+                'tables': table_rows,
+                'description': 'Zoom-Telebot backup containing database and shorteners configuration'
+            }
+            if to_seq is not None:
+                metadata['to_seq'] = to_seq
+            metadata.update(extra_metadata or {})
+            _write_backup_info(zipf, metadata)
+    finally:
+        if snapshot_path and os.path.exists(snapshot_path):
+            os.unlink(snapshot_path)
+
+    seconds = max(time.monotonic() - started, 1e-6)
+    raw_bytes = counter.bytes_written
+    return {
+        'path': zip_path,
+        'mode': mode,
+        'codec': codec,
+        'raw_bytes': raw_bytes,
+        'bytes_written': os.path.getsize(zip_path),
+        'seconds': seconds,
+        'throughput_mb_s': raw_bytes / seconds / (1024 * 1024),
+        'tables': table_rows,
+        'to_seq': to_seq,
+    }
+
+
+def _write_delta_sync(out, from_seq: int, chunk_size: int = DUMP_CHUNK_SIZE, throttle: float = 0.0) -> Dict:
+    """Write the rows changed after from_seq as replayable SQL.
+
+    Rows that still exist are written as INSERT OR REPLACE keyed by rowid, rows that are
+    gone as DELETE. Each chunk of chunk_size rows is read in its own short statement and
+    throttle sleeps between chunks with no lock held, so writers are never kept waiting
+    for the whole delta. A row written meanwhile may be exported with a state newer than
+    to_seq; its change is also logged after to_seq, so the next delta writes it again and
+    replaying the chain still ends in the current state.
+    Returns {'to_seq', 'changes', 'tables': {table: changed_rows}}.
+    """
+    conn = sqlite3.connect(settings.db_path)
+    try:
+        to_seq = _changelog_seq(conn)
+        out.write("-- Zoom-Telebot Incremental Backup\n")
+        out.write(f"-- Changes {from_seq + 1}..{to_seq}\n\n")
+
+        changed = conn.execute(
+            "SELECT DISTINCT tbl FROM backup_changelog WHERE seq > ? AND seq <= ? ORDER BY tbl",
+            (from_seq, to_seq),
+        ).fetchall()
+        tables: Dict[str, int] = {}
+        for (table_name,) in changed:
+            ident = _quote_ident(table_name)
+            # Bounded by BACKUP_CHANGELOG_MAX_ROWS; fetched up front so no statement stays open between chunks
+            row_ids = [r[0] for r in conn.execute(
+                "SELECT DISTINCT row_id FROM backup_changelog WHERE tbl = ? AND seq > ? AND seq <= ? ORDER BY row_id",
+                (table_name, from_seq, to_seq),
+            ).fetchall()]
+            tables[table_name] = len(row_ids)
+            for start in range(0, len(row_ids), chunk_size):
+                ids = row_ids[start:start + chunk_size]
+                placeholders = ','.join('?' * len(ids))
+                cursor = conn.execute(f"SELECT rowid, * FROM {ident} WHERE rowid IN ({placeholders})", ids)
+                columns_str = ', '.join(['rowid'] + [_quote_ident(d[0]) for d in cursor.description[1:]])
+                rows = cursor.fetchall()
+                present = {row[0] for row in rows}
+                gone = [i for i in ids if i not in present]
+                if gone:
+                    out.write(f"DELETE FROM {ident} WHERE rowid IN ({', '.join(str(i) for i in gone)});\n")
+                if rows:
+                    out.write(f"INSERT OR REPLACE INTO {ident} ({columns_str}) VALUES\n")
+                    out.write(",\n".join("(" + ", ".join(_sql_literal(v) for v in row) + ")" for row in rows))
+                    out.write(";\n")
+                if throttle > 0:
+                    time.sleep(throttle)
+    finally:
+        conn.close()
+    return {'to_seq': to_seq, 'changes': sum(tables.values()), 'tables': tables}
+
+
+def _write_delta_archive_sync(zip_path: str, codec: str, from_seq: int, shorteners_path: Optional[str],
+                              metadata: Dict, throttle: float = 0.0) -> Dict:
+    """Write an incremental backup ZIP (database_delta.sql + shorteners + metadata)"""
+    started = time.monotonic()
+    compression = zipfile.ZIP_STORED if codec == 'zstd' else zipfile.ZIP_DEFLATED
+    with zipfile.ZipFile(zip_path, 'w', compression) as zipf:
+        with _compressed_member(zipf, 'database_delta.sql', codec) as counter:
+            with _text_writer(counter) as text:
+                delta = _write_delta_sync(text, from_seq, throttle=throttle)
+        if shorteners_path and os.path.exists(shorteners_path):
+            zipf.write(shorteners_path, arcname='shorteners_backup.json', compress_type=zipfile.ZIP_DEFLATED)
+        _write_backup_info(zipf, dict(
+            metadata,
+            created_at=datetime.now().isoformat(),
+            version='1.1',
+            mode='delta',
+            codec=codec,
+            from_seq=from_seq,
+            to_seq=delta['to_seq'],
+            tables=delta['tables'],
+            description='Zoom-Telebot incremental backup; restore requires its base and parent archives',
+        ))
+
+    seconds = max(time.monotonic() - started, 1e-6)
+    return {
+        'path': zip_path,
+        'mode': 'delta',
+        'codec': codec,
+        'raw_bytes': counter.bytes_written,
+        'bytes_written': os.path.getsize(zip_path),
+        'seconds': seconds,
+        'throughput_mb_s': counter.bytes_written / seconds / (1024 * 1024),
+        'tables': delta['tables'],
+        'changes': delta['changes'],
+        'to_seq': delta['to_seq'],
+    }
+
+
+async def create_backup_archive(codec: Optional[str] = None, mode: str = 'sql') -> Dict:
+    """Create the backup ZIP (database + shorteners.json) without blocking the event loop.
+
+    Dumping and compression run in the default thread pool. codec defaults to
+    settings.backup_codec ('deflate' or 'zstd'); mode is 'sql' or 'snapshot' as in
+    backup_database().
+
+    Returns dict with path, raw_bytes (uncompressed database bytes), bytes_written
+    (archive size), seconds, throughput_mb_s and per-table row counts (sql mode).
+    """
+    codec = (codec or getattr(settings, 'backup_codec', 'deflate') or 'deflate').lower()
+    if codec not in BACKUP_CODECS:
+        raise ValueError(f"Unknown backup codec: {codec}")
+    if mode not in ('snapshot', 'sql'):
+        raise ValueError(f"Unknown backup mode: {mode}")
+    if codec == 'zstd':
+        _zstd()  # fail fast before any work is done
+
+    now = datetime.now()
+    zip_filename = f"{now.day:02d}-{now.month:02d}-{now.year}-{now.hour:02d}-{now.minute:02d}.zip"
+    zip_path = os.path.join(tempfile.gettempdir(), zip_filename)
+    shorteners_path = os.path.join(settings.DATA_DIR, "shorteners.json")
+
+    logger.info("Creating backup archive: %s (mode=%s, codec=%s)", zip_path, mode, codec)
+    try:
+        stats = await asyncio.to_thread(_write_backup_archive_sync, zip_path, codec, mode, shorteners_path)
+    except Exception:
+        if os.path.exists(zip_path):
+            os.unlink(zip_path)
+        logger.exception("Failed to create backup archive")
+        raise
+
+    logger.info(
+        "Backup archive created: %s, %d bytes raw -> %d bytes in %.2fs (%.1f MB/s)",
+        zip_path, stats['raw_bytes'], stats['bytes_written'], stats['seconds'], stats['throughput_mb_s'],
+    )
+    return stats
+
+
+def backup_dir() -> str:
+    """Directory holding locally kept backup archives (full bases and their deltas)"""
+    return os.path.join(settings.DATA_DIR, 'backups')
+
+
+def _resolve_codec(codec: Optional[str]) -> str:
+    codec = (codec or getattr(settings, 'backup_codec', 'deflate') or 'deflate').lower()
+    if codec not in BACKUP_CODECS:
+        raise ValueError(f"Unknown backup codec: {codec}")
+    if codec == 'zstd':
+        _zstd()  # fail fast before any work is done
+    return codec
+
+
+_low_priority_executor: Optional[ThreadPoolExecutor] = None
+
+# Held while a backup extends the chain and while old chains or the changelog are pruned
+_backup_chain_lock = asyncio.Lock()
+
+
+def _lower_thread_priority() -> None:
+    """Executor initializer: lowest CPU priority for this worker thread (per-thread nice on Linux)"""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except (AttributeError, OSError) as e:
+        logger.debug("Could not lower backup thread priority: %s", e)
+
+
+def _get_low_priority_executor() -> ThreadPoolExecutor:
+    """Single dedicated worker for scheduled backups, so the default pool keeps normal priority"""
+    global _low_priority_executor
+    if _low_priority_executor is None:
+        _low_priority_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='backup', initializer=_lower_thread_priority
+        )
+    return _low_priority_executor
+
+
+async def create_incremental_backup(codec: Optional[str] = None, force_full: bool = False,
+                                    low_priority: bool = False) -> Dict:
+    """Create the next backup in the local chain under backup_dir().
 
+    A full snapshot base is written when there is no chain yet, when force_full is set or
+    when the chain already has settings.backup_max_chain deltas; otherwise a delta with
+    only the rows changed since the previous archive is written. If nothing changed, no
+    archive is created and the result has kind 'none'.
+
+    With low_priority the work runs on a dedicated niced worker thread and I/O is
+    throttled by settings.backup_io_throttle_ms per MB, for scheduled backups.
+
+    Returns the archive stats plus kind, backup_id, base_id and changes.
+    """
+    # Changelog pruning must not run between a base's snapshot and its backup_chain row
+    async with _backup_chain_lock:
+        return await _create_incremental_backup(codec, force_full, low_priority)
+
+
+async def _create_incremental_backup(codec: Optional[str], force_full: bool, low_priority: bool) -> Dict:
+    codec = _resolve_codec(codec)
+    loop = asyncio.get_running_loop()
+    executor = _get_low_priority_executor() if low_priority else None
+    throttle = getattr(settings, 'backup_io_throttle_ms', 0) / 1000 if low_priority else 0.0
+    os.makedirs(backup_dir(), exist_ok=True)
+    shorteners_path = os.path.join(settings.DATA_DIR, "shorteners.json")
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        cur = await db.execute(
+            "SELECT id, base_id, to_seq FROM backup_chain ORDER BY to_seq DESC, created_at DESC LIMIT 1"
+        )
+        last = await cur.fetchone()
+        chain_length = 0
+        if last:
+            cur = await db.execute("SELECT COUNT(*) FROM backup_chain WHERE base_id = ? AND kind = 'incremental'", (last[1],))
+            chain_length = (await cur.fetchone())[0]
+        cur = await db.execute("SELECT MAX(seq) FROM backup_changelog")
+        current_seq = (await cur.fetchone())[0] or 0
+
+    max_chain = getattr(settings, 'backup_max_chain', 24)
+    if not force_full and last is not None and current_seq <= last[2]:
+        logger.info("Incremental backup skipped: no changes since %s", last[0])
+        return {'kind': 'none', 'changes': 0, 'backup_id': last[0], 'base_id': last[1]}
+    full = force_full or last is None or chain_length >= max_chain
+
+    now = datetime.now()
+    backup_id = now.strftime('%Y%m%d-%H%M%S-%f')
+    kind = 'full' if full else 'incremental'
+    zip_path = os.path.join(backup_dir(), f"{backup_id}-{kind}.zip")
+    metadata = {
+        'backup_id': backup_id,
+        'kind': kind,
+        'base_id': backup_id if full else last[1],
+        'parent_id': None if full else last[0],
+    }
+
+    logger.info("Creating %s backup %s (codec=%s)", kind, backup_id, codec)
+    try:
+        if full:
+            stats = await loop.run_in_executor(executor, functools.partial(
+                _write_backup_archive_sync, zip_path, codec, 'snapshot', shorteners_path, metadata, throttle
+            ))
+            stats['changes'] = None
+            from_seq = 0
+        else:
+            stats = await loop.run_in_executor(executor, functools.partial(
+                _write_delta_archive_sync, zip_path, codec, last[2], shorteners_path, metadata, throttle
+            ))
+            from_seq = last[2]
+    except Exception:
+        if os.path.exists(zip_path):
+            os.unlink(zip_path)
+        logger.exception("Failed to create %s backup", kind)
+        raise
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        await db.execute(
+            "INSERT INTO backup_chain (id, kind, base_id, parent_id, from_seq, to_seq, path, size_bytes, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (backup_id, kind, metadata['base_id'], metadata['parent_id'], from_seq, stats['to_seq'],
+             zip_path, stats['bytes_written'], now.isoformat()),
+        )
+        if full:
+            # Older changes are covered by the new base
+            await db.execute("DELETE FROM backup_changelog WHERE seq <= ?", (stats['to_seq'],))
+        await db.commit()
+
+    stats.update(metadata)
+    logger.info(
+        "%s backup %s created: %d bytes (%s changed rows)",
+        kind.capitalize(), backup_id, stats['bytes_written'], stats['changes'] if stats['changes'] is not None else 'all',
+    )
+    return stats
+
+
+def read_backup_info(zip_path: str) -> Dict:
+    """Return backup_info.json of an archive ({} for archives without it)"""
+    with zipfile.ZipFile(zip_path, 'r') as zipf:
+        if 'backup_info.json' not in zipf.namelist():
+            return {}
+        return json.loads(zipf.read('backup_info.json'))
+
+
+def _prune_backups_sync(keep_bases: int) -> Dict:
+    """Delete archives of all but the newest keep_bases chains in backup_dir()"""
+    by_base: Dict[str, List[str]] = {}
+    if os.path.isdir(backup_dir()):
+        for name in os.listdir(backup_dir()):
+            if not name.endswith('.zip'):
+                continue
+            path = os.path.join(backup_dir(), name)
+            try:
+                base_id = read_backup_info(path).get('base_id')
+            except (zipfile.BadZipFile, ValueError, OSError):
+                continue
+            if base_id:
+                by_base.setdefault(base_id, []).append(path)
+
+    # backup ids are timestamps, so they sort chronologically
+    expired = sorted(by_base)[:-keep_bases] if keep_bases > 0 else []
+    kept = sorted(set(by_base) - set(expired))
+    deleted_files = 0
+    freed_bytes = 0
+    for base_id in expired:
+        for path in by_base[base_id]:
+            freed_bytes += os.path.getsize(path)
+            os.unlink(path)
+            deleted_files += 1
+    return {'expired_bases': expired, 'kept_bases': kept, 'deleted_files': deleted_files, 'freed_bytes': freed_bytes}
+
+
+async def prune_backups(keep_bases: Optional[int] = None) -> Dict:
+    """Apply backup retention: keep the newest keep_bases chains (base + deltas).
+
+    Defaults to settings.backup_retention. Returns deleted_files, freed_bytes and expired_bases.
+    Runs under _backup_chain_lock, so a backup created meanwhile is never mistaken for a
+    chain whose archives are gone.
+    """
+    if keep_bases is None:
+        keep_bases = getattr(settings, 'backup_retention', 7)
+    async with _backup_chain_lock:
+        result = await asyncio.to_thread(_prune_backups_sync, keep_bases)
+
+        # Forget chains whose archives are gone (expired or removed by hand), so the next backup starts a new base
+        async with aiosqlite.connect(settings.db_path) as db:
+            placeholders = ','.join('?' * len(result['kept_bases']))
+            await db.execute(f"DELETE FROM backup_chain WHERE base_id NOT IN ({placeholders})", result['kept_bases'])
             await db.commit()
 
-        logger.info("Database restore completed: %s", stats)
-        return stats
+    if result['expired_bases']:
+        logger.info("Backup retention removed %d archives (%d bytes) from %d old chains",
+                    result['deleted_files'], result['freed_bytes'], len(result['expired_bases']))
+    return result
 
-    except Exception as e:
+
+async def prune_backup_changelog(max_rows: Optional[int] = None) -> int:
+    """Delete backup_changelog rows no incremental backup will read (BACKUP_CHANGELOG_UNUSED_SQL).
+
+    If more than max_rows (default settings.backup_changelog_max_rows, 0 for no cap) are
+    still left, e.g. because scheduled backups are off and the chain is never extended,
+    the changelog and the chain are dropped and the next backup is a full base.
+    Returns the number of rows deleted.
+    """
+    if max_rows is None:
+        max_rows = getattr(settings, 'backup_changelog_max_rows', 0)
+    async with _backup_chain_lock:
+        deleted = await purge_table('backup_changelog', BACKUP_CHANGELOG_UNUSED_SQL)
+
+        if max_rows:
+            async with aiosqlite.connect(settings.db_path) as db:
+                remaining = (await (await db.execute("SELECT COUNT(*) FROM backup_changelog")).fetchone())[0]
+                if remaining > max_rows:
+                    logger.warning("Backup changelog has %d rows (limit %d); dropping it, the next backup will be a full base",
+                                   remaining, max_rows)
+                    await db.execute("DELETE FROM backup_chain")
+                    await db.execute("DELETE FROM backup_changelog")
+                    await db.commit()
+                    deleted += remaining
+
+    if deleted:
+        logger.info("Pruned %d backup changelog rows", deleted)
+    return deleted
+
+
+def _find_chain_sync(info: Dict, archive_path: str) -> List[str]:
+    """Resolve an incremental archive to [base, delta1, ..., this] using backup_dir().
+
+    Checks that every link's from_seq matches its parent's to_seq.
+    """
+    by_id: Dict[str, tuple] = {}
+    if os.path.isdir(backup_dir()):
+        for name in os.listdir(backup_dir()):
+            if name.endswith('.zip'):
+                path = os.path.join(backup_dir(), name)
+                try:
+                    other = read_backup_info(path)
+                except (zipfile.BadZipFile, ValueError, OSError):
+                    continue
+                if other.get('backup_id'):
+                    by_id[other['backup_id']] = (path, other)
+    by_id[info['backup_id']] = (archive_path, info)
+
+    chain = []
+    current = info
+    while True:
+        chain.append(by_id[current['backup_id']][0])
+        if current.get('kind') == 'full':
+            break
+        parent_id = current.get('parent_id')
+        if parent_id not in by_id:
+            raise ValueError(f"Backup chain incomplete: archive {parent_id} not found in {backup_dir()}")
+        parent = by_id[parent_id][1]
+        if parent.get('to_seq') != current.get('from_seq'):
+            raise ValueError(f"Backup chain broken between {parent_id} and {current['backup_id']}")
+        current = parent
+    chain.reverse()
+    return chain
+
+
+def _decompress_zstd_file(src_path: str, dest_path: str) -> None:
+    """Stream-decompress a .zst file"""
+    zstandard = _zstd()
+    with open(src_path, 'rb') as src, open(dest_path, 'wb') as dst:
+        zstandard.ZstdDecompressor().copy_stream(src, dst, read_size=_COPY_CHUNK, write_size=_COPY_CHUNK)
+
+
+# Tables a backup must contain to be accepted for restore
+RESTORE_REQUIRED_TABLES = ('users', 'meetings')
+_SQLITE_MAGIC = b'SQLite format 3\x00'
+
+
+def _is_sqlite_file(path: str) -> bool:
+    with open(path, 'rb') as f:
+        return f.read(len(_SQLITE_MAGIC)) == _SQLITE_MAGIC
+
+
+def _load_sql_dump_sync(sql_dump_path: str, dest_path: str) -> None:
+    """Replay an SQL dump into a fresh database file inside a single transaction.
+
+    The dump is read line by line and cut into statements with sqlite3.complete_statement,
+    which understands quoting, so only one statement is held in memory at a time and any
+    error aborts the whole load.
+    """
+    conn = sqlite3.connect(dest_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("BEGIN")
+        statement: List[str] = []
+        with open(sql_dump_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                statement.append(line)
+                if line.rstrip().endswith(';'):
+                    sql = ''.join(statement)
+                    if sqlite3.complete_statement(sql):
+                        conn.execute(sql)
+                        statement = []
+        leftover = ''.join(statement)
+        if any(l.strip() and not l.strip().startswith('--') for l in statement):
+            raise ValueError(f"SQL dump ends with an incomplete statement: {leftover.strip()[:100]}")
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def _validate_backup_db_sync(path: str) -> Dict[str, int]:
+    """Check integrity and required tables of a database file; return {table: row_count}"""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        result = conn.execute("PRAGMA integrity_check").fetchone()
+        if not result or result[0] != 'ok':
+            raise ValueError(f"Backup database failed integrity check: {result[0] if result else 'unknown'}")
+
+        tables = [r[0] for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )]
+        missing = [t for t in RESTORE_REQUIRED_TABLES if t not in tables]
+        if missing:
+            raise ValueError(f"Backup database is missing tables: {', '.join(missing)}")
+
+        return {t: conn.execute(f"SELECT COUNT(*) FROM {_quote_ident(t)}").fetchone()[0] for t in tables}
+    finally:
+        conn.close()
+
+
+def _swap_database_sync(source_path: str) -> None:
+    """Replace the live database contents with source_path in one step.
+
+    Uses the backup API with all pages in a single step, which SQLite applies as one write
+    transaction on the live file: other connections see either the old or the new database,
+    never a mix. The previous database is kept as <db_path>.pre-restore.
+    """
+    _snapshot_database_sync(settings.db_path + '.pre-restore')
+    src = sqlite3.connect(source_path)
+    dst = sqlite3.connect(settings.db_path, timeout=30)
+    try:
+        src.backup(dst, pages=-1)
+    finally:
+        dst.close()
+        src.close()
+
+
+def _restore_database_sync(backup_path: str, delta_paths: Optional[List[str]] = None) -> Dict:
+    """Build, validate and swap in a restored database; runs in a worker thread.
+
+    delta_paths are incremental SQL deltas replayed in order on top of the base, each in
+    its own transaction on the staging copy.
+    """
+    delta_paths = delta_paths or []
+    if _is_sqlite_file(backup_path) and not delta_paths:
+        source = 'snapshot'
+        staging_path = backup_path
+        cleanup = False
+    elif _is_sqlite_file(backup_path):
+        source = 'snapshot'
+        fd, staging_path = tempfile.mkstemp(suffix='.db', dir=os.path.dirname(os.path.abspath(settings.db_path)))
+        os.close(fd)
+        shutil.copyfile(backup_path, staging_path)
+        cleanup = True
+    else:
+        source = 'sql'
+        fd, staging_path = tempfile.mkstemp(suffix='.db', dir=os.path.dirname(os.path.abspath(settings.db_path)))
+        os.close(fd)
+        os.unlink(staging_path)  # let sqlite create it
+        cleanup = True
+
+    try:
+        if source == 'sql':
+            _load_sql_dump_sync(backup_path, staging_path)
+        for delta_path in delta_paths:
+            _load_sql_dump_sync(delta_path, staging_path)
+        table_rows = _validate_backup_db_sync(staging_path)
+        _swap_database_sync(staging_path)
+    finally:
+        if cleanup:
+            for suffix in ('', '-journal'):
+                if os.path.exists(staging_path + suffix):
+                    os.unlink(staging_path + suffix)
+
+    return {
+        'source': source,
+        'deltas_applied': len(delta_paths),
+        'tables_created': len(table_rows),
+        'rows_inserted': sum(table_rows.values()),
+        'tables': table_rows,
+    }
+
+
+@_bumps_data_version
+async def restore_database(backup_path: str, delta_paths: Optional[List[str]] = None) -> Dict:
+    """Restore database from a backup file.
+
+    Accepts either a page-level snapshot (SQLite file) or an SQL dump. The backup is loaded
+    into a staging database (SQL is replayed in one transaction), validated with
+    integrity_check and a required-table check, and only then swapped into place.
+    A failed restore leaves the live database untouched.
+
+    Returns statistics about restored data: tables_created, rows_inserted (actual rows now
+    in the database), per-table counts in 'tables' and the detected 'source'.
+    """
+    logger.info("Restoring database from: %s", backup_path)
+
+    # Snapshot bases contain leader_lease and data_version too; both must never go back in time
+    # (a reissued fencing token defeats fencing, a reused version lets replicas keep stale screens)
+    async with aiosqlite.connect(settings.db_path) as db:
+        leases = await (await db.execute(
+            "SELECT name, holder, fencing_token, expires_at, acquired_at FROM leader_lease"
+        )).fetchall()
+        row = await (await db.execute("SELECT version FROM data_version WHERE id = 1")).fetchone()
+        live_version = row[0] if row else 0
+
+    try:
+        stats = await asyncio.to_thread(_restore_database_sync, backup_path, delta_paths)
+    except Exception:
         logger.exception("Failed to restore database")
         raise
 
+    # Bring older backups up to the current schema
+    await init_db()
+
+    # The restored data no longer matches the local chain; the next incremental backup starts a new base
+    async with aiosqlite.connect(settings.db_path) as db:
+        await db.execute("DELETE FROM backup_chain")
+        await db.execute("DELETE FROM backup_changelog")
+        # Put the live coordination rows back; tokens only move forward, even if a lease changed
+        # hands between the swap and now
+        await db.executemany(
+            """
+            INSERT INTO leader_lease (name, holder, fencing_token, expires_at, acquired_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                holder = CASE WHEN leader_lease.fencing_token > excluded.fencing_token
+                              THEN leader_lease.holder ELSE excluded.holder END,
+                expires_at = CASE WHEN leader_lease.fencing_token > excluded.fencing_token
+                                  THEN leader_lease.expires_at ELSE excluded.expires_at END,
+                acquired_at = CASE WHEN leader_lease.fencing_token > excluded.fencing_token
+                                   THEN leader_lease.acquired_at ELSE excluded.acquired_at END,
+                fencing_token = MAX(leader_lease.fencing_token, excluded.fencing_token)
+            """,
+            leases
+        )
+        # Every screen changed: move the shared version past anything a replica has seen
+        await db.execute(
+            "INSERT INTO data_version (id, version) VALUES (1, ? + 1) "
+            "ON CONFLICT(id) DO UPDATE SET version = MAX(version, excluded.version - 1) + 1",
+            (live_version,)
+        )
+        await db.commit()
+    bump_data_version()
+
+    logger.info("Database restore completed: %s", {k: stats[k] for k in ('source', 'tables_created', 'rows_inserted')})
+    return stats
+
+
+async def restore_backup_chain(archive_path: str, files: Optional[Dict[str, str]] = None) -> Dict:
+    """Restore from a full or incremental archive.
+
+    An incremental archive is resolved to its base and intermediate deltas (looked up in
+    backup_dir()), and the whole chain is replayed on a staging copy before the swap.
+    files are the already extracted files of archive_path (extracted here if omitted).
+    Returns restore_database() stats plus the extracted files of archive_path.
+    """
+    info = await asyncio.to_thread(read_backup_info, archive_path)
+    chain = [archive_path]
+    if info.get('kind') == 'incremental':
+        chain = await asyncio.to_thread(_find_chain_sync, info, archive_path)
+
+    extracted: List[Dict[str, str]] = []
+    try:
+        for path in chain:
+            if path == archive_path and files is not None:
+                extracted.append(files)
+            else:
+                extracted.append(await asyncio.to_thread(extract_backup_zip, path))
+        base_files = extracted[0]
+        base_db = base_files.get('database_backup.db') or base_files.get('database_backup.sql')
+        if not base_db:
+            raise ValueError("Base backup does not contain a database")
+        deltas = [files['database_delta.sql'] for files in extracted[1:]]
+        stats = await restore_database(base_db, deltas)
+        stats['files'] = extracted[-1]
+        return stats
+    finally:
+        for files in extracted[:-1]:
+            for f in files.values():
+                if os.path.exists(f):
+                    os.unlink(f)
+
 
 def restore_shorteners(backup_path: str) -> bool:
     """Restore shorteners.json from backup file.
@@ -1291,9 +2737,177 @@ def extract_backup_zip(zip_path: str, extract_to: Optional[str] = None) -> Dict[
             for filename in zipf.namelist():
                 extracted_files[filename] = os.path.join(extract_to, filename)
 
+        # zstd-compressed members are exposed under their plain name (e.g. database_backup.sql)
+        for filename in [f for f in extracted_files if f.endswith('.zst')]:
+            plain_name = filename[:-len('.zst')]
+            _decompress_zstd_file(extracted_files[filename], os.path.join(extract_to, plain_name))
+            os.unlink(extracted_files.pop(filename))
+            extracted_files[plain_name] = os.path.join(extract_to, plain_name)
+
         logger.info("Backup ZIP extracted successfully: %s", extracted_files)
         return extracted_files
 
     except Exception as e:
         logger.exception("Failed to extract backup ZIP")
         raise
+
+
+# Retention: table -> (rows that may be deleted, setting with their maximum age, age unit).
+# Each age is compared against the row's own timestamp; an age of 0 keeps the table untouched.
+# A rule without a setting has no age and applies on every run.
+RETENTION_RULES = {
+    'agent_commands': ("status IN ('done', 'failed') AND updated_at < datetime('now', ?)",
+                       'retention_agent_commands_days', 'days'),
+    'shortlinks': ("status = 'failed' AND created_at < datetime('now', ?)",
+                   'retention_failed_shortlinks_days', 'days'),
+    'fsm_states': ("updated_at < datetime('now', ?)",
+                   'retention_fsm_states_hours', 'hours'),
+    # Last, so it also covers rows logged by the deletes above once a backup has consumed them
+    'backup_changelog': (BACKUP_CHANGELOG_UNUSED_SQL, None, None),
+}
+
+
+def archive_dir() -> str:
+    """Directory holding gzip'd JSON-lines archives of rows removed by retention"""
+    return os.path.join(settings.DATA_DIR, 'archive')
+
+
+def _append_archive_sync(table: str, columns: List[str], rows: List[tuple]) -> str:
+    """Append rows as JSON lines to DATA_DIR/archive/<table>-<YYYYMM>.jsonl.gz (one gzip member per call)"""
+    import gzip
+    os.makedirs(archive_dir(), exist_ok=True)
+    path = os.path.join(archive_dir(), f"{table}-{datetime.now(timezone.utc):%Y%m}.jsonl.gz")
+    with gzip.open(path, 'at', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(dict(zip(columns, row)), default=str) + '\n')
+    return path
+
+
+async def _database_size(db) -> Tuple[int, int]:
+    """(file size, bytes in free pages) of an open database"""
+    page_count = (await (await db.execute("PRAGMA page_count")).fetchone())[0]
+    page_size = (await (await db.execute("PRAGMA page_size")).fetchone())[0]
+    freelist = (await (await db.execute("PRAGMA freelist_count")).fetchone())[0]
+    return page_count * page_size, freelist * page_size
+
+
+async def purge_table(table: str, where: str, params: tuple = (), batch_size: int = 500,
+                      archive: bool = False, pause: float = 0.05) -> int:
+    """Delete rows of table matching where in batches of batch_size, one short transaction each.
+
+    Sleeps `pause` seconds between batches so other writers get the lock. With archive=True
+    each batch is appended to the table's archive file before it is deleted. Returns rows deleted.
+    """
+    deleted = 0
+    async with aiosqlite.connect(settings.db_path) as db:
+        while True:
+            cur = await db.execute(f"SELECT rowid, * FROM {table} WHERE {where} LIMIT ?", (*params, batch_size))
+            rows = await cur.fetchall()
+            if not rows:
+                break
+            if archive:
+                columns = [d[0] for d in cur.description][1:]
+                await asyncio.to_thread(_append_archive_sync, table, columns, [r[1:] for r in rows])
+            placeholders = ','.join('?' * len(rows))
+            await db.execute(f"DELETE FROM {table} WHERE rowid IN ({placeholders})", [r[0] for r in rows])
+            await db.commit()
+            deleted += len(rows)
+            if len(rows) < batch_size:
+                break
+            await asyncio.sleep(pause)
+    return deleted
+
+
+async def run_retention(archive: Optional[bool] = None, batch_size: Optional[int] = None) -> Dict:
+    """Apply RETENTION_RULES, then compact the database.
+
+    Compaction runs PRAGMA incremental_vacuum when auto_vacuum is INCREMENTAL. Otherwise it
+    runs one full VACUUM once free pages exceed RETENTION_VACUUM_FREE_PERCENT; that VACUUM
+    also switches the file to incremental auto_vacuum. A full VACUUM holds an exclusive lock
+    for the whole rewrite, so it is skipped (with a warning) for files above
+    RETENTION_VACUUM_MAX_MB. PRAGMA optimize runs every time.
+
+    Returns deleted (per table), vacuum ('incremental', 'full' or None), bytes_before,
+    bytes_after and reclaimed_bytes.
+    """
+    if archive is None:
+        archive = settings.retention_archive
+    batch_size = batch_size or settings.retention_batch_size
+
+    async with aiosqlite.connect(settings.db_path) as db:
+        bytes_before, _ = await _database_size(db)
+
+    deleted = {}
+    for table, (where, setting, unit) in RETENTION_RULES.items():
+        if table == 'backup_changelog':
+            # Under the backup chain lock (and with the row cap), see prune_backup_changelog
+            count = await prune_backup_changelog()
+            if count:
+                deleted[table] = count
+            continue
+        age = getattr(settings, setting, 0)
+        if not age:
+            continue
+        if table == 'fsm_states':
+            # Never drop a state that is still inside the FSM TTL
+            age = max(age, math.ceil((settings.fsm_ttl_seconds or 300) / 3600))
+        count = await purge_table(table, where, (f"-{int(age)} {unit}",), batch_size, archive)
+        if count:
+            deleted[table] = count
+            logger.info("Retention removed %d rows from %s (older than %d %s)", count, table, age, unit)
+    if deleted:
+        await bump_shared_data_version()
+
+    vacuum = None
+    async with aiosqlite.connect(settings.db_path) as db:
+        auto_vacuum = (await (await db.execute("PRAGMA auto_vacuum")).fetchone())[0]
+        size, free_bytes = await _database_size(db)
+        if auto_vacuum == 2:
+            if free_bytes:
+                # Frees one page per step; executescript steps it to completion (execute stops after one)
+                await db.executescript("PRAGMA incremental_vacuum;")
+                vacuum = 'incremental'
+        elif free_bytes and free_bytes * 100 >= size * settings.retention_vacuum_free_percent:
+            max_bytes = settings.retention_vacuum_max_mb * 1024 * 1024
+            if max_bytes and size > max_bytes:
+                logger.warning(
+                    "Skipping full VACUUM: database is %d MB (RETENTION_VACUUM_MAX_MB=%d) and VACUUM locks it for the "
+                    "whole rewrite. Run it during maintenance (stop the bot, then: sqlite3 %s 'PRAGMA auto_vacuum = "
+                    "INCREMENTAL; VACUUM;') to reclaim %d free bytes",
+                    size // (1024 * 1024), settings.retention_vacuum_max_mb, settings.db_path, free_bytes,
+                )
+            else:
+                logger.warning("Running full VACUUM (%d bytes, %d free) and enabling incremental auto_vacuum; "
+                               "all database access blocks until it finishes", size, free_bytes)
+                await db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                await db.execute("VACUUM")
+                vacuum = 'full'
+        await db.execute("PRAGMA optimize")
+        bytes_after, _ = await _database_size(db)
+
+    result = {
+        'deleted': deleted,
+        'vacuum': vacuum,
+        'bytes_before': bytes_before,
+        'bytes_after': bytes_after,
+        'reclaimed_bytes': max(bytes_before - bytes_after, 0),
+    }
+    logger.info("Retention completed: %d rows removed, %d bytes reclaimed (vacuum=%s)",
+                sum(deleted.values()), result['reclaimed_bytes'], vacuum)
+    return result
+
+
+def _instrument_db_functions():
+    """Time every public async function of this module into bot_db_duration_seconds{function=...}.
+
+    Runs once at import, before db/__init__.py re-exports the functions; calls between db
+    functions go through the module globals, so they are timed as well.
+    """
+    module = globals()
+    for name, func in list(module.items()):
+        if name.startswith('_') or not inspect.iscoroutinefunction(func) or func.__module__ != __name__:
+            continue
+        module[name] = timed(DB_SECONDS, function=name)(func)
+
+
+_instrument_db_functions()
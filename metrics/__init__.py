@@ -0,0 +1,53 @@
+# Metrics Package
+from .metrics import (
+    Counter,
+    Histogram,
+    MetricsRegistry,
+    registry,
+    track,
+    timed,
+    render_metrics,
+    metric_samples,
+    HANDLER_SECONDS,
+    HANDLER_ERRORS,
+    DB_SECONDS,
+    DB_ERRORS,
+    ZOOM_SECONDS,
+    ZOOM_ERRORS,
+    SHORTENER_SECONDS,
+    SHORTENER_ERRORS,
+    FSM_SECONDS,
+    FSM_ERRORS,
+    TELEGRAM_SECONDS,
+    TELEGRAM_ERRORS,
+    JOB_SECONDS,
+)
+from .tracing import UpdateTrace, start_trace, span, current_trace
+
+__all__ = [
+    "Counter",
+    "Histogram",
+    "MetricsRegistry",
+    "registry",
+    "track",
+    "timed",
+    "render_metrics",
+    "metric_samples",
+    "HANDLER_SECONDS",
+    "HANDLER_ERRORS",
+    "DB_SECONDS",
+    "DB_ERRORS",
+    "ZOOM_SECONDS",
+    "ZOOM_ERRORS",
+    "SHORTENER_SECONDS",
+    "SHORTENER_ERRORS",
+    "FSM_SECONDS",
+    "FSM_ERRORS",
+    "TELEGRAM_SECONDS",
+    "TELEGRAM_ERRORS",
+    "JOB_SECONDS",
+    "UpdateTrace",
+    "start_trace",
+    "span",
+    "current_trace",
+]
@@ -0,0 +1,279 @@
+"""Metrics Registry
+In-process counters and latency histograms, rendered in the Prometheus text format
+(served by the API server at GET /metrics).
+
+- a metric is a set of series keyed by label values; observing is a dict lookup and a
+  few additions, cheap enough for every DB call
+- series per metric are capped (METRICS_MAX_SERIES); further label combinations are
+  folded into one series labelled "other", so unexpected callback data cannot blow up memory
+- timed() / track() time a coroutine function or block into a histogram and count
+  exceptions in the matching *_errors_total counter
+- track() also opens a tracing span for DB/Zoom/shortener/FSM/Telegram calls, which feeds
+  the slow-update breakdown (metrics/tracing.py)
+- collectors are callables run at scrape time for state that already lives elsewhere
+  (e.g. scheduler job stats)
+"""
+
+import functools
+import math
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+from config import settings
+from .tracing import span
+
+# Seconds; covers a warm SQLite read (~1ms) up to a slow Zoom call
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# A collector returns (name, type, help, [(labels, value), ...]) tuples
+Sample = Tuple[Dict[str, str], float]
+Family = Tuple[str, str, str, List[Sample]]
+
+OVERFLOW_LABEL = 'other'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class _Metric:
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), max_series: int = 500):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.max_series = max_series
+        self._series: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        key = tuple(str(labels.get(n, '')) for n in self.labelnames)
+        if key not in self._series and len(self._series) >= self.max_series:
+            key = tuple(OVERFLOW_LABEL for _ in self.labelnames)
+        return key
+
+    def clear(self):
+        self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type_name}']
+        for key in sorted(self._series):
+            lines.extend(self._render_series(key, self._series[key]))
+        return lines
+
+    def _render_series(self, key: Tuple[str, ...], value: Any) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic count per label combination."""
+
+    type_name = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._series.get(tuple(str(labels.get(n, '')) for n in self.labelnames), 0)
+
+    def _render_series(self, key, value):
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}']
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram (plus sum and count) per label combination."""
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, max_series: int = 500):
+        super().__init__(name, documentation, labelnames, max_series)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            # Per-bucket (non-cumulative) counts, then sum and count
+            series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+        counts = series[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(str(labels.get(n, '')) for n in self.labelnames))
+        return series[2] if series else 0
+
+    def _render_series(self, key, series):
+        counts, total, count = series
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            le = f'le="{_format_value(float(bound))}"'
+            lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+        inf = 'le="+Inf"'
+        lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, inf)} {count}')
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+        lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics plus scrape-time collectors."""
+
+    def __init__(self, max_series: int = 500):
+        self.max_series = max_series
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, *args, max_series=self.max_series, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} already registered as {metric.type_name}")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        for collector in self._collectors:
+            for name, type_name, documentation, samples in collector():
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {type_name}')
+                for labels, value in samples:
+                    lines.append(f'{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        """Drop all recorded series (metrics and collectors stay registered)."""
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+registry = MetricsRegistry(max_series=settings.metrics_max_series)
+
+HANDLER_SECONDS = registry.histogram(
+    'bot_handler_duration_seconds', 'Telegram update handling time by handler', ['handler'])
+HANDLER_ERRORS = registry.counter(
+    'bot_handler_errors_total', 'Telegram updates whose handler raised', ['handler'])
+DB_SECONDS = registry.histogram(
+    'bot_db_duration_seconds', 'Time spent in db functions', ['function'])
+DB_ERRORS = registry.counter(
+    'bot_db_errors_total', 'db function calls that raised', ['function'])
+ZOOM_SECONDS = registry.histogram(
+    'bot_zoom_request_duration_seconds', 'Zoom API call time by endpoint', ['endpoint'])
+ZOOM_ERRORS = registry.counter(
+    'bot_zoom_request_errors_total', 'Zoom API calls that raised', ['endpoint'])
+SHORTENER_SECONDS = registry.histogram(
+    'bot_shortener_request_duration_seconds', 'Shortener provider call time', ['provider', 'mode'])
+SHORTENER_ERRORS = registry.counter(
+    'bot_shortener_request_errors_total', 'Shortener provider calls that failed', ['provider', 'mode'])
+FSM_SECONDS = registry.histogram(
+    'bot_fsm_storage_duration_seconds', 'FSM storage operation time', ['op'])
+FSM_ERRORS = registry.counter(
+    'bot_fsm_storage_errors_total', 'FSM storage operations that raised', ['op'])
+TELEGRAM_SECONDS = registry.histogram(
+    'bot_telegram_request_duration_seconds', 'Telegram Bot API call time by method', ['method'])
+TELEGRAM_ERRORS = registry.counter(
+    'bot_telegram_request_errors_total', 'Telegram Bot API calls that raised', ['method'])
+JOB_SECONDS = registry.histogram(
+    'bot_job_duration_seconds', 'Background job run time', ['job'])
+
+# Histogram -> its error counter, so timed()/track() only need the histogram
+_ERROR_COUNTERS: Dict[str, Counter] = {
+    HANDLER_SECONDS.name: HANDLER_ERRORS,
+    DB_SECONDS.name: DB_ERRORS,
+    ZOOM_SECONDS.name: ZOOM_ERRORS,
+    SHORTENER_SECONDS.name: SHORTENER_ERRORS,
+    FSM_SECONDS.name: FSM_ERRORS,
+    TELEGRAM_SECONDS.name: TELEGRAM_ERRORS,
+}
+
+# Histogram -> span kind recorded in the current update trace
+_SPAN_KINDS: Dict[str, str] = {
+    DB_SECONDS.name: 'db',
+    ZOOM_SECONDS.name: 'zoom',
+    SHORTENER_SECONDS.name: 'shortener',
+    FSM_SECONDS.name: 'fsm',
+    TELEGRAM_SECONDS.name: 'telegram',
+}
+
+
+@contextmanager
+def track(histogram: Histogram, **labels):
+    """Time the block into histogram; an exception also bumps the histogram's error counter.
+
+    For DB/Zoom/shortener/FSM/Telegram histograms the block is also a span of the current update trace.
+    """
+    kind = _SPAN_KINDS.get(histogram.name)
+    started = time.perf_counter()
+    try:
+        if kind is None:
+            yield
+        else:
+            with span(kind, '/'.join(str(v) for v in labels.values())):
+                yield
+    except BaseException as e:
+        errors = _ERROR_COUNTERS.get(histogram.name)
+        # Cancellation is not a failure of the timed operation
+        if errors is not None and isinstance(e, Exception):
+            errors.inc(**labels)
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - started, **labels)
+
+
+def timed(histogram: Histogram, **labels):
+    """Decorator for coroutine functions: track() every call."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with track(histogram, **labels):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def render_metrics() -> str:
+    return registry.render()
+
+
+def metric_samples(values: Dict[str, Any], label: str) -> List[Sample]:
+    """[(labels, value)] for a {label_value: number} dict, skipping missing values."""
+    return [({label: key}, float(value)) for key, value in values.items() if value is not None]
+
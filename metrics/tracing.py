@@ -0,0 +1,115 @@
+"""Update Tracing
+Per-update breakdown of where handling time went, built from contextvar-based spans.
+
+- start_trace() opens a trace for the current update; span() records one DB, Zoom,
+  shortener, FSM or Telegram call into it (metrics.track() opens the span, so every
+  instrumented call is covered). Outside a trace span() only costs a contextvar lookup
+- times are exclusive: a Zoom call made inside a db function is counted as Zoom time,
+  not DB time; a db function calling another db function is one DB span
+- tasks spawned by the handler inherit the trace, so concurrent calls (asyncio.gather)
+  are summed and the kinds may add up to more than the wall time
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+# Order of the kinds in breakdown() and in the trace log line
+SPAN_KINDS = ('db', 'zoom', 'shortener', 'fsm', 'telegram')
+
+
+class _OpenSpan:
+    __slots__ = ('kind', 'child_time')
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.child_time = 0.0
+
+
+class UpdateTrace:
+    """Time per span kind for one update, plus its slowest individual spans."""
+
+    # Individual spans kept per trace (the totals cover all of them)
+    MAX_SPANS = 64
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.totals: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.spans: List[Tuple[float, str, str]] = []
+
+    def add(self, kind: str, name: str, duration: float):
+        self.totals[kind] = self.totals.get(kind, 0.0) + duration
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        if len(self.spans) < self.MAX_SPANS:
+            self.spans.append((duration, kind, name))
+        else:
+            # Keep the slowest ones
+            fastest = min(range(len(self.spans)), key=lambda i: self.spans[i][0])
+            if duration > self.spans[fastest][0]:
+                self.spans[fastest] = (duration, kind, name)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def breakdown(self, total: Optional[float] = None, top: int = 5) -> Dict[str, Any]:
+        """Milliseconds and call counts per kind, the remainder as other_ms and the top slowest spans."""
+        total = self.elapsed() if total is None else total
+        result: Dict[str, Any] = {'total_ms': round(total * 1000, 1)}
+        accounted = 0.0
+        for kind in SPAN_KINDS:
+            spent = self.totals.get(kind, 0.0)
+            accounted += spent
+            result[f'{kind}_ms'] = round(spent * 1000, 1)
+            result[f'{kind}_calls'] = self.counts.get(kind, 0)
+        result['other_ms'] = round(max(total - accounted, 0.0) * 1000, 1)
+        result['slowest'] = [
+            f"{kind}:{name}={duration * 1000:.1f}ms"
+            for duration, kind, name in sorted(self.spans, reverse=True)[:top]
+        ]
+        return result
+
+
+_trace: ContextVar[Optional[UpdateTrace]] = ContextVar('update_trace', default=None)
+_open_span: ContextVar[Optional[_OpenSpan]] = ContextVar('open_span', default=None)
+
+
+def current_trace() -> Optional[UpdateTrace]:
+    return _trace.get()
+
+
+@contextmanager
+def start_trace(name: str):
+    """Trace everything awaited inside the block (and in tasks it spawns); yields the UpdateTrace."""
+    trace = UpdateTrace(name)
+    token = _trace.set(trace)
+    span_token = _open_span.set(None)
+    try:
+        yield trace
+    finally:
+        _open_span.reset(span_token)
+        _trace.reset(token)
+
+
+@contextmanager
+def span(kind: str, name: str):
+    """Record the block as one call of the given kind in the current trace, if any."""
+    trace = _trace.get()
+    parent = _open_span.get()
+    if trace is None or (parent is not None and parent.kind == kind):
+        # No trace, or already inside a span of this kind (which covers this call)
+        yield
+        return
+    current = _OpenSpan(kind)
+    token = _open_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - started
+        _open_span.reset(token)
+        if parent is not None:
+            parent.child_time += duration
+        trace.add(kind, name, max(duration - current.child_time, 0.0))
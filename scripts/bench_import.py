@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Import-Time Benchmark
+Measures how long it takes to import the bot modules and checks that importing
+them has no side effects on DATA_DIR (no shorteners.json created or migrated).
+
+Usage:
+    python scripts/bench_import.py                 # bot.handlers, 10 runs
+    python scripts/bench_import.py -m bot.main -n 20
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def _snapshot_dir(path: str) -> dict:
+    """Return {relative path: mtime} for every file under path"""
+    result = {}
+    for root, _, files in os.walk(path):
+        for name in files:
+            full = os.path.join(root, name)
+            result[os.path.relpath(full, path)] = os.path.getmtime(full)
+    return result
+
+
+def run_once(module: str, env: dict) -> float:
+    """Import module in a fresh interpreter and return the wall time in milliseconds"""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, env=env, check=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import time of bot modules")
+    parser.add_argument("-m", "--module", default="bot.handlers", help="Module to import (default: bot.handlers)")
+    parser.add_argument("-n", "--runs", type=int, default=10, help="Number of timed runs (default: 10)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = dict(os.environ)
+        env["DATA_DIR"] = data_dir
+        env["DB_PATH"] = os.path.join(data_dir, "bench.db")
+        env["PYTHONPATH"] = str(PROJECT_ROOT) + os.pathsep + env.get("PYTHONPATH", "")
+
+        # Warm-up run so .pyc compilation is not part of the measurement
+        run_once(args.module, env)
+        before = _snapshot_dir(data_dir)
+        timings = [run_once(args.module, env) for _ in range(args.runs)]
+        after = _snapshot_dir(data_dir)
+
+    print(f"📦 import {args.module} ({args.runs} runs, fresh interpreter each)")
+    print(f"   mean   : {statistics.mean(timings):8.1f} ms")
+    print(f"   median : {statistics.median(timings):8.1f} ms")
+    print(f"   min/max: {min(timings):8.1f} / {max(timings):.1f} ms")
+
+    changed = sorted(k for k in set(before) | set(after) if before.get(k) != after.get(k))
+    created_on_warmup = sorted(k for k in before if k.startswith("shorteners.json"))
+    if changed or created_on_warmup:
+        print("⚠️  Import touched DATA_DIR:", ", ".join(changed + created_on_warmup))
+        sys.exit(1)
+    print("✅ Import has no side effects on DATA_DIR")
+
+
+if __name__ == "__main__":
+    main()
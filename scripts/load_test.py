@@ -0,0 +1,555 @@
+#!/usr/bin/env python3
+"""
+Load Test Harness
+Drives the real Dispatcher (routers, FSM storage, middleware from bot.main.create_dispatcher)
+with synthetic Message/CallbackQuery updates, while Telegram, Zoom and the URL shortener are
+local aiohttp stand-ins with configurable latency and error injection. Everything runs in one
+process against a fresh database in a temporary DATA_DIR, so runs are reproducible offline.
+
+Reports updates/sec and, per handler, p50/p95/p99 latency plus DB, Zoom, shortener and
+Telegram calls per update (taken from the bot's own update traces).
+
+Usage:
+    python scripts/load_test.py                              # 50 updates/s for 10 s
+    python scripts/load_test.py --rate 200 --duration 30
+    python scripts/load_test.py --rate 0 --concurrency 32    # closed loop: as fast as possible
+    python scripts/load_test.py --zoom-latency-ms 300 --zoom-error-rate 0.05
+    python scripts/load_test.py --mix "list_meetings=5,control_zoom=2" --json result.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Bot modules read their settings at import time, so they are imported in run() after
+# the environment has been pointed at the fake servers.
+
+BOT_TOKEN = "123456:LOADTEST"
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "LoadTestBot", "username": "load_test_bot"}
+
+# Scenario name -> relative weight
+DEFAULT_MIX = "start=2,whoami=2,list_meetings=4,control_zoom=3,meet=1,short_batch=0.2"
+SCENARIOS = ("start", "help", "whoami", "list_meetings", "control_zoom", "meet", "short_batch")
+
+logger = logging.getLogger("load_test")
+
+
+# ============================================================================
+# Fake servers
+# ============================================================================
+
+class FakeService:
+    """Shared latency / error injection for a stand-in server."""
+
+    def __init__(self, name: str, latency_ms: float, jitter_ms: float, error_rate: float, seed: int):
+        self.name = name
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+
+    async def delay(self):
+        self.requests += 1
+        latency = self.latency + (self.rng.uniform(-self.jitter, self.jitter) if self.jitter else 0)
+        if latency > 0:
+            await asyncio.sleep(latency)
+
+    def should_fail(self) -> bool:
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.errors += 1
+            return True
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.requests, "injected_errors": self.errors}
+
+
+def fake_telegram_app(service: FakeService) -> web.Application:
+    """Bot API stand-in: send*/editMessage* return a Message, getMe the bot, everything else True."""
+    message_ids = iter(range(1, 1 << 62))
+
+    async def handle(request: web.Request) -> web.Response:
+        await service.delay()
+        method = request.match_info["method"]
+        if service.should_fail():
+            return web.json_response({"ok": False, "error_code": 500, "description": "Injected error"}, status=500)
+        form = await request.post()
+        lowered = method.lower()
+        if lowered == "getme":
+            result: Any = BOT_USER
+        elif lowered.startswith("send") or lowered.startswith("editmessage"):
+            chat_id = int(form.get("chat_id") or 0)
+            result = {
+                "message_id": int(form.get("message_id") or next(message_ids)),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": BOT_USER,
+                "text": str(form.get("text") or form.get("caption") or ""),
+            }
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", handle)
+    return app
+
+
+def fake_zoom_app(service: FakeService) -> web.Application:
+    """Zoom REST API stand-in: OAuth token, meeting create/get/list; other writes return 204."""
+    meeting_ids = iter(range(8_000_000_001, 9_000_000_000))
+
+    def meeting(meeting_id: str, topic: str = "Load test meeting", start_time: str = "") -> Dict[str, Any]:
+        return {
+            "id": int(meeting_id) if str(meeting_id).isdigit() else meeting_id,
+            "topic": topic,
+            "status": "waiting",
+            "start_time": start_time or "2030-12-31T07:30:00Z",
+            "duration": 60,
+            "join_url": f"https://zoom.us/j/{meeting_id}",
+            "start_url": f"https://zoom.us/s/{meeting_id}",
+            "password": "123456",
+            "participants_count": 0,
+        }
+
+    async def injected(request: web.Request) -> Optional[web.Response]:
+        await service.delay()
+        if service.should_fail():
+            return web.json_response({"code": 500, "message": "Injected error"}, status=500)
+        return None
+
+    async def token(request: web.Request) -> web.Response:
+        return await injected(request) or web.json_response({"access_token": "fake-token", "expires_in": 3600})
+
+    async def create(request: web.Request) -> web.Response:
+        error = await injected(request)
+        if error:
+            return error
+        body = await request.json()
+        return web.json_response(meeting(str(next(meeting_ids)), body.get("topic", ""), body.get("start_time", "")),
+                                 status=201)
+
+    async def list_meetings(request: web.Request) -> web.Response:
+        return await injected(request) or web.json_response({"meetings": [], "total_records": 0})
+
+    async def get_meeting(request: web.Request) -> web.Response:
+        return await injected(request) or web.json_response(meeting(request.match_info["meeting_id"]))
+
+    async def not_found(request: web.Request) -> web.Response:
+        return await injected(request) or web.json_response({"code": 3301, "message": "Not found"}, status=404)
+
+    async def no_content(request: web.Request) -> web.Response:
+        return await injected(request) or web.Response(status=204)
+
+    app = web.Application()
+    app.router.add_post("/oauth/token", token)
+    app.router.add_post("/v2/users/{user_id}/meetings", create)
+    app.router.add_get("/v2/users/{user_id}/meetings", list_meetings)
+    app.router.add_get("/v2/meetings/{meeting_id}/recordings", not_found)
+    app.router.add_get("/v2/meetings/{meeting_id}", get_meeting)
+    app.router.add_get("/v2/live_meetings/{meeting_id}", not_found)
+    app.router.add_route("*", "/v2/{tail:.*}", no_content)
+    return app
+
+
+def fake_shortener_app(service: FakeService) -> web.Application:
+    """Shortener stand-in: POST /shorten {"url": ...} -> {"short_url": ...}."""
+    codes = iter(range(1, 1 << 62))
+
+    async def shorten(request: web.Request) -> web.Response:
+        await service.delay()
+        if service.should_fail():
+            return web.json_response({"error": "Injected error"}, status=500)
+        return web.json_response({"short_url": f"https://short.test/{next(codes):x}"})
+
+    app = web.Application()
+    app.router.add_post("/shorten", shorten)
+    return app
+
+
+def shortener_config(base_url: str) -> Dict[str, Any]:
+    """shorteners.json with the fake provider as the only (default and fallback) provider."""
+    return {
+        "version": "2.0",
+        "providers": {
+            "fake": {
+                "name": "FakeShortener",
+                "description": "Local load-test stand-in",
+                "enabled": True,
+                "api_url": f"{base_url}/shorten",
+                "method": "post",
+                "headers": {"Content-Type": "application/json"},
+                "body": {"url": "{url}"},
+                "response_type": "json",
+                "success_check": "status == 200 and response.get('short_url')",
+                "url_extract": "response.get('short_url', '')",
+            }
+        },
+        "default_provider": "fake",
+        "fallback_provider": "fake",
+    }
+
+
+async def start_server(app: web.Application) -> Tuple[web.AppRunner, str]:
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+# ============================================================================
+# Synthetic updates
+# ============================================================================
+
+class UpdateFactory:
+    """Builds Update payloads for each scenario; ids and choices come from a seeded RNG."""
+
+    def __init__(self, user_ids: List[int], meeting_ids: List[str], rng: random.Random):
+        self.user_ids = user_ids
+        self.meeting_ids = meeting_ids
+        self.rng = rng
+        self.update_id = 0
+        self.meet_count = 0
+
+    def _user(self, user_id: int) -> Dict[str, Any]:
+        return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}", "username": f"user{user_id}"}
+
+    def _message(self, user_id: int, text: str, from_bot: bool = False) -> Dict[str, Any]:
+        return {
+            "message_id": self.update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": BOT_USER if from_bot else self._user(user_id),
+            "text": text,
+        }
+
+    def message(self, user_id: int, text: str) -> Dict[str, Any]:
+        self.update_id += 1
+        return {"update_id": self.update_id, "message": self._message(user_id, text)}
+
+    def callback(self, user_id: int, data: str) -> Dict[str, Any]:
+        self.update_id += 1
+        return {
+            "update_id": self.update_id,
+            "callback_query": {
+                "id": str(self.update_id),
+                "from": self._user(user_id),
+                "chat_instance": str(user_id),
+                "data": data,
+                "message": self._message(user_id, "menu", from_bot=True),
+            },
+        }
+
+    def build(self, scenario: str) -> Dict[str, Any]:
+        user_id = self.rng.choice(self.user_ids)
+        if scenario == "start":
+            return self.message(user_id, "/start")
+        if scenario == "help":
+            return self.message(user_id, "/help")
+        if scenario == "whoami":
+            return self.callback(user_id, "whoami")
+        if scenario == "list_meetings":
+            return self.callback(user_id, "list_meetings")
+        if scenario == "control_zoom":
+            return self.callback(user_id, f"control_zoom:{self.rng.choice(self.meeting_ids)}")
+        if scenario == "meet":
+            self.meet_count += 1
+            return self.message(user_id, f'/meet "Load test {self.meet_count}" "31-12-2030" "14:30"')
+        if scenario == "short_batch":
+            return self.message(user_id, "/short_batch")
+        raise ValueError(f"Unknown scenario {scenario}")
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario '{name}' (available: {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise SystemExit("--mix needs at least one scenario with a positive weight")
+    return mix
+
+
+# ============================================================================
+# Measurement
+# ============================================================================
+
+class Results:
+    """Latency samples and per-update call counts, keyed by the bot's handler label."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.calls: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def add_calls(self, handler: str, counts: Dict[str, int]):
+        for kind, count in counts.items():
+            self.calls[handler][kind] += count
+
+    @staticmethod
+    def percentile(sorted_values: List[float], pct: float) -> float:
+        # Nearest-rank
+        if not sorted_values:
+            return 0.0
+        index = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+        return sorted_values[min(index, len(sorted_values) - 1)]
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        from metrics.tracing import SPAN_KINDS
+
+        handlers = {}
+        total = 0
+        for handler in sorted(self.latencies):
+            values = sorted(self.latencies[handler])
+            total += len(values)
+            entry = {
+                "count": len(values),
+                "errors": self.errors.get(handler, 0),
+                "p50_ms": round(self.percentile(values, 50) * 1000, 2),
+                "p95_ms": round(self.percentile(values, 95) * 1000, 2),
+                "p99_ms": round(self.percentile(values, 99) * 1000, 2),
+                "max_ms": round(values[-1] * 1000, 2),
+            }
+            for kind in SPAN_KINDS:
+                entry[f"{kind}_per_update"] = round(self.calls[handler].get(kind, 0) / len(values), 2)
+            handlers[handler] = entry
+        db_calls = sum(c.get("db", 0) for c in self.calls.values())
+        return {
+            "updates": total,
+            "errors": sum(self.errors.values()),
+            "elapsed_s": round(elapsed, 3),
+            "updates_per_sec": round(total / elapsed, 1) if elapsed else 0.0,
+            "db_per_update": round(db_calls / total, 2) if total else 0.0,
+            "handlers": handlers,
+        }
+
+
+def print_report(summary: Dict[str, Any], services: Dict[str, Dict[str, int]]):
+    print(f"\n📈 {summary['updates']} updates in {summary['elapsed_s']} s: "
+          f"{summary['updates_per_sec']} updates/s, {summary['errors']} errors, "
+          f"{summary['db_per_update']} DB calls/update")
+    header = f"{'handler':<24}{'count':>7}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}" \
+             f"{'db/upd':>8}{'zoom/upd':>9}{'short/upd':>10}{'tg/upd':>8}"
+    print(header)
+    print("-" * len(header))
+    for handler, h in summary["handlers"].items():
+        print(f"{handler[:23]:<24}{h['count']:>7}{h['errors']:>5}{h['p50_ms']:>9.1f}{h['p95_ms']:>9.1f}"
+              f"{h['p99_ms']:>9.1f}{h['max_ms']:>9.1f}{h['db_per_update']:>8.2f}{h['zoom_per_update']:>9.2f}"
+              f"{h['shortener_per_update']:>10.2f}{h['telegram_per_update']:>8.2f}")
+    print("\nFake servers: " + ", ".join(
+        f"{name} {s['requests']} requests ({s['injected_errors']} injected errors)" for name, s in services.items()))
+
+
+# ============================================================================
+# Run
+# ============================================================================
+
+async def seed_database(users: int, meetings: int) -> Tuple[List[int], List[str]]:
+    """Admin users (so every scenario is allowed) and upcoming meetings for control_zoom/short_batch."""
+    from db import init_db, add_pending_user, update_user_status, add_meeting
+
+    await init_db()
+    user_ids = [100_000 + i for i in range(users)]
+    for user_id in user_ids:
+        await add_pending_user(user_id, f"user{user_id}")
+        await update_user_status(user_id, "whitelisted", "admin")
+    meeting_ids = [str(7_000_000_001 + i) for i in range(meetings)]
+    start = datetime(2030, 12, 31, 7, 30, tzinfo=timezone.utc)
+    for i, meeting_id in enumerate(meeting_ids):
+        start_time = (start + timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        await add_meeting(meeting_id, f"Seed meeting {i + 1}", start_time, f"https://zoom.us/j/{meeting_id}", user_ids[0])
+    return user_ids, meeting_ids
+
+
+async def run(args) -> Dict[str, Any]:
+    services = {
+        "telegram": FakeService("telegram", args.telegram_latency_ms, args.jitter_ms, args.telegram_error_rate, args.seed + 1),
+        "zoom": FakeService("zoom", args.zoom_latency_ms, args.jitter_ms, args.zoom_error_rate, args.seed + 2),
+        "shortener": FakeService("shortener", args.shortener_latency_ms, args.jitter_ms,
+                                 args.shortener_error_rate, args.seed + 3),
+    }
+    runners = []
+    telegram_runner, telegram_url = await start_server(fake_telegram_app(services["telegram"]))
+    zoom_runner, zoom_url = await start_server(fake_zoom_app(services["zoom"]))
+    shortener_runner, shortener_url = await start_server(fake_shortener_app(services["shortener"]))
+    runners.extend([telegram_runner, zoom_runner, shortener_runner])
+
+    data_dir = tempfile.mkdtemp(prefix="zoom-telebot-load-")
+    with open(os.path.join(data_dir, "shorteners.json"), "w", encoding="utf-8") as f:
+        json.dump(shortener_config(shortener_url), f, indent=2)
+    os.environ.update({
+        "DATA_DIR": data_dir,
+        "DB_PATH": os.path.join(data_dir, "load_test.db"),
+        "BOT_TOKEN": BOT_TOKEN,
+        "ZOOM_ACCOUNT_ID": "load-test",
+        "ZOOM_CLIENT_ID": "load-test",
+        "ZOOM_CLIENT_SECRET": "load-test",
+        "ZOOM_AUDIENCE": zoom_url,
+        "ZOOM_OAUTH_URL": f"{zoom_url}/oauth/token",
+        "DEFAULT_SHORTENER": "fake",
+        "LEADER_ELECTION": "false",
+        "ENABLE_DEPENDENCY_AUDIT": "false",
+        "SLOW_UPDATE_MS": str(args.slow_update_ms),
+    })
+
+    from aiogram import Bot
+    from aiogram.client.default import DefaultBotProperties
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiogram.enums import ParseMode
+    from aiogram.types import Update
+    from bot.main import create_dispatcher
+    from bot.middleware import handler_label
+    from metrics import current_trace
+
+    user_ids, meeting_ids = await seed_database(args.users, args.meetings)
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base(telegram_url))
+    bot = Bot(token=BOT_TOKEN, session=session, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    dp = create_dispatcher(bot)
+    results = Results()
+
+    async def record_calls(handler, event, data):
+        # Runs inside TimingMiddleware, so the update's trace is the current one
+        trace = current_trace()
+        try:
+            return await handler(event, data)
+        finally:
+            if trace is not None:
+                results.add_calls(trace.name, trace.counts)
+
+    dp.update.middleware(record_calls)
+
+    rng = random.Random(args.seed)
+    mix = parse_mix(args.mix)
+    names, weights = list(mix), list(mix.values())
+    factory = UpdateFactory(user_ids, meeting_ids, rng)
+
+    async def feed(payload: Dict[str, Any], scheduled: float):
+        update = Update.model_validate(payload, context={"bot": bot})
+        label = handler_label(update, {})
+        try:
+            await dp.feed_update(bot, update)
+        except Exception as e:
+            results.errors[label] += 1
+            logger.debug("Update %s (%s) failed: %s", payload["update_id"], label, e)
+        # Measured from the scheduled send time, so queueing behind a saturated bot counts too
+        results.latencies[label].append(time.perf_counter() - scheduled)
+
+    # Warm-up: one update per scenario (token fetch, first connections), not measured
+    for name in names:
+        await feed(factory.build(name), time.perf_counter())
+    results = Results()
+
+    started = time.perf_counter()
+    if args.rate > 0:
+        # Open loop: updates are sent on a fixed schedule regardless of how fast they complete
+        in_flight = asyncio.Semaphore(args.max_in_flight)
+        tasks = []
+        total = int(args.rate * args.duration)
+        # Scenario sequence is drawn up front, so it only depends on the seed
+        schedule = [factory.build(name) for name in rng.choices(names, weights, k=total)]
+
+        async def one(payload, scheduled):
+            async with in_flight:
+                await feed(payload, scheduled)
+
+        for i, payload in enumerate(schedule):
+            scheduled = started + i / args.rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(payload, scheduled)))
+        await asyncio.gather(*tasks)
+    else:
+        # Closed loop: each worker sends its next update as soon as the previous one finished
+        deadline = started + args.duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                payload = factory.build(rng.choices(names, weights)[0])
+                await feed(payload, time.perf_counter())
+
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    summary = results.summary(elapsed)
+    service_stats = {name: service.stats() for name, service in services.items()}
+
+    await dp.storage.close()
+    await bot.session.close()
+    for runner in runners:
+        await runner.cleanup()
+    if not args.keep_data:
+        import shutil
+        shutil.rmtree(data_dir, ignore_errors=True)
+    else:
+        print(f"Data kept in {data_dir}")
+
+    return {"config": vars(args), "summary": summary, "fake_servers": service_stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the bot's handlers against fake Telegram/Zoom/shortener servers")
+    parser.add_argument("--rate", type=float, default=50, help="Updates per second (0: closed loop, see --concurrency; default: 50)")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of load (default: 10)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Workers in closed-loop mode (default: 16)")
+    parser.add_argument("--max-in-flight", type=int, default=500, help="Open-loop cap on concurrent updates (default: 500)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Scenario weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--users", type=int, default=50, help="Synthetic users (default: 50)")
+    parser.add_argument("--meetings", type=int, default=100, help="Meetings seeded in the database (default: 100)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for scenarios and error injection (default: 1)")
+    parser.add_argument("--telegram-latency-ms", type=float, default=20, help="Fake Telegram latency (default: 20)")
+    parser.add_argument("--zoom-latency-ms", type=float, default=150, help="Fake Zoom latency (default: 150)")
+    parser.add_argument("--shortener-latency-ms", type=float, default=100, help="Fake shortener latency (default: 100)")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="+/- uniform jitter on every fake latency (default: 0)")
+    parser.add_argument("--telegram-error-rate", type=float, default=0, help="Share of failing Telegram calls (default: 0)")
+    parser.add_argument("--zoom-error-rate", type=float, default=0, help="Share of failing Zoom calls (default: 0)")
+    parser.add_argument("--shortener-error-rate", type=float, default=0, help="Share of failing shortener calls (default: 0)")
+    parser.add_argument("--slow-update-ms", type=int, default=0, help="SLOW_UPDATE_MS for the run (default: 0, no trace lines)")
+    parser.add_argument("--log-level", default="WARNING", help="Log level of the bot during the run (default: WARNING)")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    parser.add_argument("--keep-data", action="store_true", help="Keep the temporary DATA_DIR (database) after the run")
+    args = parser.parse_args()
+
+    os.environ["LOG_LEVEL"] = args.log_level.upper()
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.WARNING),
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    mode = f"{args.rate:g} updates/s" if args.rate > 0 else f"closed loop, {args.concurrency} workers"
+    print(f"🚦 Load test: {mode} for {args.duration:g} s, mix {args.mix}, seed {args.seed}")
+    result = asyncio.run(run(args))
+    print_report(result["summary"], result["fake_servers"])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
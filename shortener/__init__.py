@@ -2,17 +2,29 @@
 from .shortener import (
     ShortenerError,
     DynamicShortener,
+    get_shortener,
     make_short,
+    make_short_many,
     get_available_providers,
+    get_provider_config,
     reload_shortener_config,
+    reload_shortener_config_async,
+    check_shortener_config,
+    watch_shortener_config,
     migrate_shortener_config,
 )
 
 __all__ = [
     "ShortenerError",
     "DynamicShortener",
+    "get_shortener",
     "make_short",
+    "make_short_many",
     "get_available_providers",
+    "get_provider_config",
     "reload_shortener_config",
+    "reload_shortener_config_async",
+    "check_shortener_config",
+    "watch_shortener_config",
     "migrate_shortener_config",
 ]
\ No newline at end of file
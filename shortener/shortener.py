@@ -1,8 +1,12 @@
 import aiohttp
+import asyncio
+import functools
 import json
 import os
-from typing import Optional, Dict, Any
+import threading
+from typing import Optional, Dict, Any, List, Tuple
 from config import settings
+from metrics import SHORTENER_SECONDS, track
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,40 +16,129 @@ class ShortenerError(RuntimeError):
 	pass
 
 
+# Keys holding Python expressions that are evaluated against provider responses
+_EXPRESSION_KEYS = ('success_check', 'create_success_check', 'url_extract', 'id_extract', 'urls_extract')
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_expression(expr: str):
+	"""Compile a config expression once; eval() then skips re-parsing on every response"""
+	return compile(expr, '<shortener-config>', 'eval')
+
+
+def _validate_providers(providers: Dict[str, Dict[str, Any]]) -> None:
+	"""Check required fields and precompile every expression, raising ShortenerError on bad config"""
+	if not isinstance(providers, dict):
+		raise ShortenerError("'providers' must be an object")
+	for pid, pconfig in providers.items():
+		if not isinstance(pconfig, dict):
+			raise ShortenerError(f"Provider '{pid}' must be an object")
+		for key in ('name', 'api_url'):
+			if not pconfig.get(key):
+				raise ShortenerError(f"Provider '{pid}' is missing '{key}'")
+		for section in (pconfig, pconfig.get('update_endpoint') or {}, pconfig.get('bulk_endpoint') or {}):
+			for key in _EXPRESSION_KEYS:
+				if key in section:
+					try:
+						_compile_expression(section[key])
+					except (SyntaxError, TypeError, ValueError) as e:
+						raise ShortenerError(f"Provider '{pid}' has invalid {key}: {e}")
+
+
 class DynamicShortener:
 	"""Dynamic shortener that loads providers from configuration"""
 
-	def __init__(self, config_file: Optional[str] = None):
+	def __init__(self, config_file: Optional[str] = None, auto_migrate: bool = True):
 		if config_file is None:
 			config_file = os.path.join(settings.DATA_DIR, "shorteners.json")
 		self.config_file = config_file
-		self.providers: Dict[str, Dict[str, Any]] = {}
-		self.default_provider = "tinyurl"
-		self.fallback_provider = "tinyurl"
+		# When False an outdated file is upgraded in memory only; the file itself is
+		# rewritten by an explicit migrate_shortener_config() call at startup.
+		self.auto_migrate = auto_migrate
+		# Everything requests read lives in one immutable snapshot dict which is
+		# replaced wholesale on reload, so a request that captured it keeps a
+		# consistent provider table even if the file changes mid-flight.
+		self._snapshot: Dict[str, Any] = self._make_snapshot({}, "tinyurl", "tinyurl")
+		self._seen_mtime: Optional[float] = None
 		self._load_config()
 
-	def _load_config(self):
-		"""Load provider configurations from JSON file"""
-		try:
-			config_file_to_use = self.config_file
-			
-			if os.path.exists(config_file_to_use):
-				with open(config_file_to_use, 'r', encoding='utf-8') as f:
-					config = json.load(f)
+	@staticmethod
+	def _make_snapshot(providers: Dict[str, Dict[str, Any]], default_provider: str,
+					   fallback_provider: str, mtime: Optional[float] = None) -> Dict[str, Any]:
+		return {
+			'providers': providers,
+			'default_provider': default_provider,
+			'fallback_provider': fallback_provider,
+			'mtime': mtime,
+		}
 
-				# Check if migration is needed
-				config_version = config.get('version', '1.0')
-				if self._needs_migration(config_version, config):
-					logger.info("Schema migration detected. Running migration...")
-					config = self._migrate_config(config)
+	@property
+	def providers(self) -> Dict[str, Dict[str, Any]]:
+		return self._snapshot['providers']
+
+	@providers.setter
+	def providers(self, value: Dict[str, Dict[str, Any]]):
+		self._snapshot = dict(self._snapshot, providers=value)
+
+	@property
+	def default_provider(self) -> str:
+		return self._snapshot['default_provider']
+
+	@default_provider.setter
+	def default_provider(self, value: str):
+		self._snapshot = dict(self._snapshot, default_provider=value)
+
+	@property
+	def fallback_provider(self) -> str:
+		return self._snapshot['fallback_provider']
+
+	@fallback_provider.setter
+	def fallback_provider(self, value: str):
+		self._snapshot = dict(self._snapshot, fallback_provider=value)
+
+	def _snapshot_from_config(self, config: Dict[str, Any], mtime: Optional[float] = None) -> Dict[str, Any]:
+		"""Validate a parsed config and turn it into a provider snapshot"""
+		providers = config.get('providers', {})
+		_validate_providers(providers)
+		# Filter only enabled providers
+		providers = {k: v for k, v in providers.items() if v.get('enabled', True)}
+		return self._make_snapshot(
+			providers,
+			config.get('default_provider', 'tinyurl'),
+			config.get('fallback_provider', 'tinyurl'),
+			mtime,
+		)
+
+	def _build_snapshot(self) -> Dict[str, Any]:
+		"""
+		Read, migrate and validate the config file into a new snapshot.
 
-				self.providers = config.get('providers', {})
-				self.default_provider = config.get('default_provider', 'tinyurl')
-				self.fallback_provider = config.get('fallback_provider', 'tinyurl')
+		Only does blocking file I/O and never touches the live snapshot, so it can
+		run in a worker thread while requests keep using the current providers.
+		"""
+		with open(self.config_file, 'r', encoding='utf-8') as f:
+			config = json.load(f)
 
-				# Filter only enabled providers
-				self.providers = {k: v for k, v in self.providers.items() if v.get('enabled', True)}
+		# Check if migration is needed
+		config_version = config.get('version', '1.0')
+		if self._needs_migration(config_version, config):
+			if self.auto_migrate:
+				logger.info("Schema migration detected. Running migration...")
+				config = self._migrate_config(config)
+			else:
+				logger.warning("%s uses an outdated schema (v%s); upgrading in memory until it is migrated",
+							   self.config_file, config_version)
+				config = self._merge_config(config)
+
+		# Stat after a possible migration rewrite so the watcher does not reload our own write
+		return self._snapshot_from_config(config, os.path.getmtime(self.config_file))
 
+	def _load_config(self):
+		"""Load provider configurations from JSON file"""
+		try:
+			if os.path.exists(self.config_file):
+				self._snapshot = self._build_snapshot()
+				self._seen_mtime = self._snapshot['mtime']
 				logger.info("Loaded %d shortener providers from %s", len(self.providers), self.config_file)
 			else:
 				logger.warning("Config file %s not found, creating default configuration", self.config_file)
@@ -121,7 +214,24 @@ class DynamicShortener:
 			logger.info("Backup of pre-migration config created at: %s", backup_path)
 		except Exception as e:
 			logger.warning("Failed to create pre-migration backup: %s", e)
+
+		migrated_config = self._merge_config(old_config)
+
+		# Save migrated config
+		try:
+			with open(self.config_file, 'w', encoding='utf-8') as f:
+				json.dump(migrated_config, f, indent=2, ensure_ascii=False)
+			logger.info("✅ Config migrated and saved successfully to: %s", self.config_file)
+			logger.info("   - Backup saved to: %s", backup_path)
+			logger.info("   - Version upgraded from %s to 2.0", old_config.get('version', '1.0'))
+		except Exception as e:
+			logger.error("Failed to save migrated config: %s", e)
+			raise
 		
+		return migrated_config
+
+	def _merge_config(self, old_config: Dict[str, Any]) -> Dict[str, Any]:
+		"""Merge an old config into the current schema without touching any file"""
 		# Get default/new config structure
 		default_config = self._get_default_config_dict()
 		
@@ -185,18 +295,6 @@ class DynamicShortener:
 				logger.info("Preserved custom provider: %s", provider_name)
 		
 		migrated_config['providers'] = new_providers
-		
-		# Save migrated config
-		try:
-			with open(self.config_file, 'w', encoding='utf-8') as f:
-				json.dump(migrated_config, f, indent=2, ensure_ascii=False)
-			logger.info("✅ Config migrated and saved successfully to: %s", self.config_file)
-			logger.info("   - Backup saved to: %s", backup_path)
-			logger.info("   - Version upgraded from %s to 2.0", old_config.get('version', '1.0'))
-		except Exception as e:
-			logger.error("Failed to save migrated config: %s", e)
-			raise
-		
 		return migrated_config
 
 	def _get_default_config_dict(self) -> Dict[str, Any]:
@@ -343,9 +441,8 @@ class DynamicShortener:
 			return
 		
 		# Load the config
-		self.providers = {k: v for k, v in providers.items() if v.get('enabled', True)}
-		self.default_provider = config.get('default_provider', 'tinyurl')
-		self.fallback_provider = config.get('fallback_provider', 'tinyurl')
+		self._snapshot = self._snapshot_from_config(config, os.path.getmtime(self.config_file))
+		self._seen_mtime = self._snapshot['mtime']
 
 	def _format_template(self, template: str, **kwargs) -> str:
 		"""Format template string with variables"""
@@ -360,7 +457,7 @@ class DynamicShortener:
 		try:
 			# Simple evaluation with response and status variables
 			local_vars = {'response': response, 'status': status}
-			result = eval(condition, {"__builtins__": {}}, local_vars)
+			result = eval(_compile_expression(condition), {"__builtins__": {}}, local_vars)
 			logger.debug("Condition '%s' evaluated to: %s (status=%s, response type=%s)", 
 						condition, result, status, type(response).__name__)
 			return result
@@ -372,7 +469,7 @@ class DynamicShortener:
 		"""Extract URL from response using expression"""
 		try:
 			local_vars = {'response': response, 'status': status}
-			result = eval(extract_expr, {"__builtins__": {}}, local_vars)
+			result = eval(_compile_expression(extract_expr), {"__builtins__": {}}, local_vars)
 			return str(result) if result else ""
 		except Exception as e:
 			logger.error("Failed to extract URL with '%s': %s", extract_expr, e)
@@ -384,12 +481,14 @@ class DynamicShortener:
 			raise ShortenerError(f"{provider_config['name']} does not support custom aliases")
 
 		# Check if this provider supports multi-step workflow (create + update)
-		if custom and 'update_endpoint' in provider_config:
-			# Multi-step workflow: create first, then update with custom alias
-			return await self._call_multi_step_provider(provider_config, url, custom)
-		else:
-			# Single-step workflow
-			return await self._call_single_step_provider(provider_config, url, custom)
+		multi_step = bool(custom) and 'update_endpoint' in provider_config
+		with track(SHORTENER_SECONDS, provider=provider_config['name'], mode='multi_step' if multi_step else 'single'):
+			if multi_step:
+				# Multi-step workflow: create first, then update with custom alias
+				return await self._call_multi_step_provider(provider_config, url, custom)
+			else:
+				# Single-step workflow
+				return await self._call_single_step_provider(provider_config, url, custom)
 
 	async def _call_single_step_provider(self, provider_config: Dict[str, Any], url: str, custom: Optional[str] = None) -> str:
 		"""Single-step API call for providers that support custom alias in one request"""
@@ -594,6 +693,19 @@ class DynamicShortener:
 
 	async def shorten(self, url: str, provider: Optional[str] = None, custom: Optional[str] = None) -> str:
 		"""Shorten URL using specified or default provider"""
+		short_url, _ = await self._shorten_with(self._snapshot, url, provider, custom)
+		return short_url
+
+	async def _shorten_with(self, snapshot: Dict[str, Any], url: str, provider: Optional[str] = None,
+							custom: Optional[str] = None) -> Tuple[str, str]:
+		"""Shorten URL against a fixed provider snapshot (unaffected by concurrent reloads).
+
+		Returns (short_url, provider that produced it), which differs from the requested
+		provider when a fallback was used.
+		"""
+		providers = snapshot['providers']
+		fallback_provider = snapshot['fallback_provider']
+
 		# Sanitize and validate URL
 		url = url.strip() if url else ""
 		if not url:
@@ -602,31 +714,31 @@ class DynamicShortener:
 		if not url.startswith(('http://', 'https://')):
 			raise ShortenerError(f"Invalid URL format: {url}")
 		
-		provider_name = provider or self.default_provider
+		provider_name = provider or snapshot['default_provider']
 
-		if provider_name not in self.providers:
-			logger.warning("Provider %s not found, using fallback %s", provider_name, self.fallback_provider)
-			provider_name = self.fallback_provider
+		if provider_name not in providers:
+			logger.warning("Provider %s not found, using fallback %s", provider_name, fallback_provider)
+			provider_name = fallback_provider
 
-		if provider_name not in self.providers:
+		if provider_name not in providers:
 			raise ShortenerError("No available shortener providers")
 
-		provider_config = self.providers[provider_name]
+		provider_config = providers[provider_name]
 		logger.info("Shortening URL %s with %s", url, provider_config['name'])
 
 		try:
-			return await self._call_provider(provider_config, url, custom)
+			return await self._call_provider(provider_config, url, custom), provider_name
 		except ShortenerError as primary_error:
 			logger.error("Primary provider %s failed: %s", provider_name, primary_error)
 			
 			# Try all other enabled providers as fallback
-			for alt_provider_name, alt_config in self.providers.items():
+			for alt_provider_name, alt_config in providers.items():
 				if alt_provider_name != provider_name and alt_config.get('enabled', True):
 					logger.warning("Trying alternative provider: %s", alt_provider_name)
 					try:
 						result = await self._call_provider(alt_config, url, custom)
 						logger.info("Successfully shortened with fallback provider: %s", alt_provider_name)
-						return result
+						return result, alt_provider_name
 					except ShortenerError as e:
 						logger.warning("Alternative provider %s also failed: %s", alt_provider_name, e)
 						continue
@@ -635,17 +747,180 @@ class DynamicShortener:
 			logger.error("All shortener providers failed. Original error: %s", primary_error)
 			raise primary_error
 
+	async def _call_bulk_provider(self, provider_config: Dict[str, Any], urls: List[str]) -> List[str]:
+		"""Shorten several URLs with one request to the provider's ``bulk_endpoint``.
+
+		The body template may reference ``{urls}`` as a whole value, which is replaced
+		by the JSON list of URLs. ``urls_extract`` must evaluate to a list of short URLs
+		in the same order as the input.
+		"""
+		bulk_config = provider_config['bulk_endpoint']
+		api_url = bulk_config['api_url']
+
+		headers = bulk_config.get('headers', provider_config.get('headers', {})).copy()
+		if 'auth' in provider_config:
+			auth_config = provider_config['auth']
+			if auth_config['type'] == 'header':
+				for header_name, header_value in auth_config.get('headers', {}).items():
+					headers[header_name] = self._format_template(header_value,
+						sid_id=getattr(settings, 'sid_id', ''),
+						sid_key=getattr(settings, 'sid_key', ''),
+						bitly_token=getattr(settings, 'bitly_token', ''))
+		headers['Content-Type'] = 'application/json'
+
+		body = {k: (urls if v == '{urls}' else v) for k, v in bulk_config.get('body', {'urls': '{urls}'}).items()}
+		logger.debug("Calling %s bulk API with %d URLs: %s", provider_config['name'], len(urls), api_url)
+
+		with track(SHORTENER_SECONDS, provider=provider_config['name'], mode='bulk'):
+			async with aiohttp.ClientSession() as session:
+				try:
+					async with session.post(api_url, data=json.dumps(body), headers=headers) as resp:
+						status = resp.status
+						response_data = await resp.json()
+				except Exception as e:
+					logger.error("Bulk API call failed for %s: %s", provider_config['name'], e)
+					raise ShortenerError(f"{provider_config['name']} bulk API error: {e}")
+
+		success_check = bulk_config.get('success_check', '200<=status<300')
+		if not self._evaluate_condition(success_check, response_data, status):
+			raise ShortenerError(f"{provider_config['name']} bulk error {status}: {response_data}")
+
+		try:
+			local_vars = {'response': response_data, 'status': status}
+			results = eval(_compile_expression(bulk_config.get('urls_extract', 'response')), {"__builtins__": {}}, local_vars)
+		except Exception as e:
+			raise ShortenerError(f"Failed to extract URLs from {provider_config['name']} bulk response: {e}")
+
+		if not isinstance(results, list) or len(results) != len(urls):
+			raise ShortenerError(f"{provider_config['name']} bulk response does not match request size")
+		return [str(r) if r else "" for r in results]
+
+	async def shorten_many(self, urls: List[str], provider: Optional[str] = None, concurrency: int = 5) -> List[Dict[str, Any]]:
+		"""Shorten a list of URLs and return one result dict per input URL.
+
+		Each result has ``url``, ``short_url``, ``error`` and ``provider`` (the provider that produced
+		the link, after any fallback) keys; a failure on one URL never aborts the others. Providers with a ``bulk_endpoint`` are called in chunks
+		of ``bulk_endpoint.max_batch``; anything the bulk call could not shorten is
+		retried one by one with at most ``concurrency`` requests in flight.
+		"""
+		snapshot = self._snapshot
+		provider_name = provider or snapshot['default_provider']
+		if provider_name not in snapshot['providers']:
+			provider_name = snapshot['fallback_provider']
+
+		results: List[Dict[str, Any]] = [{'url': u, 'short_url': None, 'error': None, 'provider': provider_name} for u in urls]
+		pending = list(range(len(urls)))
+		provider_config = snapshot['providers'].get(provider_name)
+
+		if provider_config and 'bulk_endpoint' in provider_config:
+			valid = [i for i in pending if (urls[i] or '').strip().startswith(('http://', 'https://'))]
+			max_batch = int(provider_config['bulk_endpoint'].get('max_batch', 100))
+			for start in range(0, len(valid), max_batch):
+				chunk = valid[start:start + max_batch]
+				try:
+					shorts = await self._call_bulk_provider(provider_config, [urls[i].strip() for i in chunk])
+				except ShortenerError as e:
+					logger.warning("Bulk shortening with %s failed, falling back to single requests: %s", provider_name, e)
+					continue
+				for i, short in zip(chunk, shorts):
+					if short:
+						results[i]['short_url'] = short
+			pending = [i for i in pending if results[i]['short_url'] is None]
+
+		semaphore = asyncio.Semaphore(max(1, concurrency))
+
+		async def _one(i: int):
+			async with semaphore:
+				try:
+					results[i]['short_url'], results[i]['provider'] = await self._shorten_with(snapshot, urls[i], provider)
+				except ShortenerError as e:
+					results[i]['error'] = str(e)
+				except Exception as e:
+					logger.exception("Unexpected error shortening %s", urls[i])
+					results[i]['error'] = str(e)
+
+		await asyncio.gather(*(_one(i) for i in pending))
+
+		ok = sum(1 for r in results if r['short_url'])
+		logger.info("Bulk shortening finished: %d/%d succeeded", ok, len(urls))
+		return results
+
 	def get_available_providers(self) -> Dict[str, str]:
 		"""Get dict of provider_id -> provider_name for UI"""
 		return {pid: pconfig['name'] for pid, pconfig in self.providers.items()}
 
+	def get_provider_config(self, provider_id: str) -> Dict[str, Any]:
+		"""Get the current config of one provider (empty dict if unknown or disabled)"""
+		return self.providers.get(provider_id, {})
+
 	def reload_config(self):
 		"""Reload configuration (useful for runtime updates)"""
 		self._load_config()
 
+	async def reload_config_async(self) -> bool:
+		"""
+		Re-read the config in a worker thread and atomically swap the provider snapshot.
+
+		Requests already in flight finish with the snapshot they started with. If the
+		new file cannot be parsed or fails validation, the current providers stay
+		active and False is returned.
+		"""
+		try:
+			snapshot = await asyncio.to_thread(self._build_snapshot)
+		except Exception as e:
+			logger.error("Shortener config reload rejected, keeping current providers: %s", e)
+			return False
 
-# Global instance
-_shortener = DynamicShortener()
+		current_mtime = self._snapshot.get('mtime')
+		if current_mtime is not None and snapshot['mtime'] is not None and snapshot['mtime'] < current_mtime:
+			# A newer reload already won the race
+			return False
+
+		self._snapshot = snapshot
+		logger.info("Reloaded %d shortener providers from %s", len(snapshot['providers']), self.config_file)
+		return True
+
+	async def check_config(self) -> bool:
+		"""
+		Hot-reload the config file if its mtime changed since the last check.
+
+		A rejected file is not retried until it changes again. Returns True if a
+		new config was loaded.
+		"""
+		try:
+			mtime = os.path.getmtime(self.config_file)
+		except OSError:
+			return False
+		if mtime == self._seen_mtime:
+			return False
+		self._seen_mtime = mtime
+		logger.info("Detected change in %s, reloading shortener providers", self.config_file)
+		return await self.reload_config_async()
+
+	async def watch_config(self, interval: float = 5.0):
+		"""
+		Poll the config file mtime and hot-reload it when it changes.
+
+		Polling (rather than inotify) keeps working on bind mounts and network volumes.
+		"""
+		while True:
+			await asyncio.sleep(interval)
+			await self.check_config()
+
+
+# Shared instance, created on first use so importing this module does no file I/O
+_shortener: Optional[DynamicShortener] = None
+_shortener_lock = threading.Lock()
+
+
+def get_shortener() -> DynamicShortener:
+	"""Return the shared shortener, loading shorteners.json on first use"""
+	global _shortener
+	if _shortener is None:
+		with _shortener_lock:
+			if _shortener is None:
+				_shortener = DynamicShortener(auto_migrate=False)
+	return _shortener
 
 
 async def make_short(url: str, provider: Optional[str] = None, custom: Optional[str] = None) -> str:
@@ -655,17 +930,47 @@ async def make_short(url: str, provider: Optional[str] = None, custom: Optional[
 	provider: optional string provider ID
 	Falls back to default provider if specified provider fails.
 	"""
-	return await _shortener.shorten(url, provider, custom)
+	return await get_shortener().shorten(url, provider, custom)
+
+
+async def make_short_many(urls: List[str], provider: Optional[str] = None, concurrency: int = 5) -> List[Dict[str, Any]]:
+	"""
+	Shorten many URLs in one call.
+
+	Returns a list of {url, short_url, error, provider} dicts in input order. Uses the
+	provider's bulk endpoint when configured, otherwise bounded concurrent calls.
+	"""
+	return await get_shortener().shorten_many(urls, provider, concurrency)
 
 
 def get_available_providers() -> Dict[str, str]:
 	"""Get available providers for UI"""
-	return _shortener.get_available_providers()
+	return get_shortener().get_available_providers()
+
+
+def get_provider_config(provider_id: str) -> Dict[str, Any]:
+	"""Get the current config of one provider (empty dict if unknown)"""
+	return get_shortener().get_provider_config(provider_id)
 
 
 def reload_shortener_config():
 	"""Reload shortener configuration"""
-	_shortener.reload_config()
+	get_shortener().reload_config()
+
+
+async def reload_shortener_config_async() -> bool:
+	"""Reload shortener configuration without blocking the event loop"""
+	return await get_shortener().reload_config_async()
+
+
+async def check_shortener_config() -> bool:
+	"""Hot-reload shorteners.json if it changed since the last check"""
+	return await get_shortener().check_config()
+
+
+async def watch_shortener_config(interval: float = 5.0):
+	"""Hot-reload shorteners.json whenever it changes on disk"""
+	await get_shortener().watch_config(interval)
 
 
 def migrate_shortener_config() -> bool:
@@ -679,10 +984,8 @@ def migrate_shortener_config() -> bool:
 		bool: True if migration was performed, False if no migration was needed
 	"""
 	try:
-		import os
-		from config import settings
-		
-		config_file = os.path.join(settings.DATA_DIR, "shorteners.json")
+		shortener = get_shortener()
+		config_file = shortener.config_file
 		
 		if not os.path.exists(config_file):
 			logger.warning("shorteners.json not found at %s", config_file)
@@ -693,13 +996,13 @@ def migrate_shortener_config() -> bool:
 		
 		config_version = config.get('version', '1.0')
 		
-		if _shortener._needs_migration(config_version, config):
+		if shortener._needs_migration(config_version, config):
 			logger.info("🔄 Starting shortener config migration...")
-			migrated_config = _shortener._migrate_config(config)
+			shortener._migrate_config(config)
 			logger.info("✅ Shortener config migration completed successfully!")
 			
 			# Reload the config into memory
-			_shortener._load_config()
+			shortener._load_config()
 			
 			return True
 		else:
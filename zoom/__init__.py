@@ -1,4 +1,5 @@
 # Zoom Integration Package
 from .zoom import ZoomClient, zoom_client
+from .webhook import verify_signature, url_validation_response
 
-__all__ = ["ZoomClient", "zoom_client"]
\ No newline at end of file
+__all__ = ["ZoomClient", "zoom_client", "verify_signature", "url_validation_response"]
@@ -0,0 +1,51 @@
+"""Zoom webhook signature verification.
+
+Zoom signs every event notification with the app's Secret Token:
+    x-zm-signature: v0=HMAC_SHA256(secret, "v0:{x-zm-request-timestamp}:{raw body}")
+and validates the endpoint URL with an `endpoint.url_validation` event whose
+plainToken must be echoed back together with its HMAC.
+"""
+
+import hashlib
+import hmac
+import time
+from typing import Dict, Optional
+
+# Reject notifications whose timestamp is further than this from our clock (replay protection)
+SIGNATURE_TOLERANCE_SECONDS = 300
+
+
+def _hmac_hex(secret: str, message: str) -> str:
+    return hmac.new(secret.encode('utf-8'), message.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def verify_signature(body: bytes, timestamp: Optional[str], signature: Optional[str], secret: str,
+                     now: Optional[float] = None) -> bool:
+    """Check the x-zm-signature header of a webhook request.
+
+    Args:
+        body: Raw request body, exactly as received.
+        timestamp: Value of the x-zm-request-timestamp header (seconds).
+        signature: Value of the x-zm-signature header ("v0=<hex>").
+        secret: Webhook Secret Token of the Zoom app.
+        now: Current time, for tests.
+
+    Returns:
+        bool: True if the signature matches and the timestamp is fresh.
+    """
+    if not secret or not timestamp or not signature:
+        return False
+    try:
+        ts = int(timestamp)
+    except ValueError:
+        return False
+    current = time.time() if now is None else now
+    if abs(current - ts) > SIGNATURE_TOLERANCE_SECONDS:
+        return False
+    expected = "v0=" + _hmac_hex(secret, f"v0:{timestamp}:{body.decode('utf-8', errors='replace')}")
+    return hmac.compare_digest(expected, signature)
+
+
+def url_validation_response(plain_token: str, secret: str) -> Dict[str, str]:
+    """Response body for an endpoint.url_validation event"""
+    return {"plainToken": plain_token, "encryptedToken": _hmac_hex(secret, plain_token)}
@@ -4,6 +4,7 @@ import asyncio
 import aiohttp
 from typing import Optional, Dict, Any, List
 from config import settings
+from metrics import ZOOM_SECONDS, timed, track
 import logging
 
 
@@ -32,7 +33,7 @@ class ZoomClient:
             basic_raw = f"{client_id}:{client_secret}".encode('utf-8')
             basic_b64 = base64.b64encode(basic_raw).decode('ascii')
 
-            token_url = "https://zoom.us/oauth/token"
+            token_url = settings.zoom_oauth_url
             headers = {
                 "Content-Type": "application/x-www-form-urlencoded",
                 "Authorization": f"Basic {basic_b64}",
@@ -48,31 +49,34 @@ class ZoomClient:
                 data = {"grant_type": "client_credentials"}
                 self.logger.debug("Requesting Zoom token using client_credentials (no account_id configured)")
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(token_url, data=data, headers=headers) as resp:
-                    text = await resp.text()
-                    # attempt to decode JSON body if possible
-                    try:
-                        j = await resp.json()
-                    except Exception:
-                        j = {}
-
-                    # log full response at debug level for diagnostics
-                    self.logger.debug("Zoom token endpoint response status=%s body=%s json=%s", resp.status, text, j)
-
-                    if resp.status >= 400:
-                        self.logger.error("Zoom token endpoint returned %s: %s", resp.status, text)
-                        raise RuntimeError(f"Zoom token error {resp.status}: {text}")
-                    access_token = j.get("access_token")
-                    expires_in = j.get("expires_in", 3600)
-                    if not access_token:
-                        self.logger.error("Zoom token response missing access_token: %s", j)
-                        raise RuntimeError(f"Zoom token response missing access_token: {j}")
-                    self._token = access_token
-                    self._token_exp = time.time() + int(expires_in)
-                    self.logger.info("Obtained new Zoom token, expires in %s seconds", int(expires_in))
-                    return access_token
-
+            # Only actual token requests are timed, not cache hits
+            with track(ZOOM_SECONDS, endpoint='POST /oauth/token'):
+                async with aiohttp.ClientSession() as session:
+                    async with session.post(token_url, data=data, headers=headers) as resp:
+                        text = await resp.text()
+                        # attempt to decode JSON body if possible
+                        try:
+                            j = await resp.json()
+                        except Exception:
+                            j = {}
+
+                        # log full response at debug level for diagnostics
+                        self.logger.debug("Zoom token endpoint response status=%s body=%s json=%s", resp.status, text, j)
+
+                        if resp.status >= 400:
+                            self.logger.error("Zoom token endpoint returned %s: %s", resp.status, text)
+                            raise RuntimeError(f"Zoom token error {resp.status}: {text}")
+                        access_token = j.get("access_token")
+                        expires_in = j.get("expires_in", 3600)
+                        if not access_token:
+                            self.logger.error("Zoom token response missing access_token: %s", j)
+                            raise RuntimeError(f"Zoom token response missing access_token: {j}")
+                        self._token = access_token
+                        self._token_exp = time.time() + int(expires_in)
+                        self.logger.info("Obtained new Zoom token, expires in %s seconds", int(expires_in))
+                        return access_token
+
+    @timed(ZOOM_SECONDS, endpoint='POST /oauth/token')
     async def fetch_token_info(self) -> Dict[str, Any]:
         """Fetch the token endpoint and return the raw response for diagnostics.
 
@@ -87,7 +91,7 @@ class ZoomClient:
         basic_raw = f"{client_id}:{client_secret}".encode('utf-8')
         basic_b64 = base64.b64encode(basic_raw).decode('ascii')
 
-        token_url = "https://zoom.us/oauth/token"
+        token_url = settings.zoom_oauth_url
         headers = {
             "Content-Type": "application/x-www-form-urlencoded",
             "Authorization": f"Basic {basic_b64}",
@@ -124,6 +128,7 @@ class ZoomClient:
             return self._token
         return await self._get_jwt_token()
 
+    @timed(ZOOM_SECONDS, endpoint='GET /meetings/{meetingId}')
     async def get_meeting(self, meeting_id: str) -> Optional[Dict[str, Any]]:
         """Get meeting details from Zoom API.
         
@@ -148,6 +153,7 @@ class ZoomClient:
                     self.logger.error("Failed to get meeting %s: %s - %s", meeting_id, resp.status, text)
                     return None
 
+    @timed(ZOOM_SECONDS, endpoint='GET /meetings/{meetingId}/recordings')
     async def get_meeting_recording_status(self, meeting_id: str) -> Optional[Dict[str, Any]]:
         """Get recording status for a meeting from Zoom API.
         
@@ -174,6 +180,7 @@ class ZoomClient:
                     return None
 
 
+    @timed(ZOOM_SECONDS, endpoint='POST /users/{userId}/meetings')
     async def create_meeting(self, user_id: Optional[str] = "me", topic: str = "Meeting from Bot", start_time: Optional[str] = None, duration: int = 120) -> Dict[str, Any]:
         self.logger.info("Creating meeting for user_id=%s topic=%s start_time=%s", user_id, topic, start_time)
         token = await self.ensure_token()
@@ -211,6 +218,7 @@ class ZoomClient:
                     raise RuntimeError(f"Zoom API error {resp.status}: {text}")
                 return await resp.json()
 
+    @timed(ZOOM_SECONDS, endpoint='GET /users/{userId}/meetings')
     async def list_upcoming_meetings(self, user_id: Optional[str] = "me") -> Dict[str, Any]:
         from datetime import datetime, timedelta, timezone
         self.logger.debug("Listing upcoming meetings for user %s", user_id)
@@ -254,6 +262,7 @@ class ZoomClient:
         # Zoom doesn't provide a 'short url' directly in API; we return join_url
         return meeting.get("join_url") or meeting.get("start_url") or ""
 
+    @timed(ZOOM_SECONDS, endpoint='DELETE /meetings/{meetingId}')
     async def delete_meeting(self, meeting_id: str) -> bool:
         self.logger.info("Deleting meeting meeting_id=%s", meeting_id)
         token = await self.ensure_token()
@@ -272,6 +281,7 @@ class ZoomClient:
                     self.logger.warning("Unexpected status %s for delete_meeting %s", resp.status, meeting_id)
                     return False
 
+    @timed(ZOOM_SECONDS, endpoint='PATCH /meetings/{meetingId}')
     async def update_meeting(self, meeting_id: str, topic: str | None = None, start_time: str | None = None) -> Dict[str, Any]:
         """Patch/update a meeting's topic and/or start_time via Zoom API.
 
@@ -303,6 +313,7 @@ class ZoomClient:
                     return {"ok": True, "status": resp.status}
                 return {"ok": False, "status": resp.status, "body": text}
 
+    @timed(ZOOM_SECONDS, endpoint='PUT /meetings/{meetingId}/status')
     async def end_meeting(self, meeting_id: str) -> bool:
         """Request Zoom to end an ongoing meeting (meeting status endpoint).
 
@@ -331,6 +342,7 @@ class ZoomClient:
             return False
 
 
+    @timed(ZOOM_SECONDS, endpoint='PATCH /meetings/{meetingId} (start)')
     async def start_meeting(self, meeting_id: str) -> Dict[str, Any]:
         """Start a scheduled Zoom meeting mentally and physically.
 
@@ -361,6 +373,7 @@ class ZoomClient:
                     raise Exception(f"Failed to open meeting room: {patch_resp.status} - {text}")
 
 
+    @timed(ZOOM_SECONDS, endpoint='GET /meetings/{meetingId}?type=live')
     async def get_meeting_participants(self, meeting_id: str) -> List[Dict[str, Any]]:
         """Get list of participants in an active meeting.
         
@@ -387,6 +400,7 @@ class ZoomClient:
                     return []
 
 
+    @timed(ZOOM_SECONDS, endpoint='PUT /meetings/{meetingId}/participants/status')
     async def mute_all_participants(self, meeting_id: str) -> bool:
         """Mute all participants in an active meeting."""
         self.logger.info("Muting all participants in meeting %s", meeting_id)
@@ -407,6 +421,7 @@ class ZoomClient:
                     return False
 
 
+    @timed(ZOOM_SECONDS, endpoint='PATCH /live_meetings/{meetingId}/events')
     async def control_live_meeting_recording(self, meeting_id: str, action: str) -> bool:
         """Control recording for a live meeting using live_meetings events API.
         
@@ -468,6 +483,7 @@ class ZoomClient:
                     return False
 
 
+    @timed(ZOOM_SECONDS, endpoint='GET /live_meetings/{meetingId}')
     async def get_live_meeting_details(self, meeting_id: str) -> Optional[Dict[str, Any]]:
         """Get live meeting details including recording status.
         
@@ -494,6 +510,7 @@ class ZoomClient:
                     return None
 
 
+    @timed(ZOOM_SECONDS, endpoint='GET /meetings/{meetingId}/recordings')
     async def get_cloud_recording_urls(self, meeting_id: str) -> Optional[Dict[str, Any]]:
         """Get cloud recording download URLs for a completed meeting.
         
@@ -533,6 +550,7 @@ class ZoomClient:
                                        meeting_id, resp.status, text)
                     return None
 
+    @timed(ZOOM_SECONDS, endpoint='DELETE /meetings/{meetingId}/recordings')
     async def delete_cloud_recording(self, meeting_id: str) -> bool:
         """Delete all cloud recording files for a meeting by moving them to trash.
         